@@ -0,0 +1,386 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from hooks.event_log import EventType, EVENT_LOG_EXT, read_event_log
+
+# "2025-05-01 12:00:00 - INFO - Event: Death | Participant: 1 | Health: 0 | ..."
+EVENT_LINE = re.compile(r"Event: (?P<event>\w+)(?P<fields>.*)$")
+FIELD = re.compile(r"\|\s*(?:Current |New )?(?P<key>\w+): (?P<value>[^|]+?)\s*(?=\||$)")
+TOTAL_DURATION_LINE = re.compile(r"Total_duration: (?P<value>\S+)")
+
+EVENT_NAMES = {
+    "TurnStart": EventType.TURN_START,
+    "Death": EventType.DEATH,
+    "LevelComplete": EventType.LEVEL_COMPLETE,
+    "DoorInteracted": EventType.DOOR_INTERACTED,
+    "DifficultyUpdate": EventType.DIFFICULTY_UPDATE,
+}
+
+# event tuple shared by all pipeline stages
+# (event, participant, health, deaths, time_taken, health_mult, damage_mult)
+NO_PARTICIPANT = -1
+
+LEVEL_COLUMNS = {
+    "participant": "int32",
+    "session": "int32",
+    "level": "int32",
+    "completed": "bool",
+    "start_time": "float32",
+    "duration": "float32",
+    "deaths": "int32",
+    "doors": "int32",
+    "end_health": "float32",
+    "start_health_mult": "float32",
+    "start_damage_mult": "float32",
+    "end_health_mult": "float32",
+    "end_damage_mult": "float32",
+}
+
+TRAJECTORY_COLUMNS = {
+    "participant": "int32",
+    "session": "int32",
+    "level": "int32",
+    "event": "uint8",
+    "time": "float32",
+    "deaths": "int32",
+    "health_mult": "float32",
+    "damage_mult": "float32",
+}
+
+TABLES = {"levels": LEVEL_COLUMNS, "trajectory": TRAJECTORY_COLUMNS}
+MERGE_CHUNK_ROWS = 1 << 20  # rows of a part column copied into the summary at once
+
+
+# -------- parse -------- #
+def read_lines(path):
+    with open(path, encoding="utf-8", errors="replace") as file:
+        yield from file
+
+
+def parse_text_log(lines):
+    """Parse the text view written by hooks/logger.py into event tuples."""
+    participant = NO_PARTICIPANT
+    for line in lines:
+        if match := EVENT_LINE.search(line):
+            event = EVENT_NAMES.get(match["event"])
+            if event is None:
+                continue
+            fields = {m["key"]: m["value"] for m in FIELD.finditer(match["fields"])}
+            participant = int(fields.get("Participant", participant))
+            yield (
+                event,
+                participant,
+                float(fields.get("Health", 0)),
+                int(float(fields.get("Deaths", 0))),
+                float(fields.get("TimeTaken", 0)),
+                float(fields.get("HealthMult", 1)),
+                float(fields.get("DamageMult", 1)),
+            )
+        elif match := TOTAL_DURATION_LINE.search(line):
+            # the total duration line carries no participant: use the last seen
+            yield (
+                EventType.TOTAL_DURATION,
+                participant,
+                0.0,
+                0,
+                float(match["value"]),
+                1.0,
+                1.0,
+            )
+
+
+def parse_event_log(path):
+    """Binary event logs from hooks/event_log.py, as the same event tuples."""
+    for record in read_event_log(path).tolist():
+        event, participant, _, health, deaths, time_taken, health_mult, damage_mult = (
+            record
+        )
+        yield (
+            EventType(event),
+            participant,
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
+        )
+
+
+def parse_file(path):
+    if path.endswith(EVENT_LOG_EXT):
+        return parse_event_log(path)
+    return parse_text_log(read_lines(path))
+
+
+# -------- sessionize -------- #
+def sessionize(events):
+    """
+    Tag each event with (session, level). A session starts at every TurnStart
+    of a participant; the level advances after each LevelComplete.
+    """
+    sessions = {}  # participant -> [session, level]
+    for event in events:
+        kind, participant = event[0], event[1]
+        if kind == EventType.TURN_START or participant not in sessions:
+            count = sessions[participant][0] + 1 if participant in sessions else 0
+            sessions[participant] = [count, 0]
+
+        session, level = sessions[participant]
+        yield session, level, event
+
+        if kind == EventType.LEVEL_COMPLETE:
+            sessions[participant][1] += 1
+
+
+# -------- aggregate -------- #
+class LevelAggregate:
+    def __init__(self, participant, session, level, start_time, deaths, mults):
+        self.participant = participant
+        self.session = session
+        self.level = level
+        self.completed = False
+        self.start_time = start_time
+        self.end_time = start_time
+        self.start_deaths = self.end_deaths = deaths
+        self.doors = 0
+        self.end_health = float("nan")  # no health sample in this level yet
+        self.start_mults = self.end_mults = mults
+
+    def add(self, event):
+        kind, _, health, deaths, time_taken, health_mult, damage_mult = event
+        self.end_time = max(self.end_time, time_taken)
+        self.end_deaths = max(self.end_deaths, deaths)
+        if kind == EventType.TOTAL_DURATION:
+            return None
+
+        self.end_health = health
+        if kind == EventType.DOOR_INTERACTED:
+            self.doors += 1
+        if kind == EventType.LEVEL_COMPLETE:
+            self.completed = True
+        if kind != EventType.TURN_START:
+            self.end_mults = health_mult, damage_mult
+
+    def to_row(self):
+        return (
+            self.participant,
+            self.session,
+            self.level,
+            self.completed,
+            self.start_time,
+            self.end_time - self.start_time,
+            self.end_deaths - self.start_deaths,
+            self.doors,
+            self.end_health,
+            *self.start_mults,
+            *self.end_mults,
+        )
+
+
+def aggregate_levels(tagged_events):
+    """
+    Stream per-level rows and per-event trajectory rows; a level row is
+    yielded once the participant's next level starts or the events end.
+    """
+    open_levels = {}  # (participant, session) -> LevelAggregate
+    for session, level, event in tagged_events:
+        kind, participant, _, deaths, time_taken, health_mult, damage_mult = event
+        key = participant, session
+
+        aggregate = open_levels.get(key)
+        if aggregate is not None and aggregate.level != level:
+            yield "level", aggregate.to_row()
+            aggregate = None
+        if aggregate is None:
+            # a new level starts with the multipliers the previous one ended with
+            previous = open_levels.pop(key, None)
+            mults = previous.end_mults if previous else (1.0, 1.0)
+            start_deaths = previous.end_deaths if previous else 0
+            start_time = previous.end_time if previous else 0.0
+            aggregate = LevelAggregate(
+                participant, session, level, start_time, start_deaths, mults
+            )
+            open_levels[key] = aggregate
+
+        aggregate.add(event)
+        if kind != EventType.TOTAL_DURATION:
+            row = (
+                participant,
+                session,
+                level,
+                kind,
+                time_taken,
+                deaths,
+                health_mult,
+                damage_mult,
+            )
+            yield "trajectory", row
+
+    for aggregate in open_levels.values():
+        yield "level", aggregate.to_row()
+
+
+def process_file(path, part_dir):
+    """
+    Run the whole pipeline over one log file (executed in a worker process).
+    Its columns are saved to `part_dir`, only the row counts are returned.
+    """
+    levels, trajectory = [], []
+    for kind, row in aggregate_levels(sessionize(parse_file(path))):
+        (levels if kind == "level" else trajectory).append(row)
+    os.makedirs(part_dir)
+    for table, rows in (("levels", levels), ("trajectory", trajectory)):
+        for name, column in to_columns(rows, TABLES[table]).items():
+            np.save(os.path.join(part_dir, f"{table}_{name}.npy"), column)
+    return len(levels), len(trajectory)
+
+
+# -------- output -------- #
+def to_columns(rows, columns):
+    table = np.array(rows, dtype=list(columns.items()))
+    return {name: table[name] for name in columns}
+
+
+def load_part_column(part_dir, key):
+    return np.load(os.path.join(part_dir, f"{key}.npy"), mmap_mode="r")
+
+
+def read_columns(part_dirs, table):
+    """One table of the process_file parts in `part_dirs`, concatenated."""
+    return {
+        name: np.concatenate(
+            [np.empty(0, dtype)]
+            + [load_part_column(part_dir, f"{table}_{name}") for part_dir in part_dirs]
+        )
+        for name, dtype in TABLES[table].items()
+    }
+
+
+def write_summary(path, part_dirs):
+    """
+    Merge the process_file parts in `part_dirs` into a compressed columnar
+    summary, one array per column, as np.savez_compressed would write it.
+    The parts are copied through in chunks, never loaded whole.
+    """
+    if not path.endswith(".npz"):
+        path += ".npz"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for table, columns in TABLES.items():
+            for name, dtype in columns.items():
+                key = f"{table}_{name}"
+                num_rows = sum(
+                    len(load_part_column(part_dir, key)) for part_dir in part_dirs
+                )
+                header = {
+                    "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                    "fortran_order": False,
+                    "shape": (num_rows,),
+                }
+                with archive.open(f"{key}.npy", "w", force_zip64=True) as file:
+                    np.lib.format.write_array_header_1_0(file, header)
+                    for part_dir in part_dirs:
+                        column = load_part_column(part_dir, key)
+                        for start in range(0, len(column), MERGE_CHUNK_ROWS):
+                            chunk = column[start : start + MERGE_CHUNK_ROWS]
+                            file.write(np.ascontiguousarray(chunk).tobytes())
+
+
+def load_summary(path):
+    """Load a summary written by write_summary as {table: {column: array}}."""
+    tables = {"levels": {}, "trajectory": {}}
+    with np.load(path) as data:
+        for key in data.files:
+            table, column = key.split("_", 1)
+            tables[table][column] = data[key]
+    return tables
+
+
+def print_participant_summary(columns):
+    """Per-participant totals of the level `columns` from read_columns."""
+    if not len(columns["participant"]):
+        print("No events found")
+        return None
+
+    print(
+        f"{'participant':>11} {'levels':>6} {'deaths':>6} {'duration':>9} "
+        f"{'health_mult':>11} {'damage_mult':>11}"
+    )
+    for participant in np.unique(columns["participant"]):
+        mask = columns["participant"] == participant
+        last = np.flatnonzero(mask)[-1]
+        print(
+            f"{participant:>11} {np.count_nonzero(columns['completed'][mask]):>6} "
+            f"{columns['deaths'][mask].sum():>6} "
+            f"{columns['duration'][mask].sum():>9.1f} "
+            f"{columns['end_health_mult'][last]:>11.3f} "
+            f"{columns['end_damage_mult'][last]:>11.3f}"
+        )
+
+
+def get_participant_files(files):
+    """
+    One log per participant: the text view is dropped when the binary event
+    log of the same participant is among `files`, both hold the same events.
+    """
+    event_logs = {
+        os.path.splitext(path)[0] for path in files if path.endswith(EVENT_LOG_EXT)
+    }
+    return [
+        path
+        for path in files
+        if path.endswith(EVENT_LOG_EXT) or os.path.splitext(path)[0] not in event_logs
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-participant and per-level DDA trajectories from game logs."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["logs"],
+        help="log files or directories (text .log and binary .evt)",
+    )
+    parser.add_argument("--out", default="dda_summary.npz", help="columnar summary")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "*_participant_*.log")))
+            files += sorted(glob.glob(os.path.join(path, f"*{EVENT_LOG_EXT}")))
+        else:
+            files.append(path)
+    files = get_participant_files(files)
+
+    # the workers save each file's columns next to the summary, so the rows
+    # of all files are never held at once
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    with tempfile.TemporaryDirectory(prefix="dda_parts_", dir=out_dir) as parts:
+        part_dirs = [os.path.join(parts, str(i)) for i in range(len(files))]
+        num_levels = num_points = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for file_levels, file_points in executor.map(
+                process_file, files, part_dirs, chunksize=8
+            ):
+                num_levels += file_levels
+                num_points += file_points
+
+        write_summary(args.out, part_dirs)
+        print_participant_summary(read_columns(part_dirs, "levels"))
+    print(
+        f"{len(files)} files, {num_levels} levels, "
+        f"{num_points} trajectory points -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
+import pygame as pg
+
+AUDIO_CACHE_VERSION = 1
+
+
+class AudioAsset:
+    def __init__(self, file_name, volume):
+        """
+        A sound as the game refers to it. It stays silent (`sound` is None)
+        until the loader thread has decoded it, or for good if the file is
+        missing, so playing it never blocks or fails.
+        """
+        self.file_name = file_name
+        self.volume = volume
+        self.category = None  # the first category it was registered under
+        self.sound: pg.mixer.Sound = None
+        self.is_missing = False
+        self.is_requested = False
+
+    @property
+    def is_ready(self):
+        return self.sound is not None
+
+
+class AudioAssetManager:
+    def __init__(self, directory: str, cache_dir: str = None):
+        """
+        Decodes sound files on a background thread.
+
+        Assets are registered by category and only decoded once their category
+        is requested. Files with identical content share one decoded
+        pg.mixer.Sound; per-asset volume is applied on the channel. Decoded PCM
+        is cached in `cache_dir`, keyed by the file hash and the mixer format,
+        so later launches skip decoding.
+        """
+        self.directory = directory
+        self.cache_dir = cache_dir
+        #
+        self.assets = {}  # (file_name, volume) -> AudioAsset
+        self.categories = {}  # category -> [AudioAsset]
+        self.file_keys = {}  # file_name -> content hash
+        self.decoded = {}  # content hash -> pg.mixer.Sound
+        #
+        self.queue = queue.PriorityQueue()
+        self.order = itertools.count()  # FIFO within one priority
+        self.lock = threading.Lock()
+        self.thread = None
+        #
+        self.num_decoded = 0
+        self.num_cache_hits = 0
+        self.num_shared = 0
+        self.num_missing = 0
+        self.load_sec = 0.0
+
+    def get(self, file_name, volume=0.5, category=None):
+        """Register (once) and return the asset for a file played at `volume`."""
+        key = file_name, volume
+        if key not in self.assets:
+            self.assets[key] = AudioAsset(file_name, volume)
+        asset = self.assets[key]
+        if category is not None:
+            if asset.category is None:
+                asset.category = category
+            self.categories.setdefault(category, []).append(asset)
+        return asset
+
+    def request(self, category, priority=1):
+        """Queue every not yet requested asset of a category for decoding."""
+        for asset in self.categories.get(category, ()):
+            if not asset.is_requested:
+                asset.is_requested = True
+                self.queue.put((priority, next(self.order), asset))
+        #
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="AudioLoader", daemon=True
+            )
+            self.thread.start()
+
+    def wait(self):
+        """Block until everything requested so far is loaded (tools and tests)."""
+        self.queue.join()
+
+    def run(self):
+        while True:
+            _, _, asset = self.queue.get()
+            try:
+                start = time.perf_counter()
+                self.load(asset)
+                self.load_sec += time.perf_counter() - start
+            except Exception as e:
+                asset.is_missing = True
+                print(f"AudioLoader: {asset.file_name}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def load(self, asset):
+        path = os.path.join(self.directory, asset.file_name)
+        if asset.file_name not in self.file_keys:
+            if not os.path.exists(path):
+                asset.is_missing = True
+                self.num_missing += 1
+                print(f"AudioLoader: missing {path}, playing silence instead")
+                return None
+            with open(path, "rb") as file:
+                self.file_keys[asset.file_name] = hashlib.sha1(file.read()).hexdigest()
+
+        key = self.file_keys[asset.file_name]
+        with self.lock:
+            sound = self.decoded.get(key)
+        if sound is None:
+            sound = self.decode(path, key)
+            with self.lock:
+                self.decoded[key] = sound
+        else:
+            self.num_shared += 1
+        asset.sound = sound
+
+    def decode(self, path, key):
+        cache_path = self.get_cache_path(key)
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as file:
+                self.num_cache_hits += 1
+                return pg.mixer.Sound(buffer=file.read())
+
+        sound = pg.mixer.Sound(path)
+        self.num_decoded += 1
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write then rename: a concurrent launch never sees half a file
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(sound.get_raw())
+            os.replace(temp_path, cache_path)
+        return sound
+
+    def get_cache_path(self, key):
+        if not self.cache_dir:
+            return None
+        frequency, size, channels = pg.mixer.get_init()
+        return os.path.join(
+            self.cache_dir,
+            f"{key}_{frequency}_{size}_{channels}_v{AUDIO_CACHE_VERSION}.pcm",
+        )
+
+    def get_stats(self):
+        return {
+            "assets": len(self.assets),
+            "ready": sum(asset.is_ready for asset in self.assets.values()),
+            "pending": self.queue.unfinished_tasks,
+            "unique_sounds": len(self.decoded),
+            "decoded": self.num_decoded,
+            "cache_hits": self.num_cache_hits,
+            "shared": self.num_shared,
+            "missing": self.num_missing,
+            "load_sec": self.load_sec,
+        }
@@ -0,0 +1,109 @@
+"""
+Per-call latency and memory of every registered DDA controller.
+
+Run from the code directory:
+    python -m benchmarks.dda_controllers [--calls N] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+from hooks.difficulty_controller import CONTROLLERS, create_controller
+
+# frame budget at 60 fps
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def get_inputs(num_calls, seed=0):
+    rng = np.random.default_rng(seed)
+    return list(
+        zip(
+            rng.uniform(0, 100, num_calls).tolist(),
+            rng.integers(0, 11, num_calls).tolist(),
+            rng.uniform(0, 600, num_calls).tolist(),
+            rng.integers(0, 3, num_calls).tolist(),
+        )
+    )
+
+
+def bench_controller(name, inputs, **kwargs):
+    # the fuzzy controller prints diagnostics on every call
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        controller = create_controller(name, **kwargs)
+        controller.prepare()
+        build_sec = time.perf_counter() - start
+        resident, build_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        controller.adjust(*inputs[0])  # warm-up
+        _, call_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = np.empty(len(inputs))
+        for i, args in enumerate(inputs):
+            start = time.perf_counter_ns()
+            controller.adjust(*args)
+            latencies[i] = time.perf_counter_ns() - start
+
+    latencies /= 1e6  # ms
+    return {
+        "controller": name,
+        "calls": len(inputs),
+        "build_sec": build_sec,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "frame_budget_pct": float(np.percentile(latencies, 99) / FRAME_BUDGET_MS * 100),
+        "resident_kb": resident / 1024,
+        "build_peak_kb": build_peak / 1024,
+        "call_peak_kb": max(0, call_peak - resident) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument(
+        "--controllers", nargs="*", default=list(CONTROLLERS), choices=CONTROLLERS
+    )
+    parser.add_argument(
+        "--table-cache", default=None, help="cache file for the lookup table"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    inputs = get_inputs(args.calls)
+    results = []
+    for name in args.controllers:
+        kwargs = {"cache_path": args.table_cache} if name == "table" else {}
+        # skfuzzy is ~1000x slower than the others: fewer calls are enough
+        calls = inputs[: max(1, args.calls // 10)] if name == "fuzzy" else inputs
+        results.append(bench_controller(name, calls, **kwargs))
+
+    print(
+        f"{'controller':>10} {'calls':>6} {'build s':>8} {'mean ms':>9} {'p50 ms':>9} "
+        f"{'p99 ms':>9} {'budget':>7} {'resident KB':>12} {'peak KB':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['controller']:>10} {r['calls']:>6} {r['build_sec']:>8.3f} "
+            f"{r['mean_ms']:>9.4f} {r['p50_ms']:>9.4f} {r['p99_ms']:>9.4f} "
+            f"{r['frame_budget_pct']:>6.2f}% {r['resident_kb']:>12.1f} "
+            f"{r['build_peak_kb']:>9.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Vertex count and build time of the level mesh builders.
+
+Run from the code directory:
+    python -m benchmarks.level_mesh [--size N] [--repeat N] [--json out.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from types import SimpleNamespace
+import level_generator as generator
+from level_map import LevelData
+from meshes.level_mesh_builder import FMT_SIZE, LevelMeshBuilder
+from meshes.greedy_mesh_builder import GreedyLevelMeshBuilder
+from meshes.level_mesh import pack_vertices
+from settings import LEVEL_CHUNK_SIZE
+
+LEVELS = ("level_0.tmx", "level_1.tmx")
+BUILDERS = {"per-face": LevelMeshBuilder, "greedy": GreedyLevelMeshBuilder}
+
+
+def load_level(tmx_file):
+    """Tile maps of a level, as LevelMap gets them."""
+    return LevelData(tmx_file, is_streamed=False)
+
+
+def generate_level(size, seed=0):
+    """Tile maps of a generated level, see level_generator.py."""
+    level = generator.generate_level(size, seed=seed, num_npcs=0, num_items=0)
+    wall_map, floor_map, ceil_map = level.get_tile_maps()
+    return SimpleNamespace(
+        width=size,
+        depth=size,
+        wall_map=wall_map,
+        floor_map=floor_map,
+        ceil_map=ceil_map,
+    )
+
+
+def bench_builder(builder_cls, level_map, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vertex_data = builder_cls(level_map).build_mesh()
+        times.append(time.perf_counter() - start)
+    # GPU buffers as LevelMesh uploads them: packed and indexed per chunk
+    builder = builder_cls(level_map)
+    packed_bytes = 0
+    for x0 in range(0, level_map.width, LEVEL_CHUNK_SIZE):
+        for z0 in range(0, level_map.depth, LEVEL_CHUNK_SIZE):
+            chunk_data = builder.build_mesh(
+                x0, z0, x0 + LEVEL_CHUNK_SIZE, z0 + LEVEL_CHUNK_SIZE
+            )
+            if len(chunk_data):
+                vertices, indices = pack_vertices(chunk_data, FMT_SIZE, x0, z0)
+                packed_bytes += vertices.nbytes + indices.nbytes
+    return len(vertex_data) // FMT_SIZE, packed_bytes, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=256, help="generated map size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N builds")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    maps = {tmx_file: load_level(tmx_file) for tmx_file in LEVELS}
+    maps[f"generated {args.size}x{args.size}"] = generate_level(args.size, args.seed)
+
+    results = []
+    for map_name, level_map in maps.items():
+        for builder_name, builder_cls in BUILDERS.items():
+            num_vertices, packed_bytes, build_sec = bench_builder(
+                builder_cls, level_map, args.repeat
+            )
+            results.append(
+                {
+                    "map": map_name,
+                    "size": [level_map.width, level_map.depth],
+                    "builder": builder_name,
+                    "vertices": num_vertices,
+                    "triangles": num_vertices // 3,
+                    "vbo_kb": num_vertices * FMT_SIZE * 2 / 1024,
+                    "packed_kb": packed_bytes / 1024,
+                    "build_ms": build_sec * 1000,
+                }
+            )
+
+    print(
+        f"{'map':>18} {'builder':>9} {'vertices':>9} {'vbo KB':>9} "
+        f"{'packed KB':>10} {'build ms':>9} {'vs per-face':>12}"
+    )
+    baseline = {}
+    for r in results:
+        base = baseline.setdefault(r["map"], r)
+        print(
+            f"{r['map']:>18} {r['builder']:>9} {r['vertices']:>9} {r['vbo_kb']:>9.1f} "
+            f"{r['packed_kb']:>10.1f} {r['build_ms']:>9.1f} {r['vertices'] / base['vertices']:>11.1%}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
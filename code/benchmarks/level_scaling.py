@@ -0,0 +1,153 @@
+"""
+Level load, mesh build, pathfinding and update cost against generated map size.
+
+Run from the code directory:
+    python -m benchmarks.level_scaling [--sizes 32 64 ...] [--npcs 100 1000 ...]
+        [--ticks N] [--chase] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import engine
+from level_generator import GENERATED_DIR, LEVELS_DIR, generate_level, write_tmx
+from hooks.startup_timer import StartupTimer
+
+# frame budget at 60 fps
+FRAME_BUDGET_MS = 1000 / 60
+# engine.new_game stages reported by the benchmark
+STAGES = {
+    "level parse": "load_ms",
+    "world streaming": "stream_ms",  # streamed levels only
+    "path graph": "graph_ms",
+    "mesh build": "scene_ms",
+}
+
+
+def bench_paths(eng, level, num_paths, seed):
+    """Mean PathFinder.find time between random open tiles, uncached."""
+    rng = np.random.default_rng(seed)
+    open_tiles = level.get_open_tiles()
+    pairs = open_tiles[rng.integers(len(open_tiles), size=(num_paths, 2))].tolist()
+    find = eng.path_finder.find
+    find.cache_clear()
+    start = time.perf_counter()
+    for start_pos, end_pos in pairs:
+        find(tuple(start_pos), tuple(end_pos))
+    return (time.perf_counter() - start) / num_paths * 1000
+
+
+def bench_level(app, args, size, num_npcs):
+    start = time.perf_counter()
+    level = generate_level(
+        size,
+        seed=args.seed,
+        door_density=args.door_density,
+        num_npcs=num_npcs,
+        num_items=None if num_npcs is None else num_npcs // 2,
+    )
+    generate_ms = (time.perf_counter() - start) * 1000
+    path = os.path.join(GENERATED_DIR, f"bench_{size}_{len(level.npcs)}.tmx")
+    write_tmx(level, path)
+
+    # the stages engine.new_game times, on a fresh timer
+    timer = engine.startup_timer = StartupTimer()
+    eng = app.engine
+    eng.new_game(tmx_file=os.path.relpath(path, LEVELS_DIR))
+    stages = dict(timer.stages)
+
+    path_ms = bench_paths(eng, level, args.paths, args.seed)
+    graph = eng.path_finder.graph
+    # streamed levels look neighbours up instead
+    graph_kb = graph.nbytes / 1024 if hasattr(graph, "nbytes") else 0.0
+
+    # keep the player alive and the level running
+    eng.player.health = float("inf")
+    if args.chase:
+        eng.npc_system.is_spotted[: eng.npc_system.size] = True
+    update_ms = np.empty(args.ticks)
+    for tick in range(args.ticks):
+        app.input.poll()
+        app.time += 1 / 60
+        app.delta_time = 1000 / 60
+        start = time.perf_counter()
+        eng.update()
+        update_ms[tick] = (time.perf_counter() - start) * 1000
+
+    result = {
+        "size": [level.width, level.depth],
+        "open_tiles": int((~level.is_wall).sum()),
+        "doors": len(level.doors),
+        "items": len(level.items),
+        "npcs": len(level.npcs),
+        "tmx_kb": os.path.getsize(path) / 1024,
+        "generate_ms": generate_ms,
+        "graph_kb": graph_kb,
+    }
+    result.update({key: stages.get(stage, 0.0) * 1000 for stage, key in STAGES.items()})
+    result.update(
+        {
+            "path_ms": path_ms,
+            "update_mean_ms": float(update_ms.mean()),
+            "update_p99_ms": float(np.percentile(update_ms, 99)),
+            "frame_budget_pct": float(
+                np.percentile(update_ms, 99) / FRAME_BUDGET_MS * 100
+            ),
+        }
+    )
+    os.remove(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[32, 64, 128, 256])
+    parser.add_argument(
+        "--npcs", type=int, nargs="*", help="NPC counts per size, default: by area"
+    )
+    parser.add_argument("--door-density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--paths", type=int, default=200, help="paths found per map")
+    parser.add_argument("--ticks", type=int, default=120)
+    parser.add_argument("--chase", action="store_true", help="all NPCs spot the player")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    from main import Game
+
+    app = Game(headless=True)
+    app.input.start()
+    results = [
+        bench_level(app, args, size, num_npcs)
+        for size in args.sizes
+        for num_npcs in args.npcs or [None]
+    ]
+
+    print(
+        f"{'size':>9} {'npcs':>6} {'items':>6} {'doors':>6} {'load ms':>9} "
+        f"{'stream ms':>9} {'graph ms':>9} {'graph kB':>9} {'scene ms':>9} "
+        f"{'path ms':>8} {'update ms':>10} "
+        f"{'p99 ms':>8} {'budget':>7}"
+    )
+    for r in results:
+        size = "x".join(map(str, r["size"]))
+        print(
+            f"{size:>9} {r['npcs']:>6} {r['items']:>6} {r['doors']:>6} "
+            f"{r['load_ms']:>9.1f} {r['stream_ms']:>9.1f} {r['graph_ms']:>9.1f} "
+            f"{r['graph_kb']:>9.1f} {r['scene_ms']:>9.1f} "
+            f"{r['path_ms']:>8.3f} {r['update_mean_ms']:>10.3f} "
+            f"{r['update_p99_ms']:>8.3f} {r['frame_budget_pct']:>6.1f}%"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
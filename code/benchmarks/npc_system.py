@@ -0,0 +1,101 @@
+"""
+Per-tick cost of the NPC system with many NPCs chasing the player.
+
+Run from the code directory:
+    python -m benchmarks.npc_system [--counts 100 1000 ...] [--ticks N] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# frame budget at 60 fps
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def spawn_npcs(eng, count, seed=0):
+    """`count` spotted NPCs on random open tiles of the loaded level."""
+    from game_objects.npc import NPC
+    from settings import NPC_SETTINGS
+
+    level_map = eng.level_map
+    open_tiles = [
+        (x, z)
+        for x in range(level_map.width)
+        for z in range(level_map.depth)
+        if (x, z) not in level_map.wall_map and (x, z) not in level_map.door_map
+    ]
+    rng = np.random.default_rng(seed)
+    npc_ids = list(NPC_SETTINGS)
+    for i in rng.integers(len(open_tiles), size=count):
+        x, z = open_tiles[i]
+        npc = NPC(level_map, tex_id=npc_ids[i % len(npc_ids)], x=x, z=z)
+        npc.is_player_spotted = True
+        level_map.npc_list.append(npc)
+
+
+def bench_count(app, count, num_ticks):
+    eng = app.engine
+    eng.new_game()
+    spawn_npcs(eng, count)
+    mesh = eng.scene.instanced_npc_mesh
+    # keep the player alive and the level running
+    eng.player.health = float("inf")
+    eng.player.update_tile_position()
+
+    update_ms, upload_ms = np.empty(num_ticks), np.empty(num_ticks)
+    for tick in range(num_ticks):
+        app.time += 1 / 60
+        app.delta_time = 1000 / 60
+        start = time.perf_counter()
+        eng.npc_system.update()
+        update_ms[tick] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        mesh.update_buffers()
+        upload_ms[tick] = (time.perf_counter() - start) * 1000
+
+    return {
+        "npcs": eng.npc_system.size,
+        "ticks": num_ticks,
+        "update_mean_ms": float(update_ms.mean()),
+        "update_p99_ms": float(np.percentile(update_ms, 99)),
+        "upload_mean_ms": float(upload_ms.mean()),
+        "frame_budget_pct": float(
+            np.percentile(update_ms + upload_ms, 99) / FRAME_BUDGET_MS * 100
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="*", default=[10, 100, 1000, 2000])
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    from main import Game
+
+    app = Game(headless=True)
+    results = [bench_count(app, count, args.ticks) for count in args.counts]
+
+    print(
+        f"{'npcs':>6} {'update ms':>10} {'p99 ms':>8} {'upload ms':>10} {'budget':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['npcs']:>6} {r['update_mean_ms']:>10.3f} {r['update_p99_ms']:>8.3f} "
+            f"{r['upload_mean_ms']:>10.3f} {r['frame_budget_pct']:>6.1f}%"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+Headless benchmark suite of the render and simulation hot paths.
+
+Every case runs on fixed seeds and maps. Results are appended to a history
+file, and the run is compared with the previous runs on the same machine.
+Cases that need GL use a standalone context, e.g. Mesa's software rasterizer
+(LIBGL_ALWAYS_SOFTWARE=1); without one only the other cases run.
+
+Run from the code directory:
+    python -m benchmarks.suite [--cases 'path*' ...] [--repeat N] [--no-gl]
+        [--history FILE] [--threshold 0.1] [--check]
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+import glm
+import numpy as np
+import level_generator as generator
+from benchmarks.level_mesh import load_level
+from meshes.level_mesh_builder import LevelMeshBuilder
+from meshes.greedy_mesh_builder import GreedyLevelMeshBuilder
+
+HISTORY_FILE = os.path.join("benchmarks", "history.jsonl")
+SEED = 0
+MAP_SIZE = 128  # generated map used by most cases
+MAP_FILE = os.path.join(generator.GENERATED_DIR, f"bench_suite_{MAP_SIZE}.tmx")
+
+# name -> (needs GL, setup); setup(suite) returns the function to time
+CASES = {}
+
+
+def case(name, needs_gl=False):
+    def register(setup):
+        CASES[name] = (needs_gl, setup)
+        return setup
+
+    return register
+
+
+class Suite:
+    def __init__(self, use_gl=True):
+        """Maps and the headless game shared by the cases."""
+        self.level = generator.generate_level(MAP_SIZE, seed=SEED)
+        wall_map, floor_map, ceil_map = self.level.get_tile_maps()
+        self.level_map = SimpleNamespace(
+            width=self.level.width,
+            depth=self.level.depth,
+            wall_map=wall_map,
+            floor_map=floor_map,
+            ceil_map=ceil_map,
+            door_map={},
+            npc_map={},
+        )
+        self.app = self.get_app() if use_gl else None
+        if self.app is not None:
+            generator.write_tmx(self.level, MAP_FILE)
+
+    @staticmethod
+    def get_app():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        try:
+            from main import Game
+
+            app = Game(headless=True)
+        except Exception as e:
+            print(f"No GL context, skipping the GL cases: {e}")
+            return None
+        app.input.start()
+        return app
+
+    def new_game(self, tmx_file=None):
+        """Fresh engine state on a fixed seed, the generated map by default."""
+        from hook_objects import game_rng
+
+        game_rng.seed(SEED)
+        eng = self.app.engine
+        eng.new_game(tmx_file or os.path.relpath(MAP_FILE, generator.LEVELS_DIR))
+        # keep the player alive and the level running
+        eng.player.health = float("inf")
+        return eng
+
+    @staticmethod
+    def get_rng():
+        """Each case draws its inputs from its own stream, whatever else runs."""
+        return np.random.default_rng(SEED)
+
+    def get_open_tiles(self, num_tiles):
+        open_tiles = self.level.get_open_tiles()
+        rng = self.get_rng()
+        return open_tiles[rng.integers(len(open_tiles), size=num_tiles)].tolist()
+
+    def close(self):
+        if self.app is not None and os.path.exists(MAP_FILE):
+            os.remove(MAP_FILE)
+
+
+# -------- cases -------- #
+def get_build_mesh(builder_cls, level_map):
+    return lambda: builder_cls(level_map).build_mesh()
+
+
+@case("build_mesh/per-face/level_1")
+def build_per_face_level_1(suite):
+    return get_build_mesh(LevelMeshBuilder, load_level("level_1.tmx"))
+
+
+@case("build_mesh/greedy/level_1")
+def build_greedy_level_1(suite):
+    return get_build_mesh(GreedyLevelMeshBuilder, load_level("level_1.tmx"))
+
+
+@case(f"build_mesh/greedy/gen_{MAP_SIZE}")
+def build_greedy_generated(suite):
+    return get_build_mesh(GreedyLevelMeshBuilder, suite.level_map)
+
+
+@case(f"path_finder.find/gen_{MAP_SIZE} x100")
+def find_paths(suite):
+    from path_finding import PathFinder
+
+    path_finder = PathFinder(SimpleNamespace(level_map=suite.level_map))
+    pairs = [
+        (tuple(a), tuple(b)) for a, b in zip(*[iter(suite.get_open_tiles(200))] * 2)
+    ]
+
+    def run():
+        path_finder.find.cache_clear()
+        for start_pos, end_pos in pairs:
+            path_finder.find(start_pos, end_pos)
+
+    return run
+
+
+@case(f"nav_graph.build/gen_{MAP_SIZE}")
+def build_nav_graph(suite):
+    from path_finding import get_graph
+
+    return lambda: get_graph(suite.level_map)
+
+
+@case(f"nav_graph.get_distances/gen_{MAP_SIZE} x16")
+def get_distances(suite):
+    from path_finding import get_graph
+
+    graph = get_graph(suite.level_map)
+    sources = [tuple(pos) for pos in suite.get_open_tiles(16)]
+    return lambda: graph.get_distances(sources)
+
+
+@case(f"nav_graph.get_flow_field/gen_{MAP_SIZE}")
+def get_flow_field(suite):
+    from path_finding import get_graph
+
+    graph = get_graph(suite.level_map)
+    goal, *blocked = [tuple(pos) for pos in suite.get_open_tiles(65)]
+    return lambda: graph.get_flow_field(goal, np.array(blocked))
+
+
+@case(f"ray_casting.run/gen_{MAP_SIZE} x1000")
+def cast_rays(suite):
+    from ray_casting import RayCasting
+
+    player = SimpleNamespace(tile_pos=(-1, -1))
+    ray_casting = RayCasting(SimpleNamespace(level_map=suite.level_map, player=player))
+    angles = suite.get_rng().uniform(0, 2 * np.pi, 1000)
+    rays = [
+        (glm.vec3(x + 0.5, 0.5, z + 0.5), glm.vec3(np.cos(a), 0, np.sin(a)))
+        for (x, z), a in zip(suite.get_open_tiles(1000), angles)
+    ]
+
+    def run():
+        for start_pos, direction in rays:
+            ray_casting.run(start_pos, direction)
+
+    return run
+
+
+@case("check_DDA_adjust_difficulty x10")
+def adjust_difficulty(suite):
+    from hooks.fuzzy_controller import check_DDA_adjust_difficulty
+
+    rng = suite.get_rng()
+    inputs = list(
+        zip(
+            rng.uniform(0, 100, 10).tolist(),
+            rng.integers(0, 11, 10).tolist(),
+            rng.uniform(0, 600, 10).tolist(),
+        )
+    )
+
+    def run():
+        # the fuzzy controller prints diagnostics on every call
+        with contextlib.redirect_stdout(io.StringIO()):
+            for args in inputs:
+                check_DDA_adjust_difficulty(*args)
+
+    return run
+
+
+def get_parse(suite, tmx_file):
+    from level_map import LevelMap
+
+    eng = suite.new_game()
+
+    def run():
+        eng.npc_stats.reset()
+        eng.npc_system.reset(seed=SEED)
+        LevelMap(eng, tmx_file)
+
+    return run
+
+
+@case("level_map.parse/level_1", needs_gl=True)
+def parse_level_1(suite):
+    return get_parse(suite, "level_1.tmx")
+
+
+@case(f"level_map.parse/gen_{MAP_SIZE}", needs_gl=True)
+def parse_generated(suite):
+    return get_parse(suite, os.path.relpath(MAP_FILE, generator.LEVELS_DIR))
+
+
+def get_instanced_render(suite, is_dirty):
+    eng = suite.new_game()
+    mesh = eng.scene.instanced_item_mesh
+
+    def run():
+        if is_dirty:
+            for item in mesh.objects:
+                item.is_dirty = True
+        mesh.render()
+        eng.ctx.finish()
+
+    return run
+
+
+@case(f"instanced_quad_mesh.render/gen_{MAP_SIZE}", needs_gl=True)
+def render_items(suite):
+    return get_instanced_render(suite, is_dirty=False)
+
+
+@case(f"instanced_quad_mesh.render/gen_{MAP_SIZE}/all dirty", needs_gl=True)
+def render_dirty_items(suite):
+    return get_instanced_render(suite, is_dirty=True)
+
+
+@case(f"engine.update/gen_{MAP_SIZE}", needs_gl=True)
+def update_engine(suite):
+    app = suite.app
+    eng = suite.new_game()
+
+    def run():
+        app.input.poll()
+        app.time += 1 / 60
+        app.delta_time = 1000 / 60
+        eng.update()
+
+    return run
+
+
+# -------- runs -------- #
+def time_case(run, repeat, warmup):
+    for _ in range(warmup):
+        run()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        run()
+        times[i] = time.perf_counter() - start
+    times *= 1000  # ms
+    return {
+        "samples": repeat,
+        "median_ms": float(np.median(times)),
+        "mean_ms": float(times.mean()),
+        "p99_ms": float(np.percentile(times, 99)),
+        "min_ms": float(times.min()),
+    }
+
+
+def get_machine(app):
+    machine = {
+        "platform": platform.platform(),
+        "cpu": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "gl": None,
+    }
+    if app is not None:
+        machine["gl"] = app.ctx.info["GL_RENDERER"]
+    return machine
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def get_baseline(history, machine, num_runs):
+    """Median of each case over the last `num_runs` runs on the same machine."""
+    runs = [run for run in history if run["machine"] == machine][-num_runs:]
+    medians = {}
+    for run in runs:
+        for name, result in run["results"].items():
+            medians.setdefault(name, []).append(result["median_ms"])
+    return {name: float(np.median(values)) for name, values in medians.items()}, len(
+        runs
+    )
+
+
+def report(results, baseline, threshold):
+    """Print the comparison table; returns the names of the regressed cases."""
+    regressions = []
+    width = max(len(name) for name in results)
+    print(
+        f"{'case':<{width}} {'median ms':>10} {'p99 ms':>9} {'baseline':>9} {'change':>8}"
+    )
+    for name, r in results.items():
+        line = f"{name:<{width}} {r['median_ms']:>10.3f} {r['p99_ms']:>9.3f}"
+        if name not in baseline:
+            print(f"{line} {'-':>9} {'new':>8}")
+            continue
+        change = r["median_ms"] / baseline[name] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{line} {baseline[name]:>9.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="*", default=["*"], help="name patterns")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--no-gl", action="store_true", help="skip the GL cases")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-save", action="store_true", help="do not add to history")
+    parser.add_argument(
+        "--baseline-runs", type=int, default=3, help="previous runs to compare with"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown flagged, 0.1 is 10%%"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit with 1 on any regression"
+    )
+    args = parser.parse_args()
+
+    names = [
+        name
+        for name in CASES
+        if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)
+    ]
+    suite = Suite(use_gl=not args.no_gl)
+    results = {}
+    for name in names:
+        needs_gl, setup = CASES[name]
+        if needs_gl and suite.app is None:
+            continue
+        results[name] = time_case(setup(suite), args.repeat, args.warmup)
+    suite.close()
+
+    run = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "machine": get_machine(suite.app),
+        "results": results,
+    }
+    history = load_history(args.history)
+    baseline, num_runs = get_baseline(history, run["machine"], args.baseline_runs)
+    print(f"Baseline: median of {num_runs} previous run(s) on this machine")
+    regressions = report(results, baseline, args.threshold)
+
+    if not args.no_save:
+        with open(args.history, "a") as file:
+            file.write(json.dumps(run) + "\n")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower by more than {args.threshold:.0%}")
+        if args.check:
+            return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from skfuzzy import control as ctrl
+from hooks.fuzzy_vectorized import (
+    DDA_INPUT_RANGES,
+    VectorizedFuzzySystem,
+    adjust_difficulty,
+)
+
+DEFAULT_CONTROLLER = os.path.join("hooks", "fuzzy_controller.py")
+
+# expected sign of d(multiplier)/d(input): a healthier player gets a harder
+# game, more deaths or a slower level an easier one
+MONOTONIC_DIRECTION = {"health": 1, "deaths": -1, "completion_time": -1}
+
+OUTPUT_NAMES = ("damage", "health_mult")
+
+# per-process cache of loaded controllers, see get_controller()
+_controllers = {}
+
+
+# -------- controllers -------- #
+def load_controller_module(path):
+    name = "dda_controller_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_controller(path):
+    """(module, VectorizedFuzzySystem, rule names) of a controller file, cached."""
+    if path not in _controllers:
+        module = load_controller_module(path)
+        system = VectorizedFuzzySystem(module.difficulty_ctrl)
+        # rules are named after the module variables they are bound to
+        names = {id(v): k for k, v in vars(module).items() if isinstance(v, ctrl.Rule)}
+        rule_names = [names.get(id(rule), str(rule)) for rule in system.rules]
+        _controllers[path] = module, system, rule_names
+    return _controllers[path]
+
+
+# -------- sweep -------- #
+def get_axes(health_step, deaths_step, time_step):
+    steps = {"health": health_step, "deaths": deaths_step, "completion_time": time_step}
+    axes = {}
+    for label, (low, high) in DDA_INPUT_RANGES.items():
+        axes[label] = np.arange(low, high + steps[label] / 2, steps[label])
+    return axes
+
+
+def sweep_slice(job):
+    """Evaluate one block of health values over the whole deaths x time plane."""
+    path, health, deaths, times = job
+    _, system, _ = get_controller(path)
+    grid = np.meshgrid(health, deaths, times, indexing="ij")
+    damage, health_mult, no_rule = adjust_difficulty(system, *(g.ravel() for g in grid))
+
+    activations = system.get_rule_activations(
+        {
+            label: g.ravel().astype(np.float64)
+            for label, g in zip(DDA_INPUT_RANGES, grid)
+        }
+    )
+    shape = grid[0].shape
+    return (
+        damage.reshape(shape),
+        health_mult.reshape(shape),
+        no_rule.reshape(shape),
+        activations.max(axis=0),
+    )
+
+
+def sweep(path, axes, workers=None):
+    """
+    Evaluate a controller on the full input grid.
+
+    Returns:
+      - dict: 'damage', 'health_mult' and 'no_rule' arrays of shape
+        (health, deaths, time), plus 'rule_max', the largest firing strength
+        of every rule anywhere on the grid.
+    """
+    health, deaths, times = axes["health"], axes["deaths"], axes["completion_time"]
+    num_jobs = min(len(health), 4 * (workers or os.cpu_count() or 1))
+    jobs = [(path, block, deaths, times) for block in np.array_split(health, num_jobs)]
+
+    if workers == 1:
+        results = [sweep_slice(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(sweep_slice, jobs))
+
+    damage, health_mult, no_rule, rule_max = zip(*results)
+    return {
+        "damage": np.concatenate(damage),
+        "health_mult": np.concatenate(health_mult),
+        "no_rule": np.concatenate(no_rule),
+        "rule_max": np.max(rule_max, axis=0),
+    }
+
+
+# -------- analysis -------- #
+def get_point(axes, index):
+    return tuple(float(axis[i]) for axis, i in zip(axes.values(), index))
+
+
+def find_discontinuities(surface, axes, threshold):
+    """Neighbour jumps larger than `threshold` per grid step along each axis."""
+    report = {}
+    for axis, label in enumerate(axes):
+        jumps = np.abs(np.diff(surface, axis=axis))
+        if not jumps.size:
+            continue
+        worst = np.unravel_index(np.argmax(jumps), jumps.shape)
+        report[label] = {
+            "count": int(np.count_nonzero(jumps > threshold)),
+            "max_jump": float(jumps[worst]),
+            "at": get_point(axes, worst),
+        }
+    return report
+
+
+def find_monotonicity_violations(surface, axes, tolerance=1e-6):
+    """Steps along each axis that move against MONOTONIC_DIRECTION."""
+    report = {}
+    for axis, label in enumerate(axes):
+        steps = np.diff(surface, axis=axis) * MONOTONIC_DIRECTION[label]
+        if not steps.size:
+            continue
+        worst = np.unravel_index(np.argmin(steps), steps.shape)
+        report[label] = {
+            "count": int(np.count_nonzero(steps < -tolerance)),
+            "worst_step": float(-steps[worst]) if steps[worst] < 0 else 0.0,
+            "at": get_point(axes, worst),
+        }
+    return report
+
+
+def get_coverage(result, axes, rule_names):
+    no_rule = result["no_rule"]
+    gaps = [get_point(axes, index) for index in np.argwhere(no_rule)[:10]]
+    return {
+        "no_rule_points": int(np.count_nonzero(no_rule)),
+        "no_rule_fraction": float(no_rule.mean()),
+        "no_rule_examples": gaps,
+        "dead_rules": [
+            name for name, peak in zip(rule_names, result["rule_max"]) if peak <= 0
+        ],
+        "weak_rules": {
+            name: float(peak)
+            for name, peak in zip(rule_names, result["rule_max"])
+            if 0 < peak < 0.5
+        },
+    }
+
+
+def time_inference(path, num_calls, seed=0):
+    """
+    Per-call latency of the skfuzzy controller against the vectorized one,
+    and the largest difference between the two on the same random inputs.
+    """
+    module, system, _ = get_controller(path)
+    rng = np.random.default_rng(seed)
+    inputs = [
+        rng.uniform(low, high, num_calls) for low, high in DDA_INPUT_RANGES.values()
+    ]
+    inputs[1] = np.round(inputs[1])  # deaths are counted
+
+    reference = []
+    start = time.perf_counter()
+    # check_DDA_adjust_difficulty prints diagnostics on every call
+    with contextlib.redirect_stdout(io.StringIO()):
+        for point in zip(*inputs):
+            reference.append(module.check_DDA_adjust_difficulty(*point))
+    skfuzzy_sec = (time.perf_counter() - start) / num_calls
+    reference = np.array(reference)
+
+    start = time.perf_counter()
+    damage, health_mult, _ = adjust_difficulty(system, *inputs)
+    batch_sec = (time.perf_counter() - start) / num_calls
+
+    start = time.perf_counter()
+    for point in zip(*inputs):
+        adjust_difficulty(system, *point)
+    single_sec = (time.perf_counter() - start) / num_calls
+
+    return {
+        "calls": num_calls,
+        "skfuzzy_ms": skfuzzy_sec * 1000,
+        "vectorized_single_ms": single_sec * 1000,
+        "vectorized_batch_us": batch_sec * 1e6,
+        "max_error": float(
+            max(
+                np.abs(reference[:, 0] - damage).max(),
+                np.abs(reference[:, 1] - health_mult).max(),
+            )
+        ),
+    }
+
+
+def diff_surfaces(base, other, axes, tolerance):
+    report = {}
+    for name in OUTPUT_NAMES:
+        delta = other[name] - base[name]
+        worst = np.unravel_index(np.argmax(np.abs(delta)), delta.shape)
+        report[name] = {
+            "changed_fraction": float(np.mean(np.abs(delta) > tolerance)),
+            "mean_delta": float(delta.mean()),
+            "max_abs_delta": float(abs(delta[worst])),
+            "at": get_point(axes, worst),
+            "base": float(base[name][worst]),
+            "other": float(other[name][worst]),
+        }
+    return report
+
+
+# -------- output -------- #
+def print_report(path, result, axes, args, rule_names):
+    print(f"\n=== {path} ===")
+    print(
+        f"Grid: {' x '.join(str(len(a)) for a in axes.values())} = "
+        f"{result['damage'].size} points in {result['sweep_sec']:.2f} s"
+    )
+    for name in OUTPUT_NAMES:
+        surface = result[name]
+        print(
+            f"\n{name}: min {surface.min():.3f}  mean {surface.mean():.3f}  "
+            f"max {surface.max():.3f}"
+        )
+        for label, info in find_discontinuities(surface, axes, args.jump).items():
+            print(
+                f"  jumps > {args.jump} along {label}: {info['count']:>6}  "
+                f"(max {info['max_jump']:.3f} at {info['at']})"
+            )
+        for label, info in find_monotonicity_violations(surface, axes).items():
+            print(
+                f"  non-monotonic steps along {label}: {info['count']:>6}  "
+                f"(worst {info['worst_step']:.3f} at {info['at']})"
+            )
+
+    coverage = get_coverage(result, axes, rule_names)
+    print(
+        f"\nNo rule fires (silent 1.0 fallback): {coverage['no_rule_points']} points "
+        f"({coverage['no_rule_fraction']:.2%})"
+    )
+    for point in coverage["no_rule_examples"]:
+        print(f"  health={point[0]:g} deaths={point[1]:g} time={point[2]:g}")
+    print(f"Rules that never fire: {coverage['dead_rules'] or 'none'}")
+    for name, peak in coverage["weak_rules"].items():
+        print(f"  {name} peaks at {peak:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep the DDA fuzzy controller over its whole input space."
+    )
+    parser.add_argument("--controller", default=DEFAULT_CONTROLLER)
+    parser.add_argument(
+        "--compare", help="second controller file to diff against --controller"
+    )
+    parser.add_argument("--health-step", type=float, default=1.0)
+    parser.add_argument("--deaths-step", type=float, default=1.0)
+    parser.add_argument("--time-step", type=float, default=1.0)
+    parser.add_argument(
+        "--jump", type=float, default=0.1, help="discontinuity threshold per step"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=1e-3, help="--compare change threshold"
+    )
+    parser.add_argument(
+        "--calls", type=int, default=100, help="skfuzzy calls to time, 0 to skip"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--out", help="save the surfaces to this .npz file")
+    args = parser.parse_args()
+
+    axes = get_axes(args.health_step, args.deaths_step, args.time_step)
+    paths = [args.controller] + ([args.compare] if args.compare else [])
+
+    results = {}
+    for path in paths:
+        start = time.perf_counter()
+        results[path] = sweep(path, axes, args.workers)
+        results[path]["sweep_sec"] = time.perf_counter() - start
+        print_report(path, results[path], axes, args, get_controller(path)[2])
+
+        if args.calls:
+            timing = time_inference(path, args.calls)
+            print(
+                f"\nInference: skfuzzy {timing['skfuzzy_ms']:.3f} ms/call, "
+                f"vectorized {timing['vectorized_single_ms']:.3f} ms/call, "
+                f"{timing['vectorized_batch_us']:.3f} us/point batched "
+                f"(max difference {timing['max_error']:.4f} over {timing['calls']} calls)"
+            )
+
+    if args.compare:
+        print(f"\n=== {args.compare} vs {args.controller} ===")
+        report = diff_surfaces(
+            results[args.controller], results[args.compare], axes, args.tolerance
+        )
+        for name, info in report.items():
+            print(
+                f"{name}: {info['changed_fraction']:.2%} of points changed, "
+                f"mean delta {info['mean_delta']:+.3f}, max {info['max_abs_delta']:.3f} "
+                f"at {info['at']} ({info['base']:.3f} -> {info['other']:.3f})"
+            )
+
+    if args.out:
+        arrays = {f"axis_{label}": axis for label, axis in axes.items()}
+        for i, path in enumerate(paths):
+            for name in (*OUTPUT_NAMES, "no_rule", "rule_max"):
+                arrays[f"{name}_{i}"] = results[path][name]
+        np.savez_compressed(args.out, controllers=np.array(paths), **arrays)
+        print(f"\nSurfaces -> {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
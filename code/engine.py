@@ -4,9 +4,23 @@ from shader_program import ShaderProgram
 from path_finding import PathFinder
 from ray_casting import RayCasting
 from level_map import LevelMap
+from level_preloader import LevelPreloader
+from world_streamer import WorldStreamer
+from npc_planner import NPCPlanner
 from textures import Textures
 from sound import Sound
-import pygame as pg
+from game_objects.npc_stats import NPCStatTable
+from game_objects.npc_system import NPCSystem
+from settings import (
+    DDA_ON,
+    LEVEL_PRELOAD,
+    NUM_LEVELS,
+    NPC_PLANNER_PROCESS,
+    NPC_PLANNER_RING_SIZE,
+    NPC_PLANNER_MAX_LAG,
+)
+from hook_objects import telemetry, continuous_dda, game_rng
+from hooks.startup_timer import startup_timer
 
 
 class Engine:
@@ -15,29 +29,84 @@ class Engine:
         self.ctx = app.ctx
         self.num_level = 0
 
-        self.textures = Textures(self)
-        self.sound = Sound()
+        with startup_timer.stage("textures"):
+            self.textures = Textures(self)
+        with startup_timer.stage("sound"):
+            self.sound = Sound()
 
         self.player_attribs = PlayerAttribs()
         self.player: Player = None
         self.shader_program: ShaderProgram = None
         self.scene: Scene = None
 
+        self.npc_stats = NPCStatTable()
+        self.npc_system = NPCSystem(self, self.npc_stats)
         self.level_map: LevelMap = None
         self.ray_casting: RayCasting = None
         self.path_finder: PathFinder = None
+        self.preloader = LevelPreloader()
+        self.world_streamer: WorldStreamer = None  # on streamed levels only
+        self.npc_planner: NPCPlanner = None
+        if NPC_PLANNER_PROCESS:
+            self.npc_planner = NPCPlanner(NPC_PLANNER_RING_SIZE, NPC_PLANNER_MAX_LAG)
         self.new_game()
 
-    def new_game(self):
-        pg.mixer.music.play(-1)
+    def new_game(self, tmx_file=None):
+        self.sound.play_music()
+        telemetry.on_level_start()
         self.player = Player(self)
-        self.shader_program = ShaderProgram(self)
-        self.level_map = LevelMap(
-            self, tmx_file=f"level_{self.player_attribs.num_level}.tmx"
-        )
+        self.sound.mixer.listener = self.player
+        with startup_timer.stage("shaders"):
+            self.shader_program = ShaderProgram(self)
+        if DDA_ON:
+            self.npc_stats.reset(
+                self.player_attribs.health_mult, self.player_attribs.damage_mult
+            )
+        else:
+            self.npc_stats.reset()
+        # NPC hit rolls: own numpy stream, seeded from the replayable game RNG
+        self.npc_system.reset(seed=game_rng.getrandbits(64))
+        is_next_level = tmx_file is None
+        if is_next_level:
+            tmx_file = f"level_{self.player_attribs.num_level}.tmx"
+        # parsed maps, path graph and mesh arrays made on the preloader thread
+        prepared = self.preloader.take(tmx_file) if LEVEL_PRELOAD else None
+        with startup_timer.stage("level parse"):
+            self.level_map = LevelMap(
+                self, tmx_file=tmx_file, level_data=prepared and prepared.level_data
+            )
+        self.sound.load_level(self.level_map)
+        if self.npc_planner is not None:
+            self.npc_planner.set_level(
+                self.level_map.level_data, len(self.level_map.npc_list)
+            )
         self.ray_casting = RayCasting(self)
-        self.path_finder = PathFinder(self)
-        self.scene = Scene(self)
+        graph = prepared and prepared.graph
+        mesh_data = prepared and prepared.mesh_data
+        if self.world_streamer is not None:
+            self.world_streamer.close()
+            self.world_streamer = None
+        if self.level_map.level_data.is_streamed:
+            # tiles, path graph and mesh of the chunks around the player only
+            with startup_timer.stage("world streaming"):
+                self.world_streamer = WorldStreamer(self)
+            graph = self.world_streamer.get_graph()
+            mesh_data = self.world_streamer.get_mesh_data()
+        with startup_timer.stage("path graph"):
+            self.path_finder = PathFinder(self, graph=graph)
+        with startup_timer.stage("mesh build"):
+            self.scene = Scene(self, mesh_data=mesh_data)
+        #
+        if LEVEL_PRELOAD and is_next_level:
+            num_level = (self.player_attribs.num_level + 1) % NUM_LEVELS
+            self.preloader.request(f"level_{num_level}.tmx")
+
+    def close(self):
+        """Stop the world streamer's loader and the planner worker."""
+        if self.world_streamer is not None:
+            self.world_streamer.close()
+        if self.npc_planner is not None:
+            self.npc_planner.close()
 
     def update_npc_map(self):
         new_npc_map = {}
@@ -53,8 +122,12 @@ class Engine:
         self.player.handle_events(event=event)
 
     def update(self):
+        if self.world_streamer is not None:
+            self.world_streamer.update()
         self.update_npc_map()
         self.player.update()
+        if continuous_dda is not None:
+            continuous_dda.update(self)
         self.shader_program.update()
         self.scene.update()
 
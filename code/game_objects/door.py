@@ -12,26 +12,33 @@ class Door(GameObject):
         #
         self.is_closed = True
         self.is_moving = False
+        # slide animated in instanced_door.vert: start time, direction
+        self.door_anim = (0.0, 0.0)
+
+    def start_moving(self):
+        if self.is_moving:
+            return None
+        self.is_moving = True
+        direction = 1.0 if self.is_closed else -1.0
+        self.door_anim = (self.app.time, direction)
+        self.is_dirty = True
 
     def update(self):
         if not self.is_moving:
             return None
 
-        if self.is_closed and self.pos.y < WALL_SIZE - ANIM_DOOR_SPEED:
-            if self.app.anim_trigger:
-                self.pos.y += ANIM_DOOR_SPEED
-                self.m_model = self.get_model_matrix()
-
-        elif not self.is_closed and self.pos.y > 0:
-            if self.app.anim_trigger:
-                self.pos.y -= ANIM_DOOR_SPEED
-                self.m_model = self.get_model_matrix()
-        else:
+        if self.app.time - self.door_anim[0] >= DOOR_MOVE_TIME:
             self.is_moving = False
             self.is_closed = not self.is_closed
+            self.pos.y = 0 if self.is_closed else DOOR_OPEN_HEIGHT
+            self.m_model = self.get_model_matrix()
+            self.door_anim = (0.0, 0.0)
+            self.is_dirty = True
 
     def get_rot(self, x, z):
-        wall_map = self.level_map.wall_map
-        if (x, z - 1) in wall_map and (x, z + 1) in wall_map:
+        # from the level's tile arrays: a streamed level may not have loaded
+        # the walls around the door yet
+        is_wall = self.level_map.level_data.is_wall
+        if is_wall(x, z - 1) and is_wall(x, z + 1):
             return glm.half_pi()
         return 0
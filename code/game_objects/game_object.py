@@ -1,6 +1,9 @@
 import glm
 from settings import H_WALL_SIZE
 
+# per-instance animation of a still object: num frames, frame time, start, loop
+NO_ANIM = (0.0, 0.0, 0.0, 0.0)
+
 
 class GameObject:
     def __init__(self, level_map, tex_id, x, z):
@@ -13,6 +16,9 @@ class GameObject:
         self.scale = glm.vec3(1)
         #
         self.m_model: glm.mat4 = None
+        self.anim = NO_ANIM
+        # instance data changed since the last upload (see InstancedQuadMesh)
+        self.is_dirty = True
 
     def get_model_matrix(self):
         m_model = glm.translate(glm.mat4(), self.pos)
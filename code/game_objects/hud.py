@@ -1,10 +1,12 @@
 from game_objects.game_object import GameObject
 from settings import *
+import numpy as np
 
 
 class HUDObject:
     def __init__(self, hud, tex_id):
-        self.tex_id = tex_id
+        self._tex_id = tex_id
+        self.is_dirty = True
         self.pos = glm.vec3(HUD_SETTINGS[tex_id]["pos"], 0)
         self.rot = 0
         #
@@ -15,6 +17,69 @@ class HUDObject:
         #
         self.m_model = GameObject.get_model_matrix(self)
 
+    @property
+    def tex_id(self):
+        return self._tex_id
+
+    @tex_id.setter
+    def tex_id(self, value):
+        if value != self._tex_id:
+            self._tex_id = value
+            self.is_dirty = True
+
+
+class NumberWidget:
+    def __init__(self, hud, digit_ids, get_value, interval=0.0):
+        """
+        Digits bound to a value: `get_value` is polled on update, at most once
+        per `interval` sec, and the digit textures only change with the value,
+        so an unchanged number leaves the HUD instance buffers alone.
+        """
+        self.digits = [HUDObject(hud, digit_id) for digit_id in digit_ids]
+        self.get_value = get_value
+        self.interval = interval
+        self.max_value = 10 ** len(self.digits) - 1
+        #
+        self.value = None
+        self.next_time = 0.0
+
+    def update(self, time):
+        if time < self.next_time:
+            return None
+        self.next_time = time + self.interval
+        #
+        value = int(min(max(self.get_value(), 0), self.max_value))
+        if value == self.value:
+            return None
+        self.value = value
+        for digit in reversed(self.digits):
+            digit.tex_id = value % 10 + ID.DIGIT_0
+            value //= 10
+
+
+class FrameTimeGraph:
+    def __init__(self, num_samples=HUD_GRAPH_SAMPLES):
+        """
+        Ring buffer of the last frame times in ms, drawn as a bar graph by
+        FrameGraphMesh. Only the samples pushed since the last upload are
+        written to the graph texture, one texel each.
+        """
+        self.samples = np.zeros(num_samples, dtype="float32")
+        self.num_samples = num_samples
+        self.head = 0  # slot of the next sample, the oldest one shown
+        self.num_pending = 0  # samples not yet in the texture
+
+    def push(self, frame_ms):
+        self.samples[self.head] = frame_ms
+        self.head = (self.head + 1) % self.num_samples
+        self.num_pending = min(self.num_pending + 1, self.num_samples)
+
+    def get_pending(self):
+        """Slots written since the last call, oldest first."""
+        first = self.head - self.num_pending
+        self.num_pending = 0
+        return [(first + i) % self.num_samples for i in range(self.head - first)]
+
 
 class HUD:
     def __init__(self, eng):
@@ -27,45 +92,30 @@ class HUD:
         self.ammo = HUDObject(self, ID.AMMO)
         self.fps = HUDObject(self, ID.FPS)
         #
-        self.ammo_digit_0 = HUDObject(self, ID.AMMO_DIGIT_0)
-        self.ammo_digit_1 = HUDObject(self, ID.AMMO_DIGIT_1)
-        self.ammo_digit_2 = HUDObject(self, ID.AMMO_DIGIT_2)
-        #
-        self.health_digit_0 = HUDObject(self, ID.HEALTH_DIGIT_0)
-        self.health_digit_1 = HUDObject(self, ID.HEALTH_DIGIT_1)
-        self.health_digit_2 = HUDObject(self, ID.HEALTH_DIGIT_2)
-        #
-        self.fps_digit_0 = HUDObject(self, ID.FPS_DIGIT_0)
-        self.fps_digit_1 = HUDObject(self, ID.FPS_DIGIT_1)
-        self.fps_digit_2 = HUDObject(self, ID.FPS_DIGIT_2)
+        self.widgets = [
+            NumberWidget(
+                self,
+                (ID.AMMO_DIGIT_0, ID.AMMO_DIGIT_1, ID.AMMO_DIGIT_2),
+                lambda: self.eng.player.ammo,
+            ),
+            NumberWidget(
+                self,
+                (ID.HEALTH_DIGIT_0, ID.HEALTH_DIGIT_1, ID.HEALTH_DIGIT_2),
+                lambda: self.eng.player.health,
+            ),
+            NumberWidget(
+                self,
+                (ID.FPS_DIGIT_0, ID.FPS_DIGIT_1, ID.FPS_DIGIT_2, ID.FPS_DIGIT_3),
+                lambda: self.app.fps_value,
+                interval=HUD_FPS_INTERVAL,
+            ),
+        ]
         #
-        self.digits = [0, 0, 0]
-
-    def update_digits(self, value):
-        value = min(value, 999)
-        self.digits[2] = value % 10
-        #
-        value //= 10
-        self.digits[1] = value % 10
-        #
-        value //= 10
-        self.digits[0] = value % 10
+        self.frame_graph = FrameTimeGraph() if HUD_GRAPH else None
 
     def update(self):
-        # ammo
-        self.update_digits(self.eng.player.ammo)
-        self.ammo_digit_0.tex_id = self.digits[0] + ID.DIGIT_0
-        self.ammo_digit_1.tex_id = self.digits[1] + ID.DIGIT_0
-        self.ammo_digit_2.tex_id = self.digits[2] + ID.DIGIT_0
-
-        # health
-        self.update_digits(self.eng.player.health)
-        self.health_digit_0.tex_id = self.digits[0] + ID.DIGIT_0
-        self.health_digit_1.tex_id = self.digits[1] + ID.DIGIT_0
-        self.health_digit_2.tex_id = self.digits[2] + ID.DIGIT_0
-
-        # fps
-        self.update_digits(self.eng.app.fps_value)
-        self.fps_digit_0.tex_id = self.digits[0] + ID.DIGIT_0
-        self.fps_digit_1.tex_id = self.digits[1] + ID.DIGIT_0
-        self.fps_digit_2.tex_id = self.digits[2] + ID.DIGIT_0
+        for widget in self.widgets:
+            widget.update(self.app.time)
+        #
+        if self.frame_graph is not None:
+            self.frame_graph.push(self.app.delta_time)
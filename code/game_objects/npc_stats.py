@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class NPCStatTable:
+    def __init__(self, capacity: int = 64):
+        """
+        Health and damage of all NPCs of a level in shared arrays.
+
+        Each NPC owns one slot. Health is kept as the remaining fraction of the
+        NPC's maximum, so a new health multiplier rescales live NPCs without
+        reviving the dead or killing the wounded. `set_multipliers` pushes new
+        DDA multipliers to every slot with one vectorized update.
+        """
+        self.size = 0
+        self.health_mult = 1.0
+        self.damage_mult = 1.0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.base_health = np.zeros(capacity)
+        self.base_damage = np.zeros(capacity)
+        self.health_frac = np.zeros(capacity)
+        # base stats times the current multipliers
+        self.max_health = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+
+    def grow(self):
+        old = (
+            self.base_health,
+            self.base_damage,
+            self.health_frac,
+            self.max_health,
+            self.damage,
+        )
+        self.allocate(2 * len(self.base_health))
+        new = (
+            self.base_health,
+            self.base_damage,
+            self.health_frac,
+            self.max_health,
+            self.damage,
+        )
+        for old_array, new_array in zip(old, new):
+            new_array[: self.size] = old_array[: self.size]
+
+    def reset(self, health_mult=1.0, damage_mult=1.0):
+        """Drop all slots (new level) and set the multipliers new NPCs start with."""
+        self.size = 0
+        self.health_mult = health_mult
+        self.damage_mult = damage_mult
+
+    def add(self, base_health, base_damage):
+        """Register an NPC and return its slot."""
+        if self.size == len(self.base_health):
+            self.grow()
+
+        slot = self.size
+        self.size += 1
+        self.base_health[slot] = base_health
+        self.base_damage[slot] = base_damage
+        self.health_frac[slot] = 1.0
+        self.max_health[slot] = base_health * self.health_mult
+        self.damage[slot] = base_damage * self.damage_mult
+        return slot
+
+    def set_multipliers(self, health_mult, damage_mult):
+        self.health_mult = health_mult
+        self.damage_mult = damage_mult
+        n = self.size
+        np.multiply(self.base_health[:n], health_mult, out=self.max_health[:n])
+        np.multiply(self.base_damage[:n], damage_mult, out=self.damage[:n])
+
+    # -------- per NPC -------- #
+    def get_health(self, slot):
+        return self.max_health.item(slot) * self.health_frac.item(slot)
+
+    def set_health(self, slot, value):
+        max_health = self.max_health.item(slot)
+        self.health_frac[slot] = value / max_health if max_health else 0.0
+
+    def get_damage(self, slot):
+        return self.damage.item(slot)
+
+    # -------- whole table -------- #
+    def get_all_health(self):
+        return self.max_health[: self.size] * self.health_frac[: self.size]
+
+    def get_alive_mask(self):
+        return self.health_frac[: self.size] > 0
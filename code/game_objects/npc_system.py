@@ -0,0 +1,374 @@
+from settings import *
+import numpy as np
+from hook_objects import telemetry
+
+# npc states, the order of NPC_SETTINGS "num_frames" / "state_tex_id" lookups
+WALK, ATTACK, HURT, DEATH = range(4)
+STATES = ("walk", "attack", "hurt", "death")
+
+# per-slot arrays created by NPCSystem.allocate
+SLOT_ARRAYS = (
+    "pos",
+    "tile",
+    "target",
+    "path_from",
+    "scale",
+    "speed",
+    "size_",
+    "attack_dist",
+    "hit_probability",
+    "frame_time",
+    "num_frames",
+    "state_tex_id",
+    "state",
+    "anim_start",
+    "is_alive",
+    "is_hurt",
+    "is_animate",
+    "is_spotted",
+    "has_target",
+    "is_dirty",
+)
+
+
+class NPCSystem:
+    def __init__(self, eng, stats, capacity: int = 64):
+        """
+        State of all NPCs of a level in arrays, advanced together once a tick.
+
+        Movement toward the next path step, grid collisions, door triggers,
+        hit rolls and animation timers run vectorized over all NPCs. Ray casts
+        and path lookups still run per NPC, but only for the NPCs that need one
+        this tick. Hit rolls are drawn in one batch per tick from a seeded
+        numpy Generator.
+
+        NPC objects are views of a slot, which is shared with the health and
+        damage slot in `stats` (NPCStatTable).
+        """
+        self.eng = eng
+        self.app = eng.app
+        self.stats = stats
+        self.rng = np.random.default_rng(0)
+        self.npcs = []  # slot -> NPC view
+        self.size = 0
+        self.allocate(capacity)
+        #
+        self.wall_grid = None  # (width, depth) bool
+        self.door_grid = None  # (width, depth) index into self.doors, -1 if none
+        self.doors = []
+        self.player_tile = None  # player tile of the last path lookups
+        self.plan_id = None  # planner flow field of the last path lookups
+
+    def allocate(self, capacity):
+        self.pos = np.zeros((capacity, 2))  # x, z
+        self.tile = np.zeros((capacity, 2), dtype="int32")
+        self.target = np.zeros((capacity, 2), dtype="int32")  # next path step
+        self.path_from = np.full((capacity, 2), -1, dtype="int32")
+        self.scale = np.ones((capacity, 3))
+        self.speed = np.zeros(capacity)
+        self.size_ = np.zeros(capacity)
+        self.attack_dist = np.zeros(capacity)
+        self.hit_probability = np.zeros(capacity)
+        self.frame_time = np.ones(capacity)
+        self.num_frames = np.ones((capacity, len(STATES)), dtype="int32")
+        self.state_tex_id = np.zeros((capacity, len(STATES)), dtype="int32")
+        self.state = np.zeros(capacity, dtype="int8")
+        self.anim_start = np.zeros(capacity)
+        self.is_alive = np.zeros(capacity, dtype=bool)
+        self.is_hurt = np.zeros(capacity, dtype=bool)
+        self.is_animate = np.zeros(capacity, dtype=bool)
+        self.is_spotted = np.zeros(capacity, dtype=bool)
+        self.has_target = np.zeros(capacity, dtype=bool)
+        # instance data changed since the last upload (see NPCInstancedMesh)
+        self.is_dirty = np.zeros(capacity, dtype=bool)
+
+    def grow(self):
+        old = {name: getattr(self, name) for name in SLOT_ARRAYS}
+        self.allocate(2 * len(self.pos))
+        for name, array in old.items():
+            getattr(self, name)[: self.size] = array[: self.size]
+
+    def reset(self, seed):
+        """Drop all NPCs (new level); hit rolls restart from `seed`."""
+        self.size = 0
+        self.npcs = []
+        self.rng = np.random.default_rng(seed)
+        self.wall_grid = self.door_grid = None
+        self.player_tile = self.plan_id = None
+
+    def add(self, npc, x, z):
+        """Register an NPC standing on tile (x, z) and return its slot."""
+        settings = NPC_SETTINGS[npc.npc_id]
+        slot = self.stats.add(settings["health"], settings["damage"])
+        assert slot == self.size, "NPC and stat slots out of step"
+        if self.size == len(self.pos):
+            self.grow()
+        self.size += 1
+        self.npcs.append(npc)
+
+        self.pos[slot] = x + H_WALL_SIZE, z + H_WALL_SIZE
+        self.tile[slot] = x, z
+        self.path_from[slot] = -1
+        self.scale[slot] = tuple(settings["scale"])
+        self.speed[slot] = settings["speed"]
+        self.size_[slot] = settings["size"]
+        self.attack_dist[slot] = settings["attack_dist"]
+        self.hit_probability[slot] = settings["hit_probability"]
+        self.frame_time[slot] = settings["anim_periods"] * SYNC_PULSE * 0.001
+        self.num_frames[slot] = [settings["num_frames"][s] for s in STATES]
+        self.state_tex_id[slot] = [settings["state_tex_id"][s] for s in STATES]
+        self.state[slot] = WALK
+        self.anim_start[slot] = self.app.time
+        self.is_alive[slot] = True
+        self.is_animate[slot] = True
+        self.is_hurt[slot] = self.is_spotted[slot] = self.has_target[slot] = False
+        self.is_dirty[slot] = True
+        return slot
+
+    def build_grids(self):
+        level_map = self.eng.level_map
+        shape = level_map.width, level_map.depth
+        self.wall_grid = np.zeros(shape, dtype=bool)
+        for x, z in level_map.wall_map:
+            self.wall_grid[x, z] = True
+        self.doors = list(level_map.door_map.values())
+        self.door_grid = np.full(shape, -1, dtype="int32")
+        for i, (x, z) in enumerate(level_map.door_map):
+            self.door_grid[x, z] = i
+
+    def set_walls(self, tiles, is_wall):
+        """The world streamer loaded (`is_wall` True) or evicted the wall `tiles`."""
+        if self.wall_grid is None or not tiles:
+            return None
+        x, z = np.array(tiles).T
+        self.wall_grid[x, z] = is_wall
+
+    # -------- tick -------- #
+    def update(self):
+        n = self.size
+        if not n:
+            return None
+        if self.wall_grid is None:
+            self.build_grids()
+
+        time = self.app.time
+        player = self.eng.player
+        # tiles held by live NPCs at the start of the tick (the engine's npc_map)
+        occupied = np.zeros_like(self.wall_grid)
+        alive_tiles = self.tile[:n][self.is_alive[:n]]
+        occupied[alive_tiles[:, 0], alive_tiles[:, 1]] = True
+
+        is_hurt = self.is_hurt[:n]
+        has_health = self.stats.get_alive_mask()
+        active = ~is_hurt & has_health
+        streamer = self.eng.world_streamer
+        if streamer is not None:
+            # away from the player NPCs wait, their tiles may not be loaded
+            active &= streamer.is_simulated(self.tile[:n])
+        dying = ~is_hurt & ~has_health
+        self.is_alive[:n][dying] = False
+
+        new_state = self.state[:n].copy()
+        new_state[is_hurt] = HURT
+        new_state[dying] = DEATH
+
+        pos, tile = self.pos[:n], self.tile[:n]
+        tile[active] = pos[active].astype("int32")
+
+        player_pos = np.array((player.position.x, player.position.z))
+        to_player = player_pos - pos
+        dist = np.hypot(to_player[:, 0], to_player[:, 1])
+
+        self.spot_player(active, dist)
+        spotted = active & self.is_spotted[:n]
+        self.update_paths(spotted, alive_tiles)
+
+        attackers = self.attack(spotted & (dist <= self.attack_dist[:n]))
+        new_state[attackers] = ATTACK
+
+        walkers = spotted & self.has_target[:n]
+        walkers[attackers] = False
+        new_state[walkers] = WALK
+        self.move(np.flatnonzero(walkers), occupied)
+
+        self.set_states(new_state, time)
+        self.animate(time)
+
+    def spot_player(self, active, dist):
+        # a ray cannot reach the player's tile from further away
+        candidates = active & ~self.is_spotted[: self.size]
+        candidates &= dist <= MAX_RAY_DIST + WALL_SIZE * 1.5
+        for slot in np.flatnonzero(candidates):
+            npc = self.npcs[slot]
+            if self.ray_to_player(npc.pos):
+                self.is_spotted[slot] = True
+                telemetry.on_npc_engaged(npc)
+                #
+                self.eng.sound.play(self.eng.sound.spotted[npc.npc_id], npc.pos)
+
+    def ray_to_player(self, pos):
+        dir_to_player = glm.normalize(self.eng.player.position - pos)
+        return self.eng.ray_casting.run(start_pos=pos, direction=dir_to_player)
+
+    def update_paths(self, spotted, blocked):
+        """
+        Next path step of spotted NPCs whose tile or the player's tile changed,
+        or all of them when a new flow field came from the planner worker.
+        Without one, paths are searched in-process around the `blocked`
+        tiles of live NPCs.
+        """
+        player_tile = self.eng.player.tile_pos
+        n = self.size
+        planner = self.eng.npc_planner
+        plan = None
+        if planner is not None and spotted.any():
+            planner.request_flow_field(player_tile, blocked)
+            plan = planner.get_flow_field(player_tile)
+        plan_id = plan and plan[0]
+        need = spotted.copy()
+        if player_tile == self.player_tile and plan_id == self.plan_id:
+            need &= (self.tile[:n] != self.path_from[:n]).any(axis=1)
+        self.player_tile, self.plan_id = player_tile, plan_id
+
+        slots = np.flatnonzero(need)
+        if plan is not None:
+            _, _, flow = plan
+            width = self.eng.level_map.width
+            tiles = self.tile[slots]
+            # read in place from the shared block
+            steps = flow[tiles[:, 0] + tiles[:, 1] * width]
+            # at the goal or cut off: toward the player, as PathFinder.find
+            targets = np.where(
+                (steps >= 0)[:, None],
+                np.stack([steps % width, steps // width], axis=1),
+                player_tile,
+            )
+            self.target[slots] = targets
+            self.path_from[slots] = tiles
+            self.has_target[slots] = True
+            return None
+
+        find = self.eng.path_finder.find
+        for slot in slots:
+            start = tuple(self.tile[slot].tolist())
+            self.target[slot] = find(start_pos=start, end_pos=player_tile)
+            self.path_from[slot] = start
+            self.has_target[slot] = True
+
+    def attack(self, in_range):
+        """Slots that attack this tick; hits are rolled for all of them at once."""
+        attackers = [
+            slot
+            for slot in np.flatnonzero(in_range)
+            if self.ray_to_player(self.npcs[slot].pos)
+        ]
+        attackers = np.array(attackers, dtype="int64")
+        if not len(attackers):
+            return attackers
+
+        sound = self.eng.sound
+        if self.app.sound_trigger:
+            for slot in attackers:
+                npc = self.npcs[slot]
+                sound.play(sound.enemy_attack[npc.npc_id], npc.pos)
+
+        hits = self.rng.random(len(attackers)) < self.hit_probability[attackers]
+        player = self.eng.player
+        for slot in attackers[hits]:
+            player.health -= self.stats.get_damage(slot)
+            #
+            sound.play(sound.player_hurt)
+        return attackers
+
+    def move(self, slots, occupied):
+        if not len(slots):
+            return None
+        pos, tile = self.pos[slots], self.tile[slots]
+        step = self.target[slots] + H_WALL_SIZE - pos
+        length = np.hypot(step[:, 0], step[:, 1])
+        moving = length > 0
+        slots, pos, tile = slots[moving], pos[moving], tile[moving]
+        step = step[moving] / length[moving, None]
+        delta = step * (self.speed[slots] * self.app.delta_time)[:, None]
+        size = self.size_[slots]
+
+        # x first, then z from the new x, like a step along each axis
+        for axis in (0, 1):
+            d = delta[:, axis]
+            probe = pos.copy()
+            probe[:, axis] += d + np.sign(d) * size
+            probe = probe.astype("int32")
+            blocked = self.wall_grid[probe[:, 0], probe[:, 1]]
+            other = (probe != tile).any(axis=1)
+            blocked |= occupied[probe[:, 0], probe[:, 1]] & other
+            pos[:, axis] += np.where(blocked, 0.0, d)
+
+        self.pos[slots] = pos
+        self.is_dirty[slots] = True
+
+        # walking onto a closed door tile opens it
+        door_ids = self.door_grid[tile[:, 0], tile[:, 1]]
+        for slot, door_id in zip(slots[door_ids >= 0], door_ids[door_ids >= 0]):
+            door = self.doors[door_id]
+            if door.is_closed and not door.is_moving:
+                door.start_moving()
+                #
+                self.eng.sound.play(self.eng.sound.open_door, self.npcs[slot].pos)
+
+    def set_states(self, new_state, time):
+        n = self.size
+        changed = new_state != self.state[:n]
+        # the animation restarts with every new state
+        self.state[:n][changed] = new_state[changed]
+        self.anim_start[:n][changed] = time
+        self.is_dirty[:n] |= changed
+
+    def animate(self, time):
+        n = self.size
+        elapsed = time - self.anim_start[:n]
+        animate = self.is_animate[:n]
+
+        # a hit shows the hurt frame for one frame time
+        hurt_over = animate & self.is_hurt[:n] & (elapsed >= self.frame_time[:n])
+        self.is_hurt[:n][hurt_over] = False
+
+        # death plays once, then the NPC drops its item
+        num_frames = self.num_frames[np.arange(n), self.state[:n]]
+        last_frame = elapsed >= (num_frames - 1) * self.frame_time[:n]
+        dead = animate & ~self.is_hurt[:n] & ~self.is_alive[:n] & ~hurt_over
+        for slot in np.flatnonzero(dead & last_frame):
+            self.is_animate[slot] = False
+            npc = self.npcs[slot]
+            npc.to_drop_item()
+            #
+            self.eng.sound.play(self.eng.sound.death[npc.npc_id], npc.pos)
+
+    # -------- instance data -------- #
+    def get_anim(self, slot):
+        state = self.state[slot]
+        is_loop = 0.0 if state == DEATH else 1.0
+        num_frames = self.num_frames[slot, state]
+        return num_frames, self.frame_time[slot], self.anim_start[slot], is_loop
+
+    def fill_instances(self, arrays, slots):
+        """Write billboard instance data of `slots` into the mesh arrays."""
+        state = self.state[slots]
+        if "m_model" in arrays:
+            # translate(pos) * scale, column-major
+            m_model = arrays["m_model"]
+            m_model[slots] = 0.0
+            m_model[slots, 0] = self.scale[slots, 0]
+            m_model[slots, 5] = self.scale[slots, 1]
+            m_model[slots, 10] = self.scale[slots, 2]
+            m_model[slots, 12] = self.pos[slots, 0]
+            m_model[slots, 14] = self.pos[slots, 1]
+            m_model[slots, 15] = 1.0
+        if "in_tex_id" in arrays:
+            arrays["in_tex_id"][slots, 0] = self.state_tex_id[slots, state]
+        if "in_anim" in arrays:
+            anim = arrays["in_anim"]
+            anim[slots, 0] = self.num_frames[slots, state]
+            anim[slots, 1] = self.frame_time[slots]
+            anim[slots, 2] = self.anim_start[slots]
+            anim[slots, 3] = state != DEATH
+        self.is_dirty[slots] = False
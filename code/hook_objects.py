@@ -1,11 +1,72 @@
+import atexit
+import random
 from hooks.game_stats import GameStats
 from hooks.event_timer import EventTimer
 from hooks.logger import GameLogger
-from settings import LOG_DIR
+from hooks.telemetry import TelemetryRecorder
+from hooks.difficulty_controller import DifficultySelector, create_controller
+from hooks.continuous_dda import ContinuousDDA
+from settings import (
+    LOG_DIR,
+    TEXT_LOG_ON,
+    EVENT_LOG_FLUSH_INTERVAL,
+    LOG_QUEUE_SIZE,
+    LOG_OVERFLOW_POLICY,
+    TELEMETRY_CAPACITY,
+    TELEMETRY_CHUNK_SIZE,
+    TELEMETRY_WINDOW,
+    DDA_ON,
+    DDA_CONTROLLER,
+    DDA_CONTROLLER_OPTIONS,
+    DDA_CONTINUOUS_ON,
+    DDA_CONTINUOUS_CONTROLLER,
+    DDA_CONTINUOUS_INTERVAL,
+    DDA_CONTINUOUS_MAX_STEP,
+    TELEMETRY_ON,
+)
 
 runtime_game_stats = GameStats()
 
+game_rng = random.Random()  # seeded by the input source for deterministic replays
+
 level_duration = EventTimer()  # This is for the Fuzzy Controller
 total_duration = EventTimer()  # This is to get the time in general
 
-game_logger = GameLogger(directory=LOG_DIR, base_filename="game")
+game_logger = GameLogger(
+    directory=LOG_DIR,
+    base_filename="game",
+    text_log=TEXT_LOG_ON,
+    flush_interval=EVENT_LOG_FLUSH_INTERVAL,
+    queue_size=LOG_QUEUE_SIZE,
+    overflow=LOG_OVERFLOW_POLICY,
+)
+
+telemetry = TelemetryRecorder(
+    directory=LOG_DIR,
+    base_filename="game",
+    # read lazily: the logger opens its files only once the game runs
+    participant=lambda: game_logger.current_participant,
+    capacity=TELEMETRY_CAPACITY,
+    chunk_size=TELEMETRY_CHUNK_SIZE,
+    window=TELEMETRY_WINDOW,
+)
+atexit.register(telemetry.close)
+
+# with DDA off the multipliers stay at 1.0
+dda_name = DDA_CONTROLLER if DDA_ON else "null"
+difficulty = DifficultySelector(dda_name, **DDA_CONTROLLER_OPTIONS.get(dda_name, {}))
+
+continuous_dda = None
+if DDA_ON and DDA_CONTINUOUS_ON and TELEMETRY_ON:
+    continuous_dda = ContinuousDDA(
+        controller=create_controller(
+            DDA_CONTINUOUS_CONTROLLER,
+            **DDA_CONTROLLER_OPTIONS.get(DDA_CONTINUOUS_CONTROLLER, {}),
+        ),
+        telemetry=telemetry,
+        game_stats=runtime_game_stats,
+        duration=total_duration,
+        logger=game_logger,
+        interval=DDA_CONTINUOUS_INTERVAL,
+        max_step=DDA_CONTINUOUS_MAX_STEP,
+    )
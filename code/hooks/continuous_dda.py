@@ -0,0 +1,90 @@
+import time
+
+
+class ContinuousDDA:
+    def __init__(
+        self,
+        controller,
+        telemetry,
+        game_stats,
+        duration,
+        logger=None,
+        interval: float = 5.0,
+        min_window: float = 10.0,
+        max_step: float = 0.1,
+    ):
+        """
+        Re-evaluates the difficulty during a level, every `interval` seconds.
+
+        The controller gets the same inputs as at deaths and doors, except
+        that health is the player's mean health over the telemetry window,
+        whose sums are kept incrementally by the TelemetryRecorder. Each
+        evaluation moves the multipliers at most `max_step` towards the
+        controller's output and pushes them to the live NPCs through the
+        engine's NPCStatTable.
+
+        The cost per evaluation is one controller call plus an O(1) feature
+        read, so the controller should be a cheap one (table, linear).
+        """
+        self.controller = controller
+        self.telemetry = telemetry
+        self.game_stats = game_stats
+        self.duration = duration
+        self.logger = logger
+        self.interval = interval
+        self.min_window = min_window
+        self.max_step = max_step
+        #
+        self.next_time = None
+        self.num_updates = 0
+        self.max_eval_ms = 0.0
+
+    def update(self, eng):
+        """Called every frame; evaluates only when the interval has elapsed."""
+        now = eng.app.time
+        if self.next_time is None or now < self.next_time - self.interval:
+            # first frame, or the clock was restarted
+            self.next_time = now + self.interval
+            return None
+        if now < self.next_time:
+            return None
+
+        self.next_time = now + self.interval
+        start = time.perf_counter()
+        self.evaluate(eng)
+        self.max_eval_ms = max(self.max_eval_ms, (time.perf_counter() - start) * 1000)
+
+    def evaluate(self, eng):
+        features = self.telemetry.get_features()
+        if features["window_sec"] < self.min_window:
+            return None
+
+        health = features["mean_health"]
+        deaths = self.game_stats.get_deaths()
+        time_taken = self.duration.get_duration()
+        target_damage, target_health = self.controller.adjust(
+            health, deaths, time_taken, eng.player_attribs.num_level
+        )
+
+        attribs = eng.player_attribs
+        damage_mult = self.step_towards(attribs.damage_mult, target_damage)
+        health_mult = self.step_towards(attribs.health_mult, target_health)
+        if (damage_mult, health_mult) == (attribs.damage_mult, attribs.health_mult):
+            return None
+
+        attribs.damage_mult = eng.player.damage_mult = damage_mult
+        attribs.health_mult = eng.player.health_mult = health_mult
+        eng.npc_stats.set_multipliers(health_mult, damage_mult)
+        self.num_updates += 1
+
+        if self.logger is not None:
+            self.logger.log_difficulty_update(
+                health,
+                deaths,
+                time_taken,
+                health_mult=health_mult,
+                damage_mult=damage_mult,
+            )
+
+    def step_towards(self, current, target):
+        return current + max(-self.max_step, min(self.max_step, target - current))
@@ -0,0 +1,291 @@
+import hashlib
+import math
+import os
+import threading
+
+import numpy as np
+
+# valid range of both multipliers, the universe of the fuzzy consequents
+MIN_MULT = 0.3
+MAX_MULT = 2.0
+
+FUZZY_CONTROLLER_PATH = os.path.join(os.path.dirname(__file__), "fuzzy_controller.py")
+
+CONTROLLERS = {}  # name -> DifficultyController subclass
+
+
+def register_controller(name):
+    """Class decorator adding a controller to CONTROLLERS under `name`."""
+
+    def register(cls):
+        cls.name = name
+        CONTROLLERS[name] = cls
+        return cls
+
+    return register
+
+
+def create_controller(name, **kwargs):
+    try:
+        cls = CONTROLLERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown DDA controller '{name}', expected one of {tuple(CONTROLLERS)}"
+        ) from None
+    return cls(**kwargs)
+
+
+class DifficultyController:
+    name = None
+
+    def __init__(self, max_early_increase: float = 0.25):
+        """
+        Maps end-of-attempt performance to enemy damage and health multipliers.
+
+        Subclasses implement `compute`, and `load` for any expensive setup,
+        which runs once on the first `adjust` or earlier in the background
+        through `prepare_async`. `adjust` adds the cap shared by every
+        controller: on the first level (level < 1) neither multiplier rises
+        more than `max_early_increase` above 1.0.
+        """
+        self.max_early_increase = max_early_increase
+        self.prepare_lock = threading.Lock()
+        self.is_prepared = False
+
+    def load(self):
+        pass
+
+    def prepare(self):
+        """Run `load` once; blocks while another thread is running it."""
+        if self.is_prepared:
+            return None
+        with self.prepare_lock:
+            if not self.is_prepared:
+                self.load()
+                self.is_prepared = True
+
+    def prepare_async(self):
+        if not self.is_prepared:
+            threading.Thread(
+                target=self.prepare, name=f"DDA-{self.name}-load", daemon=True
+            ).start()
+
+    def compute(self, health, deaths, time_sec):
+        raise NotImplementedError
+
+    def adjust(self, health, deaths, time_sec, level):
+        """
+        Parameters:
+          - health (float): Player's health at the end of the attempt (0-100).
+          - deaths (int): Deaths so far.
+          - time_sec (float): Time taken, sec.
+          - level (int): Current level number.
+
+        Returns:
+          - tuple (float, float): (enemy_damage_multiplier, enemy_health_multiplier)
+        """
+        self.prepare()
+        damage_mult, health_mult = self.compute(health, deaths, time_sec)
+        if level < 1:
+            damage_mult = min(damage_mult, 1.0 + self.max_early_increase)
+            health_mult = min(health_mult, 1.0 + self.max_early_increase)
+        return damage_mult, health_mult
+
+    def reset(self):
+        """Forget any state carried between calls (new participant)."""
+        pass
+
+
+@register_controller("null")
+class NullController(DifficultyController):
+    """No adjustment: the baseline condition of the study."""
+
+    def compute(self, health, deaths, time_sec):
+        return 1.0, 1.0
+
+
+@register_controller("fuzzy")
+class FuzzyController(DifficultyController):
+    """The scikit-fuzzy rule base in hooks/fuzzy_controller.py."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fuzzy_controller = None
+
+    def load(self):
+        # importing skfuzzy and building the control system takes seconds
+        from hooks import fuzzy_controller
+
+        self.fuzzy_controller = fuzzy_controller
+
+    def compute(self, health, deaths, time_sec):
+        return self.fuzzy_controller.check_DDA_adjust_difficulty(
+            health, deaths, time_sec
+        )
+
+
+@register_controller("table")
+class LookupTableController(DifficultyController):
+    def __init__(
+        self,
+        health_step: float = 1.0,
+        time_step: float = 2.0,
+        cache_path: str = None,
+        **kwargs,
+    ):
+        """
+        The fuzzy rule base precomputed on a (health, deaths, time) grid and
+        trilinearly interpolated at runtime.
+
+        Deaths are sampled at every integer, so between grid points only
+        health and time are interpolated. The table is rebuilt whenever
+        fuzzy_controller.py changes and, with `cache_path`, kept on disk.
+        It is loaded or built by `load`.
+        """
+        super().__init__(**kwargs)
+        self.health_step = health_step
+        self.time_step = time_step
+        #
+        self.health_axis = np.arange(0, 100 + health_step / 2, health_step)
+        self.deaths_axis = np.arange(0, 11)
+        self.time_axis = np.arange(0, 600 + time_step / 2, time_step)
+        self.cache_path = cache_path
+        self.table = None
+
+    def load(self):
+        self.table = self.load_table(self.cache_path)
+
+    def get_table_key(self):
+        with open(FUZZY_CONTROLLER_PATH, "rb") as file:
+            source = file.read()
+        return hashlib.sha1(
+            source + repr((self.health_step, self.time_step)).encode()
+        ).hexdigest()
+
+    def load_table(self, cache_path):
+        key = self.get_table_key()
+        if cache_path and os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if str(data["key"]) == key:
+                    return data["table"]
+
+        table = self.build_table()
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            np.savez(cache_path, key=np.array(key), table=table)
+        return table
+
+    def build_table(self):
+        from hooks import fuzzy_controller
+        from hooks.fuzzy_vectorized import VectorizedFuzzySystem, adjust_difficulty
+
+        system = VectorizedFuzzySystem(fuzzy_controller.difficulty_ctrl)
+        grid = np.meshgrid(
+            self.health_axis, self.deaths_axis, self.time_axis, indexing="ij"
+        )
+        damage, health, _ = adjust_difficulty(system, *(g.ravel() for g in grid))
+        # (health, deaths, time, [damage_mult, health_mult])
+        return np.stack([damage, health], axis=-1).reshape(*grid[0].shape, 2)
+
+    @staticmethod
+    def get_cell(value, step, num):
+        x = min(max(value / step, 0.0), num - 1.0)
+        i = min(int(x), num - 2)
+        return i, x - i
+
+    def compute(self, health, deaths, time_sec):
+        h, fh = self.get_cell(health, self.health_step, len(self.health_axis))
+        t, ft = self.get_cell(time_sec, self.time_step, len(self.time_axis))
+        d, fd = self.get_cell(deaths, 1.0, len(self.deaths_axis))
+
+        # item() avoids creating numpy scalars on the per-call path
+        item = self.table.item
+        result = [0.0, 0.0]
+        for di, wd in ((d, 1.0 - fd), (d + 1, fd)):
+            if not wd:
+                continue
+            for k in range(2):
+                low = item(h, di, t, k) * (1.0 - ft) + item(h, di, t + 1, k) * ft
+                high = (
+                    item(h + 1, di, t, k) * (1.0 - ft) + item(h + 1, di, t + 1, k) * ft
+                )
+                result[k] += wd * (low * (1.0 - fh) + high * fh)
+        return result[0], result[1]
+
+
+@register_controller("linear")
+class LinearController(DifficultyController):
+    def __init__(
+        self,
+        target: float = 0.0,
+        kp: float = 0.8,
+        ki: float = 0.0,
+        kd: float = 0.0,
+        weights: tuple = (0.4, 0.4, 0.2),
+        **kwargs,
+    ):
+        """
+        Cheap PID baseline on a single performance score.
+
+        The score is a weighted sum of normalized health (up), deaths and time
+        (down) in [-1, 1]; both multipliers move with the error to `target`.
+        With the default ki = kd = 0 this is a stateless linear mapping.
+        """
+        super().__init__(**kwargs)
+        self.target = target
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.weights = weights
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+
+    def get_score(self, health, deaths, time_sec):
+        w_health, w_deaths, w_time = self.weights
+        health = min(max(health / 100, 0.0), 1.0)
+        deaths = min(max(deaths / 10, 0.0), 1.0)
+        time_sec = min(max(time_sec / 600, 0.0), 1.0)
+        return (
+            w_health * (2 * health - 1)
+            - w_deaths * (2 * deaths - 1)
+            - w_time * (2 * time_sec - 1)
+        )
+
+    def compute(self, health, deaths, time_sec):
+        error = self.get_score(health, deaths, time_sec) - self.target
+        self.integral += error
+        derivative = 0.0 if self.last_error is None else error - self.last_error
+        self.last_error = error
+
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        mult = min(max(1.0 + output, MIN_MULT), MAX_MULT)
+        if math.isnan(mult):
+            mult = 1.0
+        return mult, mult
+
+
+class DifficultySelector:
+    def __init__(self, name: str, **kwargs):
+        """
+        Holds the active controller so it can be swapped while the game runs
+        without the callers re-importing anything.
+        """
+        self.controller = None
+        self.select(name, **kwargs)
+
+    def select(self, name, **kwargs):
+        self.controller = create_controller(name, **kwargs)
+
+    def adjust(self, health, deaths, time_sec, level):
+        return self.controller.adjust(health, deaths, time_sec, level)
+
+    def reset(self):
+        self.controller.reset()
+
+    def prepare_async(self):
+        self.controller.prepare_async()
+
+    @property
+    def name(self):
+        return self.controller.name
@@ -0,0 +1,216 @@
+import glob
+import os
+import time
+from enum import IntEnum
+
+import numpy as np
+
+
+EVENT_LOG_MAGIC = b"DDAEVT"
+EVENT_LOG_VERSION = 1
+EVENT_LOG_EXT = ".evt"
+
+
+class EventType(IntEnum):
+    TURN_START = 0
+    DEATH = 1
+    LEVEL_COMPLETE = 2
+    DOOR_INTERACTED = 3
+    TOTAL_DURATION = 4
+    DIFFICULTY_UPDATE = 5  # continuous DDA re-evaluation
+
+
+# file header, written once when the participant file is created
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S6"),
+        ("version", "<u2"),
+        ("record_size", "<u2"),
+        ("participant", "<u4"),
+        ("start_time", "<f8"),
+    ]
+)
+
+# one fixed-size record per game event
+EVENT_DTYPE = np.dtype(
+    [
+        ("event", "u1"),
+        ("participant", "<u4"),
+        ("wall_time", "<f8"),  # unix time of the event
+        ("health", "<f4"),
+        ("deaths", "<u2"),
+        ("time_taken", "<f8"),  # total duration for TOTAL_DURATION events
+        ("health_mult", "<f4"),
+        ("damage_mult", "<f4"),
+    ]
+)
+
+
+def get_event_log_path(directory, base_filename, participant):
+    return os.path.join(
+        directory, f"{base_filename}_participant_{participant}{EVENT_LOG_EXT}"
+    )
+
+
+def allocate_participant(directory: str = "logs", base_filename: str = "game"):
+    """
+    Atomically claim the next free participant number.
+
+    The event log file itself is the lock: it is created with O_EXCL, so two
+    game instances started at the same moment can never get the same number.
+    Numbers already used by legacy text logs are skipped.
+
+    Returns:
+      - tuple (int, int): (participant number, open file descriptor)
+    """
+    os.makedirs(directory, exist_ok=True)
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+
+    participant = 1
+    while True:
+        text_log = os.path.join(
+            directory, f"{base_filename}_participant_{participant}.log"
+        )
+        if not os.path.exists(text_log):
+            path = get_event_log_path(directory, base_filename, participant)
+            try:
+                return participant, os.open(path, flags, 0o644)
+            except FileExistsError:
+                pass
+        participant += 1
+
+
+class EventLogWriter:
+    def __init__(
+        self,
+        directory: str = "logs",
+        base_filename: str = "game",
+        buffer_size: int = 256,
+        flush_interval: float = 5.0,
+    ):
+        """
+        Append-only binary event log for one participant.
+
+        Records are collected in a preallocated structured array and written to
+        disk when the buffer is full or `flush_interval` seconds have passed
+        since the last write.
+        """
+        self.participant, fd = allocate_participant(directory, base_filename)
+        self.path = get_event_log_path(directory, base_filename, self.participant)
+        self.file = os.fdopen(fd, "wb")
+
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = EVENT_LOG_MAGIC
+        header["version"] = EVENT_LOG_VERSION
+        header["record_size"] = EVENT_DTYPE.itemsize
+        header["participant"] = self.participant
+        header["start_time"] = time.time()
+        self.file.write(header.tobytes())
+        self.file.flush()
+
+        self.buffer = np.zeros(buffer_size, dtype=EVENT_DTYPE)
+        self.num_buffered = 0
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+    def write(
+        self,
+        event: EventType,
+        health: float = 0.0,
+        deaths: int = 0,
+        time_taken: float = 0.0,
+        health_mult: float = 1.0,
+        damage_mult: float = 1.0,
+        wall_time: float = None,
+    ):
+        """`wall_time` is the unix time of the event, now if None."""
+        if self.file is None:
+            return None
+
+        self.buffer[self.num_buffered] = (
+            event,
+            self.participant,
+            time.time() if wall_time is None else wall_time,
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
+        )
+        self.num_buffered += 1
+        #
+        if (
+            self.num_buffered == len(self.buffer)
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        if self.file is None:
+            return None
+
+        if self.num_buffered:
+            self.file.write(self.buffer[: self.num_buffered].tobytes())
+            self.num_buffered = 0
+        self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file is None:
+            return None
+
+        self.flush()
+        self.file.close()
+        self.file = None
+
+
+def read_event_log(path: str) -> np.ndarray:
+    """
+    Load one participant's event log as a structured array of EVENT_DTYPE.
+    A partially written trailing record (e.g. after a crash) is ignored.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    header = np.frombuffer(data, dtype=HEADER_DTYPE, count=1)[0]
+    if header["magic"] != EVENT_LOG_MAGIC:
+        raise ValueError(f"{path} is not a DDA event log")
+    if header["version"] != EVENT_LOG_VERSION:
+        raise ValueError(
+            f"{path} has schema version {header['version']}, "
+            f"expected {EVENT_LOG_VERSION}"
+        )
+
+    body = data[HEADER_DTYPE.itemsize :]
+    num_records = len(body) // EVENT_DTYPE.itemsize
+    return np.frombuffer(body, dtype=EVENT_DTYPE, count=num_records).copy()
+
+
+def load_study(directory: str = "logs", base_filename: str = "game") -> np.ndarray:
+    """
+    Load every participant's event log in `directory` into one structured array,
+    sorted by participant and event time.
+    """
+    pattern = os.path.join(directory, f"{base_filename}_participant_*{EVENT_LOG_EXT}")
+    logs = [read_event_log(path) for path in glob.glob(pattern)]
+    if not logs:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+
+    events = np.concatenate(logs)
+    return events[np.lexsort((events["wall_time"], events["participant"]))]
+
+
+if __name__ == "__main__":
+    import sys
+
+    study = load_study(sys.argv[1] if len(sys.argv) > 1 else "logs")
+    print(f"Loaded {len(study)} events")
+
+    for participant in np.unique(study["participant"]):
+        events = study[study["participant"] == participant]
+        print(
+            f"Participant {participant}: "
+            f"deaths={np.count_nonzero(events['event'] == EventType.DEATH)} "
+            f"levels={np.count_nonzero(events['event'] == EventType.LEVEL_COMPLETE)} "
+            f"doors={np.count_nonzero(events['event'] == EventType.DOOR_INTERACTED)}"
+        )
@@ -1,5 +1,13 @@
 from pygame.time import get_ticks
 
+# replaced by the input source so that recorded sessions replay with the same clock
+time_source = get_ticks
+
+
+def set_time_source(func):
+    global time_source
+    time_source = func
+
 
 class EventTimer:
     def __init__(self):
@@ -7,18 +15,18 @@ class EventTimer:
         self.end_time = None
 
     def start(self):
-        self.start_time = get_ticks()
+        self.start_time = time_source()
         self.end_time = None
 
     def stop(self):
         if self.start_time is not None:
-            self.end_time = get_ticks()
+            self.end_time = time_source()
 
     def get_duration(self):
         if self.start_time is None:
             return 0
         if self.is_running():  # if timer is running
-            return (get_ticks() - self.start_time) / 1000
+            return (time_source() - self.start_time) / 1000
         else:  # if the timer is stopped
             return (self.end_time - self.start_time) / 1000
 
@@ -0,0 +1,154 @@
+import numpy as np
+from skfuzzy.control.term import Term, TermAggregate
+
+# input order used by all the DDA helpers below
+DDA_INPUTS = ("health", "deaths", "completion_time")
+DDA_INPUT_RANGES = {"health": (0, 100), "deaths": (0, 10), "completion_time": (0, 600)}
+DDA_OUTPUTS = ("enemy_damage", "enemy_health")
+
+
+class VectorizedFuzzySystem:
+    def __init__(self, control_system, batch_size: int = 8192):
+        """
+        Batch Mamdani inference for a scikit-fuzzy ControlSystem.
+
+        Evaluates many input points at once with the same operators skfuzzy
+        uses (rule and/or functions, max accumulation, min implication,
+        centroid defuzzification). The aggregated output membership is sampled
+        on the consequent universe, without skfuzzy's per-call upsampling at
+        the cut points, so results agree with ControlSystemSimulation to
+        within a fraction of the universe step.
+        """
+        self.batch_size = batch_size
+        self.antecedents = {var.label: var for var in control_system.antecedents}
+        self.consequents = {var.label: var for var in control_system.consequents}
+        self.rules = list(control_system.rules)
+
+        # (antecedent label, term label) -> column in the membership table
+        self.term_index = {}
+        for var in self.antecedents.values():
+            for label in var.terms:
+                self.term_index[(var.label, label)] = len(self.term_index)
+
+        # consequent label -> [(term mf, [(rule index, weight), ...]), ...]
+        self.outputs = {}
+        for label, var in self.consequents.items():
+            terms = []
+            for term_label, term in var.terms.items():
+                firing = [
+                    (i, c.weight)
+                    for i, rule in enumerate(self.rules)
+                    for c in rule.consequent
+                    if c.term is term
+                ]
+                if firing:
+                    terms.append((term.mf.astype(np.float64), firing))
+            self.outputs[label] = terms
+
+    def get_memberships(self, inputs):
+        size = len(next(iter(inputs.values())))
+        memberships = np.empty((size, len(self.term_index)))
+        for (var_label, term_label), col in self.term_index.items():
+            var = self.antecedents[var_label]
+            memberships[:, col] = np.interp(
+                inputs[var_label], var.universe, var.terms[term_label].mf, 0.0, 0.0
+            )
+        return memberships
+
+    def get_firing(self, rule, node, memberships):
+        if isinstance(node, Term):
+            return memberships[:, self.term_index[(node.parent.label, node.label)]]
+        if isinstance(node, TermAggregate):
+            first = self.get_firing(rule, node.term1, memberships)
+            if node.kind == "not":
+                return 1.0 - first
+            second = self.get_firing(rule, node.term2, memberships)
+            if node.kind == "and":
+                return rule.and_func(first, second)
+            return rule.or_func(first, second)
+        raise TypeError(f"Unsupported antecedent {node!r}")
+
+    def get_rule_activations(self, inputs):
+        """Firing strength of every rule, shape (num_points, num_rules)."""
+        memberships = self.get_memberships(inputs)
+        return np.stack(
+            [
+                self.get_firing(rule, rule.antecedent, memberships)
+                for rule in self.rules
+            ],
+            axis=1,
+        )
+
+    def defuzzify(self, label, activations):
+        """Centroid of the clipped, max-aggregated output, NaN where nothing fired."""
+        universe = self.consequents[label].universe.astype(np.float64)
+        aggregated = np.zeros((len(activations), len(universe)))
+        for mf, firing in self.outputs[label]:
+            cut = np.zeros(len(activations))
+            for rule_index, weight in firing:
+                np.fmax(cut, activations[:, rule_index] * weight, out=cut)
+            np.maximum(
+                aggregated, np.minimum(cut[:, None], mf[None, :]), out=aggregated
+            )
+
+        # exact centroid of the piecewise-linear membership (trapezoid segments)
+        x1, dx = universe[:-1], np.diff(universe)
+        y1, y2 = aggregated[:, :-1], aggregated[:, 1:]
+        area = 0.5 * dx * (y1 + y2)
+        moment = area * x1 + dx * dx * (y1 + 2 * y2) / 6
+        total_area = area.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total_area > 0, moment.sum(axis=1) / total_area, np.nan)
+
+    def compute(self, inputs):
+        """
+        Crisp outputs for arrays of inputs.
+
+        Parameters:
+          - inputs (dict): antecedent label -> 1D array, all of the same length.
+
+        Returns:
+          - tuple (dict, np.ndarray): consequent label -> crisp values (NaN where
+            no rule fired), and the rule activations of shape (points, rules).
+        """
+        inputs = {label: np.asarray(x, dtype=np.float64) for label, x in inputs.items()}
+        size = len(next(iter(inputs.values())))
+        outputs = {label: np.empty(size) for label in self.consequents}
+        activations = np.empty((size, len(self.rules)))
+
+        for start in range(0, size, self.batch_size):
+            end = min(start + self.batch_size, size)
+            batch = {label: x[start:end] for label, x in inputs.items()}
+            activations[start:end] = self.get_rule_activations(batch)
+            for label in self.consequents:
+                outputs[label][start:end] = self.defuzzify(
+                    label, activations[start:end]
+                )
+        return outputs, activations
+
+
+def adjust_difficulty(system, player_health, player_deaths, level_time_sec):
+    """
+    Vectorized `check_DDA_adjust_difficulty`: same input clipping, the same 1.0
+    fallback where no rule fires and the same 0.1 lower bound.
+
+    Returns:
+      - tuple (np.ndarray, np.ndarray, np.ndarray): damage multipliers, health
+        multipliers and a mask of the inputs where no rule fired.
+    """
+    inputs = {
+        "health": np.clip(player_health, *DDA_INPUT_RANGES["health"]),
+        "deaths": np.clip(player_deaths, *DDA_INPUT_RANGES["deaths"]),
+        "completion_time": np.clip(
+            level_time_sec, *DDA_INPUT_RANGES["completion_time"]
+        ),
+    }
+    inputs = {label: np.atleast_1d(x).astype(np.float64) for label, x in inputs.items()}
+    outputs, _ = system.compute(inputs)
+
+    damage, health = outputs["enemy_damage"], outputs["enemy_health"]
+    no_rule = np.isnan(damage) | np.isnan(health)
+    # skfuzzy fails the whole computation if any output is empty
+    damage = np.maximum(0.1, np.where(no_rule, 1.0, damage))
+    health = np.maximum(0.1, np.where(no_rule, 1.0, health))
+    return damage, health, no_rule
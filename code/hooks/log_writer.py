@@ -0,0 +1,135 @@
+import queue
+import threading
+
+
+# what to do when the queue is full
+OVERFLOW_BLOCK = "block"  # wait up to `block_timeout` for room, then drop the record
+OVERFLOW_DROP_NEWEST = "drop_newest"  # discard the record being submitted
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # discard the oldest queued record
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+_STOP = object()
+
+
+class LogWriterThread(threading.Thread):
+    def __init__(
+        self,
+        write,
+        flush,
+        maxsize: int = 1024,
+        overflow: str = OVERFLOW_BLOCK,
+        block_timeout: float = 1.0,
+        flush_interval: float = 5.0,
+    ):
+        """
+        Dedicated thread that drains a bounded queue of log records.
+
+        `write(record)` is called on this thread for every record and `flush()`
+        whenever the queue has been idle for `flush_interval` seconds, so the
+        game thread never touches the disk.
+        """
+        super().__init__(name="LogWriterThread", daemon=True)
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}"
+            )
+        self.write = write
+        self.flush = flush
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.flush_interval = flush_interval
+        #
+        self.lock = threading.Lock()
+        self.num_submitted = 0
+        self.num_written = 0
+        self.num_dropped = 0
+        self.num_errors = 0
+        self.max_depth = 0
+        #
+        self.is_closed = False
+
+    def submit(self, record):
+        """Queue a record from the game thread. Returns False if it was dropped."""
+        if self.is_closed:
+            return False
+
+        try:
+            if self.overflow == OVERFLOW_BLOCK:
+                self.queue.put(record, timeout=self.block_timeout)
+            elif self.overflow == OVERFLOW_DROP_NEWEST:
+                self.queue.put_nowait(record)
+            else:
+                self.put_drop_oldest(record)
+        except queue.Full:
+            with self.lock:
+                self.num_dropped += 1
+            return False
+
+        with self.lock:
+            self.num_submitted += 1
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def put_drop_oldest(self, record):
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return None
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                with self.lock:
+                    self.num_dropped += 1
+
+    def run(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.safe_call(self.flush)
+                continue
+
+            if record is _STOP:
+                break
+            if self.safe_call(self.write, record):
+                with self.lock:
+                    self.num_written += 1
+        #
+        self.safe_call(self.flush)
+
+    def safe_call(self, func, *args):
+        # a failing disk must not kill the writer and back up the game thread
+        try:
+            func(*args)
+            return True
+        except Exception as e:
+            with self.lock:
+                self.num_errors += 1
+            print(f"LogWriterThread: {e}")
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Write out everything still queued and stop the thread."""
+        if self.is_closed:
+            return None
+
+        self.is_closed = True
+        if self.is_alive():
+            self.queue.put(_STOP)
+            self.join(timeout)
+
+    def get_stats(self):
+        """Queue-depth and throughput counters."""
+        with self.lock:
+            return {
+                "depth": self.queue.qsize(),
+                "max_depth": self.max_depth,
+                "capacity": self.queue.maxsize,
+                "submitted": self.num_submitted,
+                "written": self.num_written,
+                "dropped": self.num_dropped,
+                "errors": self.num_errors,
+            }
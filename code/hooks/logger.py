@@ -1,39 +1,131 @@
+import atexit
 import logging
 import os
-import glob
+import threading
+import time
+from hooks.event_log import EventLogWriter, EventType
+from hooks.log_writer import LogWriterThread, OVERFLOW_BLOCK
 
 
 class GameLogger:
-    def __init__(self, directory: str = "logs", base_filename: str = "game"):
+    def __init__(
+        self,
+        directory: str = "logs",
+        base_filename: str = "game",
+        text_log: bool = True,
+        flush_interval: float = 5.0,
+        queue_size: int = 1024,
+        overflow: str = OVERFLOW_BLOCK,
+    ):
         """
         Initialize the GameLogger.
-        Automatically determines the next participant number based on existing log files
-        in `directory` following the pattern `{base_filename}_participant_*.log`,
-        then creates a new log file for that participant and logs the turn start.
+        Nothing is touched on disk until `open()`, which is called on the first
+        logged event or when `current_participant` is first read. It atomically
+        allocates the next participant number and creates the binary event log
+        `{base_filename}_participant_N.evt` in `directory`.
+        When `text_log` is set, the human-readable `.log` view is written as well.
+        Records are handed to a background writer thread through a bounded queue
+        of `queue_size` entries; `overflow` selects what happens when it is full.
+        Logs the turn start when opened.
         """
-        # Determine existing participant files
-        pattern = os.path.join(directory, f"{base_filename}_participant_*.log")
-        existing = glob.glob(pattern)
-        # Next participant number is count + 1
-        self.current_participant = len(existing) + 1
-        # Create filename for this participant
-        filename = os.path.join(
-            directory, f"{base_filename}_participant_{self.current_participant}.log"
-        )
-        # Configure logger
-        logging.basicConfig(
-            filename=filename,
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        self.logger = logging.getLogger(f"GameLogger_P{self.current_participant}")
+        self.directory = directory
+        self.base_filename = base_filename
+        self.text_log = text_log
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.overflow = overflow
+        #
+        self.event_log = None
+        self.logger = None
+        self.writer = None
+        self.participant = None
+        # the telemetry writer thread may ask for the participant number too
+        self.open_lock = threading.Lock()
+        # queued records must reach the disk even on sys.exit()
+        atexit.register(self.close)
+
+    @property
+    def current_participant(self):
+        self.open()
+        return self.participant
+
+    def open(self):
+        if self.participant is not None:
+            return None
+
+        with self.open_lock:
+            if self.participant is not None:
+                return None
+
+            self.event_log = EventLogWriter(
+                directory=self.directory,
+                base_filename=self.base_filename,
+                flush_interval=self.flush_interval,
+            )
+            participant = self.event_log.participant
+            #
+            if self.text_log:
+                # Create filename for this participant
+                filename = os.path.join(
+                    self.directory,
+                    f"{self.base_filename}_participant_{participant}.log",
+                )
+                # Configure logger
+                logging.basicConfig(
+                    filename=filename,
+                    level=logging.INFO,
+                    format="%(asctime)s - %(levelname)s - %(message)s",
+                    datefmt="%Y-%m-%d %H:%M:%S",
+                )
+                self.logger = logging.getLogger(f"GameLogger_P{participant}")
+            #
+            self.writer = LogWriterThread(
+                write=self.write_record,
+                flush=self.event_log.flush,
+                maxsize=self.queue_size,
+                overflow=self.overflow,
+                flush_interval=self.flush_interval,
+            )
+            self.writer.start()
+            self.participant = participant
         # Log the start of this participant's turn
         self.log_turn_start()
 
+    def submit(self, event: EventType, message: str, *metrics):
+        """Queue an event for the writer thread (called on the game thread)."""
+        self.open()
+        # stamped now: the writer may get to it much later
+        self.writer.submit((event, message, metrics, time.time()))
+
+    def write_record(self, record):
+        """Write one queued event (called on the writer thread)."""
+        event, message, metrics, wall_time = record
+        self.event_log.write(event, *metrics, wall_time=wall_time)
+        if self.logger is not None and self.logger.isEnabledFor(logging.INFO):
+            entry = self.logger.makeRecord(
+                self.logger.name, logging.INFO, __file__, 0, message, None, None
+            )
+            # asctime of the text view from the event time too
+            entry.created = wall_time
+            entry.msecs = (wall_time - int(wall_time)) * 1000
+            self.logger.handle(entry)
+
+    def close(self):
+        """Drain the queue, then flush and close the event log."""
+        if self.writer is None:
+            return None
+        self.writer.close()
+        self.event_log.close()
+
+    def get_queue_stats(self):
+        return self.writer.get_stats() if self.writer is not None else {}
+
     def log_turn_start(self):
         """Log the start of the current participant's turn."""
-        self.logger.info(f"Event: TurnStart | Participant: {self.current_participant}")
+        self.submit(
+            EventType.TURN_START,
+            f"Event: TurnStart | Participant: {self.current_participant}",
+        )
 
     def log_death(
         self,
@@ -44,10 +136,16 @@ class GameLogger:
         damage_mult: float,
     ):
         """Log a death event for the current participant with game metrics."""
-        self.logger.info(
+        self.submit(
+            EventType.DEATH,
             f"Event: Death | Participant: {self.current_participant} | "
             f"Health: {health} | Deaths: {deaths} | TimeTaken: {time_taken} | "
-            f"Current HealthMult: {health_mult} | Current DamageMult: {damage_mult}"
+            f"Current HealthMult: {health_mult} | Current DamageMult: {damage_mult}",
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
         )
 
     def log_level_complete(
@@ -59,14 +157,18 @@ class GameLogger:
         damage_mult: float,
     ):
         """Log a level completion event for the current participant."""
-        self.logger.info(
+        self.submit(
+            EventType.LEVEL_COMPLETE,
             f"Event: LevelComplete | Participant: {self.current_participant} | "
             f"Health: {health} | Deaths: {deaths} | TimeTaken: {time_taken} | "
-            f"Current HealthMult: {health_mult} | Current DamageMult: {damage_mult}"
+            f"Current HealthMult: {health_mult} | Current DamageMult: {damage_mult}",
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
         )
 
-
-    
     def log_open_door(
         self,
         health: float,
@@ -75,20 +177,54 @@ class GameLogger:
         health_mult: float,
         damage_mult: float,
     ):
-        self.logger.info(
+        self.submit(
+            EventType.DOOR_INTERACTED,
             f"Event: DoorInteracted | Participant: {self.current_participant} | "
             f"Health: {health} | Deaths: {deaths} | TimeTaken: {time_taken} | "
-            f"New HealthMult: {health_mult} | New DamageMult: {damage_mult}"
+            f"New HealthMult: {health_mult} | New DamageMult: {damage_mult}",
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
+        )
+
+    def log_difficulty_update(
+        self,
+        health: float,
+        deaths: int,
+        time_taken: float,
+        health_mult: float,
+        damage_mult: float,
+    ):
+        """Log a continuous DDA re-evaluation; `health` is the window mean."""
+        self.submit(
+            EventType.DIFFICULTY_UPDATE,
+            f"Event: DifficultyUpdate | Participant: {self.current_participant} | "
+            f"Health: {health} | Deaths: {deaths} | TimeTaken: {time_taken} | "
+            f"New HealthMult: {health_mult} | New DamageMult: {damage_mult}",
+            health,
+            deaths,
+            time_taken,
+            health_mult,
+            damage_mult,
         )
 
     def log_total_duration(self, total_duration: float):
         """Log the total duration of the game session for the current participant."""
-        self.logger.info(f"Total_duration: {total_duration}")
+        self.submit(
+            EventType.TOTAL_DURATION,
+            f"Total_duration: {total_duration}",
+            0.0,
+            0,
+            total_duration,
+        )
 
 
 # Example usage:
 # logger = GameLogger(directory='logs', base_filename='game')
-# # Automatically creates 'logs/game_participant_1.log' or next available
+# # Automatically creates 'logs/game_participant_1.evt' (and the '.log' text view)
+# # or the next available participant number
 # logger.log_death(level=1, health=100, deaths=1, time_taken=35.7,
 #                  health_mult=80, damage_mult=15)
 # logger.log_level_complete(level=1, health=75, deaths=1,
@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self):
+        """
+        Wall time of each startup stage, up to the first rendered frame.
+
+        Import this module first: the time until the first `mark` is the
+        import stage. Stages recorded after `finish` are ignored, so code
+        that also runs on later levels can stay instrumented.
+        """
+        self.start_time = self.last_time = time.perf_counter()
+        self.stages = []  # (name, sec)
+        self.is_finished = False
+
+    def mark(self, name):
+        """Close a stage that began at the previous mark or stage."""
+        now = time.perf_counter()
+        if not self.is_finished:
+            self.stages.append((name, now - self.last_time))
+        self.last_time = now
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            if not self.is_finished:
+                self.stages.append((name, now - start))
+            self.last_time = now
+
+    def finish(self):
+        """Called after the first frame; returns the time to first frame."""
+        if not self.is_finished:
+            self.mark("first frame")
+            self.is_finished = True
+        return self.last_time - self.start_time
+
+    def report(self):
+        total = self.last_time - self.start_time
+        print(f"Startup: {total * 1000:.1f} ms to first frame")
+        for name, sec in self.stages:
+            print(f"  {name:<16} {sec * 1000:>9.1f} ms  {sec / total:>6.1%}")
+
+
+startup_timer = StartupTimer()
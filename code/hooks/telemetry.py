@@ -0,0 +1,258 @@
+import glob
+import math
+import os
+
+import numpy as np
+
+from hooks.log_writer import LogWriterThread
+
+
+# one row per game tick
+TELEMETRY_DTYPE = np.dtype(
+    [
+        ("time", "<f8"),  # sec
+        ("pos_x", "<f4"),
+        ("pos_z", "<f4"),
+        ("health", "<f4"),
+        ("ammo", "<u2"),
+        ("weapon", "u1"),
+        ("shots", "u1"),  # shots fired since the previous tick
+        ("hits", "u1"),  # npc hits since the previous tick
+        ("kills", "u1"),  # npc kills since the previous tick
+        ("engaged", "<u2"),  # npc currently engaged with the player
+        ("damage_taken", "<f4"),  # health lost since the previous tick
+        ("distance", "<f4"),  # distance travelled since the previous tick
+        ("ttk", "<f4"),  # summed time-to-kill of this tick's kills
+    ]
+)
+
+# larger position jumps between ticks are respawns or level changes
+MAX_STEP_DIST = 1.0
+
+
+class TelemetryRecorder:
+    def __init__(
+        self,
+        directory: str = "logs",
+        base_filename: str = "game",
+        participant=0,
+        capacity: int = 16384,
+        chunk_size: int = 4096,
+        window: float = 60.0,
+    ):
+        """
+        Per-tick player telemetry for DDA feature extraction.
+
+        Samples go into a preallocated ring buffer of `capacity` rows. Every
+        `chunk_size` rows the finished segment is handed to a writer thread and
+        saved as `{base_filename}_participant_N_telemetry_K.npy`. Running sums
+        over the last `window` seconds are updated in O(1) per sample.
+        `participant` may be a callable, resolved when the first chunk is saved.
+        """
+        if capacity % chunk_size:
+            raise ValueError("Telemetry capacity must be a multiple of chunk_size")
+
+        self.directory = directory
+        self.base_filename = base_filename
+        self.participant = participant
+        self.window = window
+        #
+        self.buffer = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.head = 0  # next row to write
+        self.tail = 0  # oldest row inside the window
+        self.num_in_window = 0
+        self.num_samples = 0
+        self.num_chunks = 0
+
+        # window sums
+        self.sum_shots = 0
+        self.sum_hits = 0
+        self.sum_kills = 0
+        self.sum_damage = 0.0
+        self.sum_distance = 0.0
+        self.sum_ttk = 0.0
+        self.sum_health = 0.0
+
+        # session totals
+        self.total_distance = 0.0
+        self.total_shots = 0
+        self.total_hits = 0
+        self.total_kills = 0
+
+        # events since the previous sample
+        self.pending_shots = 0
+        self.pending_hits = 0
+        self.pending_kills = 0
+        self.pending_ttk = 0.0
+        #
+        self.engagements = {}  # id(npc) -> engagement start time
+        self.last_pos = None
+        self.last_health = None
+        self.last_time = 0.0
+
+        self.writer = LogWriterThread(
+            write=self.write_chunk, flush=lambda: None, flush_interval=window
+        )
+        self.writer.start()
+
+    # -------- game hooks -------- #
+    def on_shot(self):
+        self.pending_shots += 1
+
+    def on_hit(self):
+        self.pending_hits += 1
+
+    def on_npc_engaged(self, npc):
+        self.engagements.setdefault(id(npc), self.last_time)
+
+    def on_npc_killed(self, npc):
+        start_time = self.engagements.pop(id(npc), self.last_time)
+        self.pending_kills += 1
+        self.pending_ttk += self.last_time - start_time
+
+    def on_level_start(self):
+        self.engagements.clear()
+        self.last_pos = None
+        self.last_health = None
+
+    # ---------------------------- #
+    def sample(self, player, time_sec):
+        x, z = player.position.x, player.position.z
+        health = player.health
+
+        distance = 0.0
+        if self.last_pos is not None:
+            distance = math.hypot(x - self.last_pos[0], z - self.last_pos[1])
+            if distance > MAX_STEP_DIST:
+                distance = 0.0
+        damage = 0.0
+        if self.last_health is not None and health < self.last_health:
+            damage = self.last_health - health
+
+        self.last_pos = x, z
+        self.last_health = health
+        self.last_time = time_sec
+
+        # make room: the window never extends past the ring buffer
+        if self.num_in_window == self.capacity:
+            self.evict()
+
+        self.buffer[self.head] = (
+            time_sec,
+            x,
+            z,
+            health,
+            player.ammo,
+            player.weapon_id,
+            self.pending_shots,
+            self.pending_hits,
+            self.pending_kills,
+            len(self.engagements),
+            damage,
+            distance,
+            self.pending_ttk,
+        )
+        self.sum_shots += self.pending_shots
+        self.sum_hits += self.pending_hits
+        self.sum_kills += self.pending_kills
+        self.sum_damage += damage
+        self.sum_distance += distance
+        self.sum_ttk += self.pending_ttk
+        self.sum_health += health
+        #
+        self.total_distance += distance
+        self.total_shots += self.pending_shots
+        self.total_hits += self.pending_hits
+        self.total_kills += self.pending_kills
+        #
+        self.pending_shots = self.pending_hits = self.pending_kills = 0
+        self.pending_ttk = 0.0
+
+        self.head = (self.head + 1) % self.capacity
+        self.num_in_window += 1
+        self.num_samples += 1
+
+        while self.buffer["time"][self.tail] < time_sec - self.window:
+            self.evict()
+
+        if self.num_samples % self.chunk_size == 0:
+            self.spill(self.chunk_size)
+
+    def evict(self):
+        row = self.buffer[self.tail]
+        self.sum_shots -= int(row["shots"])
+        self.sum_hits -= int(row["hits"])
+        self.sum_kills -= int(row["kills"])
+        self.sum_damage -= float(row["damage_taken"])
+        self.sum_distance -= float(row["distance"])
+        self.sum_ttk -= float(row["ttk"])
+        self.sum_health -= float(row["health"])
+        #
+        self.tail = (self.tail + 1) % self.capacity
+        self.num_in_window -= 1
+
+    def get_window_duration(self):
+        if self.num_in_window < 2:
+            return 0.0
+        last = (self.head - 1) % self.capacity
+        return float(self.buffer["time"][last] - self.buffer["time"][self.tail])
+
+    def get_features(self):
+        """DDA features over the last `window` seconds."""
+        duration = self.get_window_duration()
+        return {
+            "window_sec": duration,
+            "accuracy": self.sum_hits / self.sum_shots if self.sum_shots else 0.0,
+            "damage_per_min": self.sum_damage / duration * 60 if duration else 0.0,
+            "time_to_kill": self.sum_ttk / self.sum_kills if self.sum_kills else 0.0,
+            "kills": self.sum_kills,
+            "mean_health": (
+                self.sum_health / self.num_in_window if self.num_in_window else 0.0
+            ),
+            "distance": self.sum_distance,
+            "total_distance": self.total_distance,
+        }
+
+    # -------- disk spill -------- #
+    def spill(self, num_rows):
+        # capacity is a multiple of chunk_size, so a chunk never wraps around
+        end = self.head or self.capacity
+        chunk = self.buffer[end - num_rows : end].copy()
+        self.writer.submit((self.num_chunks, chunk))
+        self.num_chunks += 1
+
+    def write_chunk(self, record):
+        index, chunk = record
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(self.get_chunk_path(index), chunk)
+
+    def get_chunk_path(self, index):
+        if callable(self.participant):
+            self.participant = self.participant()
+        return os.path.join(
+            self.directory,
+            f"{self.base_filename}_participant_{self.participant}"
+            f"_telemetry_{index:04d}.npy",
+        )
+
+    def close(self):
+        """Spill the unfinished chunk and stop the writer thread."""
+        if self.writer.is_closed:
+            return None
+
+        if num_rows := self.num_samples % self.chunk_size:
+            self.spill(num_rows)
+        self.writer.close()
+
+
+def load_telemetry(directory: str, participant: int, base_filename: str = "game"):
+    """Concatenate all spilled telemetry chunks of one participant."""
+    pattern = os.path.join(
+        directory, f"{base_filename}_participant_{participant}_telemetry_*.npy"
+    )
+    chunks = [np.load(path) for path in sorted(glob.glob(pattern))]
+    if not chunks:
+        return np.zeros(0, dtype=TELEMETRY_DTYPE)
+    return np.concatenate(chunks)
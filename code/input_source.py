@@ -0,0 +1,281 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pygame as pg
+from settings import KEYS
+
+TRACE_VERSION = 1
+
+# only these events change the game state
+RECORDED_EVENTS = (
+    pg.QUIT,
+    pg.KEYDOWN,
+    pg.MOUSEBUTTONDOWN,
+    pg.MOUSEWHEEL,
+    pg.USEREVENT + 0,  # animation pulse
+    pg.USEREVENT + 1,  # sound pulse
+)
+
+# per-frame input
+FRAME_DTYPE = np.dtype(
+    [
+        ("ticks", "<u4"),  # game clock, ms
+        ("delta_time", "<u2"),  # ms
+        ("mouse_dx", "<i2"),
+        ("mouse_dy", "<i2"),
+        ("keys", "<u2"),  # bitmask over KEYS
+    ]
+)
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("frame", "<u4"),
+        ("type", "<u4"),
+        ("code", "<i4"),  # key, mouse button or wheel offset
+    ]
+)
+
+KEY_CODES = tuple(KEYS.values())
+
+
+def get_event_code(event):
+    if event.type == pg.KEYDOWN:
+        return event.key
+    if event.type == pg.MOUSEBUTTONDOWN:
+        return event.button
+    if event.type == pg.MOUSEWHEEL:
+        return event.y
+    return 0
+
+
+def make_event(event_type, code):
+    if event_type == pg.KEYDOWN:
+        return pg.event.Event(event_type, key=code)
+    if event_type == pg.MOUSEBUTTONDOWN:
+        return pg.event.Event(event_type, button=code)
+    if event_type == pg.MOUSEWHEEL:
+        return pg.event.Event(event_type, x=0, y=code)
+    return pg.event.Event(event_type)
+
+
+def get_state_digest(app):
+    """Short summary of the simulation state, used to verify a replay."""
+    eng = app.engine
+    player = eng.player
+    npc_health = sorted(
+        (npc.tile_pos, round(float(npc.health), 3)) for npc in eng.level_map.npc_list
+    )
+    state = (
+        eng.player_attribs.num_level,
+        round(player.position.x, 3),
+        round(player.position.z, 3),
+        round(float(player.health), 3),
+        player.ammo,
+        player.weapon_id,
+        len(eng.level_map.item_map),
+        tuple(npc_health),
+    )
+    return hashlib.sha1(repr(state).encode()).hexdigest()[:16]
+
+
+class KeyState:
+    """Replayed `pg.key.get_pressed()` for the control keys."""
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        return bool(self.mask >> KEY_CODES.index(key) & 1)
+
+
+class LiveInput:
+    def __init__(self):
+        # None seeds the game RNG from the OS
+        self.seed = None
+        self.events = []
+        self.mouse_rel = (0, 0)
+        self.key_state = None
+        self.ticks = pg.time.get_ticks()
+        self.app = None
+
+    def bind(self, app):
+        self.app = app
+
+    def start(self):
+        """Start the game clock. Called right before the main loop."""
+        self.ticks = pg.time.get_ticks()
+
+    def poll(self):
+        """Sample this frame's input. Called once at the start of each frame."""
+        self.events = pg.event.get()
+        self.mouse_rel = pg.mouse.get_rel()
+        self.key_state = pg.key.get_pressed()
+        self.ticks = pg.time.get_ticks()
+
+    def get_events(self):
+        return self.events
+
+    def get_mouse_rel(self):
+        return self.mouse_rel
+
+    def get_pressed(self):
+        return self.key_state
+
+    def get_ticks(self):
+        return self.ticks
+
+    def tick(self, clock):
+        return clock.tick()
+
+    def wait(self, milliseconds):
+        pg.time.wait(milliseconds)
+
+    def close(self):
+        pass
+
+
+class RecordingInput(LiveInput):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.seed = int.from_bytes(os.urandom(8), "little")
+        self.start_ticks = self.ticks
+        self.frames, self.recorded_events = [], []
+        self.is_closed = False
+
+    def start(self):
+        super().start()
+        self.start_ticks = self.ticks
+
+    def poll(self):
+        super().poll()
+        keys = 0
+        for i, key in enumerate(KEY_CODES):
+            if self.key_state[key]:
+                keys |= 1 << i
+        # delta time is filled in by tick() at the end of the frame
+        self.frames.append([self.ticks, 0, *self.mouse_rel, keys])
+        #
+        frame = len(self.frames) - 1
+        for event in self.events:
+            if event.type in RECORDED_EVENTS:
+                self.recorded_events.append((frame, event.type, get_event_code(event)))
+
+    def tick(self, clock):
+        delta_time = clock.tick()
+        if self.frames:
+            self.frames[-1][1] = delta_time
+        return delta_time
+
+    def close(self):
+        if self.is_closed:
+            return None
+
+        self.is_closed = True
+        save_trace(
+            self.path,
+            seed=self.seed,
+            start_ticks=self.start_ticks,
+            frames=np.array([tuple(frame) for frame in self.frames], dtype=FRAME_DTYPE),
+            events=np.array(self.recorded_events, dtype=EVENT_DTYPE),
+            digest=get_state_digest(self.app) if self.app else "",
+        )
+        print(f"Recorded {len(self.frames)} frames to {self.path}")
+
+
+class ReplayInput(LiveInput):
+    def __init__(self, path, skip_waits=False):
+        super().__init__()
+        trace = load_trace(path)
+        self.seed = trace["seed"]
+        self.ticks = trace["start_ticks"]
+        self.frames = trace["frames"]
+        self.digest = trace["digest"]
+        self.skip_waits = skip_waits
+        #
+        self.events_by_frame = {}
+        for frame, event_type, code in trace["events"].tolist():
+            self.events_by_frame.setdefault(frame, []).append(
+                make_event(event_type, code)
+            )
+        #
+        self.frame = -1
+        self.frame_times = []
+        self.last_frame_time = None
+
+    def start(self):
+        # the clock starts where the recording started
+        pass
+
+    def poll(self):
+        # keep the window responsive, but only let the trace drive the game;
+        # closing the window, Esc and Ctrl+C (a QUIT from SDL) still stop it
+        stops = [
+            event
+            for event in pg.event.get((pg.QUIT, pg.KEYDOWN))
+            if event.type == pg.QUIT or event.key == pg.K_ESCAPE
+        ]
+        pg.event.clear()
+
+        self.frame += 1
+        if self.frame >= len(self.frames):
+            self.events = [pg.event.Event(pg.QUIT)]
+            self.mouse_rel, self.key_state = (0, 0), KeyState(0)
+            return None
+
+        ticks, _, mouse_dx, mouse_dy, keys = self.frames[self.frame].tolist()
+        self.ticks = ticks
+        self.mouse_rel = mouse_dx, mouse_dy
+        self.key_state = KeyState(keys)
+        self.events = self.events_by_frame.get(self.frame, []) + stops
+
+    def tick(self, clock):
+        clock.tick()
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            self.frame_times.append((now - self.last_frame_time) * 1000)
+        self.last_frame_time = now
+        #
+        if 0 <= self.frame < len(self.frames):
+            return int(self.frames[self.frame]["delta_time"])
+        return 0
+
+    def wait(self, milliseconds):
+        if not self.skip_waits:
+            pg.time.wait(milliseconds)
+
+    def close(self):
+        if self.app is None or not self.digest:
+            return None
+
+        digest = get_state_digest(self.app)
+        result = "matches" if digest == self.digest else "DIVERGED from"
+        print(f"Replay state {digest} {result} recorded state {self.digest}")
+
+
+def save_trace(path, seed, start_ticks, frames, events, digest):
+    header = np.array(
+        [(TRACE_VERSION, seed, start_ticks)],
+        dtype=[("version", "<u2"), ("seed", "<u8"), ("start_ticks", "<u4")],
+    )
+    with open(path, "wb") as file:
+        np.savez_compressed(
+            file, header=header, frames=frames, events=events, digest=np.array(digest)
+        )
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        header = data["header"][0]
+        if header["version"] != TRACE_VERSION:
+            raise ValueError(
+                f"{path} has trace version {header['version']}, expected {TRACE_VERSION}"
+            )
+        return {
+            "seed": int(header["seed"]),
+            "start_ticks": int(header["start_ticks"]),
+            "frames": data["frames"],
+            "events": data["events"],
+            "digest": str(data["digest"]),
+        }
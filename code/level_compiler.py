@@ -0,0 +1,78 @@
+"""
+Compiles Tiled levels to the binary format LevelData memory maps at load.
+
+A compiled level is only used while it is newer than its .tmx, so stale
+files are never loaded; recompile after editing a level to keep the fast
+path. Run from the code directory:
+    python level_compiler.py [level_1.tmx ...] [--bench] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import numpy as np
+from level_map import LevelData, get_compiled_path
+from level_generator import LEVELS_DIR
+
+
+def compile_level(tmx_file):
+    # the tile arrays are all it writes, no need for the tile maps
+    level_data = LevelData(tmx_file, use_compiled=False, is_streamed=True)
+    return level_data.save_compiled()
+
+
+def time_load(tmx_file, use_compiled, repeat):
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        level_data = LevelData(tmx_file, use_compiled, is_streamed=False)
+        times[i] = time.perf_counter() - start
+    assert level_data.source == ("compiled" if use_compiled else "tmx")
+    return float(np.median(times)) * 1000, level_data
+
+
+def bench_level(tmx_file, repeat):
+    tmx_ms, tmx_data = time_load(tmx_file, False, repeat)
+    compiled_ms, compiled_data = time_load(tmx_file, True, repeat)
+    # both loaders hand LevelMap the same maps and spawns
+    assert tmx_data.get_tile_maps() == compiled_data.get_tile_maps()
+    assert tmx_data.get_object_lists() == compiled_data.get_object_lists()
+    assert tmx_data.player_pos == compiled_data.player_pos
+    print(
+        f"{tmx_file:<24} {tmx_ms:>8.2f} {compiled_ms:>12.2f} "
+        f"{tmx_ms / compiled_ms:>7.1f}x "
+        f"{os.path.getsize(tmx_data.tmx_path) / 1024:>7.1f} "
+        f"{os.path.getsize(get_compiled_path(tmx_file)) / 1024:>7.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "levels", nargs="*", help="tmx files in resources/levels, default: all"
+    )
+    parser.add_argument(
+        "--bench", action="store_true", help="time TMX against compiled loads"
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="loads per median")
+    args = parser.parse_args()
+
+    tmx_files = args.levels or sorted(
+        os.path.basename(path) for path in glob.glob(os.path.join(LEVELS_DIR, "*.tmx"))
+    )
+    for tmx_file in tmx_files:
+        print(f"{tmx_file} -> {compile_level(tmx_file)}")
+
+    if args.bench:
+        print(
+            f"{'level':<24} {'tmx ms':>8} {'compiled ms':>12} {'speedup':>8} "
+            f"{'tmx kB':>7} {'lvl kB':>7}"
+        )
+        for tmx_file in tmx_files:
+            bench_level(tmx_file, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
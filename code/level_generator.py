@@ -0,0 +1,416 @@
+"""
+Seeded generator of large Tiled levels for stress tests and benchmarks.
+
+The written .tmx has the layers LevelMap.parse_level reads: walls, floors,
+ceilings, doors, items, npc and player. Run from the code directory:
+    python level_generator.py [--size 256] [--rooms N] [--npcs N] [--items N]
+        [--door-density D] [--seed S] [--compression zlib|gzip|zstd]
+        [--chunk-size 16] [-o resources/levels/generated/x.tmx]
+"""
+
+import argparse
+import base64
+import gzip
+import os
+import sys
+import zlib
+import numpy as np
+from settings import NPC_SETTINGS, TEX_SIZE
+from texture_id import ID
+
+LEVELS_DIR = os.path.join("resources", "levels")
+GENERATED_DIR = os.path.join(LEVELS_DIR, "generated")
+
+PLAIN_WALLS = (ID.WALL_STONE_WHITE, ID.WALL_STONE_BLUE, ID.WALL_BRICK, ID.WALL_WOOD)
+DECORATED_WALLS = {
+    ID.WALL_STONE_WHITE: ID.WALL_STONE_WHITE_FLAG,
+    ID.WALL_STONE_BLUE: ID.WALL_STONE_WHITE_FLAG,
+    ID.WALL_BRICK: ID.WALL_BRICK_EAGLE,
+    ID.WALL_WOOD: ID.WALL_WOOD_1,
+}
+# random items and how often they are picked, the key is placed separately
+ITEM_WEIGHTS = {
+    ID.AMMO: 0.45,
+    ID.MED_KIT: 0.45,
+    ID.PISTOL_ICON: 0.05,
+    ID.RIFLE_ICON: 0.05,
+}
+
+WALL_BLOCK_SIZE = 16  # tiles sharing one wall texture, keeps greedy meshing honest
+DECORATION_RATE = 0.05  # walls with a flag or an eagle
+LAMP_RATE = 0.03  # ceilings with a lamp
+MIN_NPC_DIST = 3  # tiles between the player start and any NPC
+MAX_LAYOUTS = 100  # room layouts tried for a corridor tile to put the key door on
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class GeneratedLevel:
+    def __init__(self, width, depth):
+        """
+        A generated level. Tile arrays are indexed [z, x] like the rows of a
+        TMX layer and hold texture ids, -1 for no tile; objects are
+        (tex_id, x, z) tile positions.
+        """
+        self.width, self.depth = width, depth
+        self.is_wall = np.ones((depth, width), dtype=bool)
+        self.wall_tex = np.full((depth, width), -1, dtype=np.int32)
+        self.floor_tex = np.full((depth, width), ID.FLAT_STONE, dtype=np.int32)
+        self.ceil_tex = np.full((depth, width), ID.FLAT_STONE, dtype=np.int32)
+        #
+        self.doors, self.items, self.npcs = [], [], []
+        self.player_pos = (0.5, 0.5)  # in tiles
+
+    def get_open_tiles(self):
+        """(x, z) of every tile that is not a wall."""
+        z, x = np.nonzero(~self.is_wall)
+        return np.stack([x, z], axis=1)
+
+    def get_tile_maps(self):
+        """wall, floor and ceiling maps as LevelMap builds them."""
+        tile_maps = []
+        for tex in (self.wall_tex, self.floor_tex, self.ceil_tex):
+            z, x = np.nonzero(tex >= 0)
+            tile_maps.append(dict(zip(zip(x.tolist(), z.tolist()), tex[z, x].tolist())))
+        return tile_maps
+
+
+def generate_level(
+    width,
+    depth=None,
+    seed=0,
+    num_rooms=None,
+    door_density=0.3,
+    num_npcs=None,
+    num_items=None,
+):
+    """
+    Random rectangular rooms joined by one-tile corridors. `door_density` is
+    the share of corridor tiles between two walls that get a door; one of
+    them, the furthest from the player, is the key door ending the level,
+    placed at any density. Unset counts scale with the map area.
+    """
+    depth = depth or width
+    if min(width, depth) < 8:
+        raise ValueError(f"level of {width}x{depth} tiles is too small")
+    area = width * depth
+    num_rooms = num_rooms or max(2, area // 400)
+    num_npcs = area // 64 if num_npcs is None else num_npcs
+    num_items = area // 128 if num_items is None else num_items
+
+    rng = np.random.default_rng(seed)
+    level = GeneratedLevel(width, depth)
+
+    # rooms overlapping every corridor leave no tile for the key door, they
+    # are drawn again then; maps too small for any such corridor get a dead
+    # end dug for it
+    for layout in range(2 * MAX_LAYOUTS):
+        is_wall, centers = carve_rooms(rng, width, depth, num_rooms)
+        px, pz = centers[0]
+        key_pos = tuple(centers[-1])
+        gaps = get_gaps(is_wall, (px, pz), key_pos)
+        if (
+            not len(gaps)
+            and layout >= MAX_LAYOUTS
+            and carve_dead_end(is_wall, (px, pz))
+        ):
+            gaps = get_gaps(is_wall, (px, pz), key_pos)
+        if len(gaps):
+            break
+    else:
+        raise ValueError(f"no tile for the key door on {width}x{depth} tiles")
+    level.is_wall = is_wall
+
+    # walls: one plain texture per block, a few decorated
+    blocks = rng.choice(
+        PLAIN_WALLS, (-(-depth // WALL_BLOCK_SIZE), -(-width // WALL_BLOCK_SIZE))
+    )
+    wall_tex = np.kron(blocks, np.ones((WALL_BLOCK_SIZE,) * 2, dtype=blocks.dtype))
+    wall_tex = wall_tex[:depth, :width]
+    is_decorated = rng.random((depth, width)) < DECORATION_RATE
+    for plain, decorated in DECORATED_WALLS.items():
+        wall_tex[is_decorated & (wall_tex == plain)] = decorated
+    level.wall_tex[is_wall] = wall_tex[is_wall]
+    level.ceil_tex[(rng.random((depth, width)) < LAMP_RATE) & ~is_wall] = (
+        ID.FLAT_STONE_LAMP
+    )
+
+    # player in the first room, the key in the last one
+    level.player_pos = (px + 0.5, pz + 0.5)
+    level.items.append((ID.KEY, *key_pos))
+
+    door_map = {}
+    for x, z in gaps[rng.permutation(len(gaps))[: int(len(gaps) * door_density)]]:
+        # no doors next to each other
+        if not any((x + dx, z + dz) in door_map for dx, dz in NEIGHBOURS):
+            door_map[(x, z)] = ID.DOOR
+    # without it the level cannot be finished, whatever the door density
+    doors = np.array(list(door_map)) if door_map else gaps
+    x, z = doors[np.argmax(np.hypot(*(doors - (px, pz)).T))]
+    door_map[(int(x), int(z))] = ID.KEY_DOOR
+    level.doors = [(tex_id, int(x), int(z)) for (x, z), tex_id in door_map.items()]
+    for _, x, z in level.doors:
+        level.floor_tex[z, x] = level.ceil_tex[z, x] = ID.FLAT_DOOR
+
+    # npcs and items on distinct free tiles
+    is_free = ~is_wall
+    for x, z in [(px, pz), key_pos, *door_map]:
+        is_free[z, x] = False
+    near_player = np.zeros_like(is_free)
+    near_player[
+        max(pz - MIN_NPC_DIST, 0) : pz + MIN_NPC_DIST + 1,
+        max(px - MIN_NPC_DIST, 0) : px + MIN_NPC_DIST + 1,
+    ] = True
+    npc_tiles = np.argwhere(is_free & ~near_player)[:, ::-1]
+    if num_npcs > len(npc_tiles):
+        raise ValueError(f"{num_npcs} NPCs do not fit on {len(npc_tiles)} free tiles")
+    npc_tiles = npc_tiles[rng.choice(len(npc_tiles), num_npcs, replace=False)]
+    npc_ids = rng.choice(list(NPC_SETTINGS), num_npcs)
+    level.npcs = [(int(i), int(x), int(z)) for i, (x, z) in zip(npc_ids, npc_tiles)]
+
+    is_free[npc_tiles[:, 1], npc_tiles[:, 0]] = False
+    item_tiles = np.argwhere(is_free)[:, ::-1]
+    if num_items > len(item_tiles):
+        raise ValueError(
+            f"{num_items} items do not fit on {len(item_tiles)} free tiles"
+        )
+    item_tiles = item_tiles[rng.choice(len(item_tiles), num_items, replace=False)]
+    item_ids = rng.choice(list(ITEM_WEIGHTS), num_items, p=list(ITEM_WEIGHTS.values()))
+    level.items += [(int(i), int(x), int(z)) for i, (x, z) in zip(item_ids, item_tiles)]
+    return level
+
+
+def carve_rooms(rng, width, depth, num_rooms):
+    """
+    Wall map of random rooms joined by corridors, and the room centers in
+    corridor order.
+    """
+    is_wall = np.ones((depth, width), dtype=bool)
+    # the outer ring of tiles always stays wall
+    max_room = max(4, min(13, min(width, depth) // 3))
+    sizes = rng.integers(3, max_room, (num_rooms, 2))
+    room_x = rng.integers(1, width - 1 - sizes[:, 0])
+    room_z = rng.integers(1, depth - 1 - sizes[:, 1])
+    for x, z, (w, d) in zip(room_x, room_z, sizes):
+        is_wall[z : z + d, x : x + w] = False
+    centers = np.stack([room_x + sizes[:, 0] // 2, room_z + sizes[:, 1] // 2], axis=1)
+
+    # corridors between rooms in snake order over bands of rows,
+    # so that they stay short
+    band = centers[:, 1] // WALL_BLOCK_SIZE
+    order = np.lexsort((np.where(band % 2, -centers[:, 0], centers[:, 0]), band))
+    centers = centers[order].tolist()
+    for (x0, z0), (x1, z1) in zip(centers, centers[1:]):
+        is_wall[z0, min(x0, x1) : max(x0, x1) + 1] = False
+        is_wall[min(z0, z1) : max(z0, z1) + 1, x1] = False
+    return is_wall, centers
+
+
+def carve_dead_end(is_wall, player_pos):
+    """
+    Open a corridor of two tiles off an open tile into solid wall, the one
+    furthest from `player_pos`, so that its first tile is between two walls.
+    False if no wall is thick enough.
+    """
+    depth, width = is_wall.shape
+    padded = np.pad(is_wall, 2, constant_values=True)
+    is_inner = np.pad(np.ones((depth - 2, width - 2), dtype=bool), 3)
+
+    def shift(tiles, dx, dz):
+        # tiles[z + dz, x + dx] at [z, x]
+        return tiles[2 + dz : 2 + dz + depth, 2 + dx : 2 + dx + width]
+
+    best, best_dist = None, -1.0
+    z, x = np.indices(is_wall.shape)
+    for dx, dz in NEIGHBOURS:
+        # (x, z) becomes the corridor tile, (x + dx, z + dz) its end
+        is_start = (
+            is_wall
+            & ~shift(padded, -dx, -dz)
+            & shift(padded, dx, dz)
+            & shift(padded, dz, dx)
+            & shift(padded, -dz, -dx)
+            & shift(is_inner, dx, dz)
+        )
+        if not is_start.any():
+            continue
+        dist = np.where(is_start, np.hypot(x - player_pos[0], z - player_pos[1]), -1)
+        i = np.unravel_index(np.argmax(dist), dist.shape)
+        if dist[i] > best_dist:
+            best, best_dist = (i[1], i[0], dx, dz), dist[i]
+    if best is None:
+        return False
+    x, z, dx, dz = best
+    is_wall[z, x] = is_wall[z + dz, x + dx] = False
+    return True
+
+
+def get_gaps(is_wall, player_pos, key_pos):
+    """
+    (x, z) of the door tiles: corridor tiles between two walls facing each
+    other, other than the player and key tiles.
+    """
+    padded = np.pad(is_wall, 1, constant_values=True)
+    left, right = padded[1:-1, :-2], padded[1:-1, 2:]
+    up, down = padded[:-2, 1:-1], padded[2:, 1:-1]
+    is_gap = ~is_wall & ((left & right & ~up & ~down) | (up & down & ~left & ~right))
+    for x, z in (player_pos, key_pos):
+        is_gap[z, x] = False
+    return np.argwhere(is_gap)[:, ::-1]
+
+
+# -------- tmx -------- #
+def get_data_xml(gids, compression):
+    """The csv or, when compressed, base64 encoded gids of a layer or chunk."""
+    if compression is None:
+        rows = [",".join(map(str, row)) for row in gids.tolist()]
+        return "\n" + ",\n".join(rows) + "\n"
+    data = gids.astype("<u4").tobytes()
+    if compression == "zlib":
+        data = zlib.compress(data)
+    elif compression == "gzip":
+        data = gzip.compress(data)
+    elif compression == "zstd":
+        import zstandard
+
+        data = zstandard.ZstdCompressor().compress(data)
+    return base64.b64encode(data).decode()
+
+
+def get_layer_xml(layer_id, name, tex, width, depth, compression, chunk_size):
+    # gid 0 is no tile, the textures tileset starts at gid 1
+    gids = tex + 1
+    encoding = "csv" if compression is None else "base64"
+    attributes = f'encoding="{encoding}"'
+    if compression is not None:
+        attributes += f' compression="{compression}"'
+    if chunk_size is None:
+        data = get_data_xml(gids, compression)
+    else:
+        # an infinite map stores the chunks that have tiles
+        chunks = []
+        for z in range(0, depth, chunk_size):
+            for x in range(0, width, chunk_size):
+                chunk = np.zeros((chunk_size, chunk_size), dtype=gids.dtype)
+                tiles = gids[z : z + chunk_size, x : x + chunk_size]
+                chunk[: tiles.shape[0], : tiles.shape[1]] = tiles
+                if chunk.any():
+                    chunks.append(
+                        f'   <chunk x="{x}" y="{z}" width="{chunk_size}" '
+                        f'height="{chunk_size}">'
+                        + get_data_xml(chunk, compression)
+                        + "</chunk>\n"
+                    )
+        data = "\n" + "".join(chunks) + "  "
+    return (
+        f' <layer id="{layer_id}" name="{name}" width="{width}" height="{depth}">\n'
+        f"  <data {attributes}>" + data + "</data>\n </layer>\n"
+    )
+
+
+def write_tmx(level, path, compression=None, chunk_size=None):
+    """
+    Write the level as a Tiled map using the shared textures tileset. Tile
+    layers are csv, or base64 with "zlib", "gzip" or "zstd" `compression`;
+    with a `chunk_size` the map is an infinite one stored in chunks.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tileset = os.path.relpath(
+        os.path.join(LEVELS_DIR, "textures.tsx"), os.path.dirname(os.path.abspath(path))
+    ).replace(os.sep, "/")
+    width, depth = level.width, level.depth
+
+    next_id = 1
+    groups = []
+    px, pz = level.player_pos
+    objects = [
+        f'  <object id="{next_id}" name="PLAYER" '
+        f'x="{px * TEX_SIZE:g}" y="{pz * TEX_SIZE:g}" width="80" height="18"/>\n'
+    ]
+    groups.append(("player", objects))
+    next_id += 1
+    for name, tile_objects in (
+        ("items", level.items),
+        ("npc", level.npcs),
+        ("doors", level.doors),
+    ):
+        objects = []
+        for tex_id, x, z in tile_objects:
+            # tile objects are anchored at their bottom left corner
+            objects.append(
+                f'  <object id="{next_id}" gid="{tex_id + 1}" x="{x * TEX_SIZE}" '
+                f'y="{(z + 1) * TEX_SIZE}" width="{TEX_SIZE}" height="{TEX_SIZE}"/>\n'
+            )
+            next_id += 1
+        groups.append((name, objects))
+
+    layers = [
+        get_layer_xml(layer_id, name, tex, width, depth, compression, chunk_size)
+        for layer_id, (name, tex) in enumerate(
+            (
+                ("floors", level.floor_tex),
+                ("ceilings", level.ceil_tex),
+                ("walls", level.wall_tex),
+            ),
+            start=1,
+        )
+    ]
+    for group_id, (name, objects) in enumerate(groups, start=4):
+        layers.append(
+            f' <objectgroup id="{group_id}" name="{name}">\n'
+            + "".join(objects)
+            + " </objectgroup>\n"
+        )
+
+    with open(path, "w") as file:
+        file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<map version="1.10" tiledversion="1.10.1" orientation="orthogonal" '
+            f'renderorder="right-down" width="{width}" height="{depth}" '
+            f'tilewidth="{TEX_SIZE}" tileheight="{TEX_SIZE}" '
+            f'infinite="{int(chunk_size is not None)}" '
+            f'nextlayerid="{len(layers) + 1}" nextobjectid="{next_id}">\n'
+            f' <tileset firstgid="1" source="{tileset}"/>\n'
+            + "".join(layers)
+            + "</map>\n"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=256, help="map width in tiles")
+    parser.add_argument("--depth", type=int, help="map depth, default: --size")
+    parser.add_argument("--rooms", type=int, help="default: one per 400 tiles")
+    parser.add_argument("--npcs", type=int, help="default: one per 64 tiles")
+    parser.add_argument("--items", type=int, help="default: one per 128 tiles")
+    parser.add_argument("--door-density", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compression",
+        choices=["zlib", "gzip", "zstd"],
+        help="base64 compressed tile layers, default: csv",
+    )
+    parser.add_argument("--chunk-size", type=int, help="write an infinite map")
+    parser.add_argument("-o", "--output", help="tmx file to write")
+    args = parser.parse_args()
+
+    level = generate_level(
+        args.size,
+        args.depth,
+        seed=args.seed,
+        num_rooms=args.rooms,
+        door_density=args.door_density,
+        num_npcs=args.npcs,
+        num_items=args.items,
+    )
+    path = args.output or os.path.join(
+        GENERATED_DIR, f"level_{level.width}x{level.depth}_{args.seed}.tmx"
+    )
+    write_tmx(level, path, args.compression, args.chunk_size)
+    print(
+        f"{path}: {level.width}x{level.depth} tiles, {len(level.doors)} doors, "
+        f"{len(level.items)} items, {len(level.npcs)} npcs"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,218 @@
-import pytmx
+import os
+import time
+import numpy as np
 from settings import *
 from game_objects.door import Door
 from game_objects.item import Item
 from game_objects.npc import NPC
+from tmx_reader import TmxMap
+
+
+# compiled level file (see level_compiler.py): header, tile layers as
+# (3, depth, width) uint16 gids (tex id + 1, 0 for no tile), then the objects
+LEVEL_FORMAT_MAGIC = b"LVL1"
+LEVEL_FORMAT_VERSION = 1
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("width", "<u4"),
+        ("depth", "<u4"),
+        ("num_objects", "<u4"),
+        ("source_mtime_ns", "<u8"),  # of the .tmx it was compiled from
+        ("player_pos", "<f8", (2,)),
+    ]
+)
+# kind: 0 door, 1 item, 2 npc (the order of OBJECT_GROUPS)
+OBJECT_DTYPE = np.dtype([("kind", "u1"), ("tex_id", "<u2"), ("x", "<u2"), ("z", "<u2")])
+TILE_LAYERS = "walls", "floors", "ceilings"
+NUM_TILE_LAYERS = len(TILE_LAYERS)
+OBJECT_GROUPS = "doors", "items", "npc"
+
+
+def get_compiled_path(tmx_file):
+    return os.path.join(LEVEL_CACHE_DIR, os.path.splitext(tmx_file)[0] + ".lvl")
+
+
+def read_tile_maps(layers, x0=0, z0=0):
+    """
+    (x, z) -> tex id maps of (depth, width) gid layers, 0 for no tile, with
+    the first column and row at tile (x0, z0).
+    """
+    tile_maps = []
+    for layer in layers:
+        # x outer, z inner: the map order LevelMap has always built
+        x, z = np.nonzero(layer.T)
+        tex_ids = (layer.T[x, z] - 1).tolist()
+        keys = zip((x + x0).tolist(), (z + z0).tolist())
+        tile_maps.append(dict(zip(keys, tex_ids)))
+    return tile_maps
+
+
+class LevelData:
+    def __init__(self, tmx_file, use_compiled=True, is_streamed=None):
+        """
+        Everything LevelMap reads from a .tmx file: tile maps, door, item and
+        NPC spawns as (tex_id, x, z) and the player start. Parsing touches no
+        engine state, so it can run on the level preloader thread.
+
+        A compiled level in LEVEL_CACHE_DIR is memory mapped instead of
+        parsing the TMX, unless it is missing or older than the .tmx file.
+
+        The tile maps of a streamed level (by default with LEVEL_STREAMING
+        and over LEVEL_STREAM_MIN_TILES tiles) start empty: the world
+        streamer fills them chunk by chunk from `tiles`.
+        """
+        self.tmx_file = tmx_file
+        self.tmx_path = f"resources/levels/{tmx_file}"
+
+        self.width, self.depth = 0, 0
+        self.tiles = None  # (3, depth, width) gids of walls, floors, ceilings
+        self.wall_map, self.floor_map, self.ceil_map = {}, {}, {}
+        self.doors, self.items, self.npcs = [], [], []
+        self.player_pos = None
+        #
+        start = time.perf_counter()
+        if use_compiled and LEVEL_CACHE_DIR and self.load_compiled():
+            self.source = "compiled"
+        else:
+            self.source = "tmx"
+            self.parse()
+
+        self.is_streamed = is_streamed
+        if is_streamed is None:
+            self.is_streamed = (
+                LEVEL_STREAMING and self.width * self.depth > LEVEL_STREAM_MIN_TILES
+            )
+        if not self.is_streamed:
+            self.wall_map, self.floor_map, self.ceil_map = read_tile_maps(self.tiles)
+        self.load_sec = time.perf_counter() - start
+
+    def get_tile_maps(self):
+        return self.wall_map, self.floor_map, self.ceil_map
+
+    def get_object_lists(self):
+        return self.doors, self.items, self.npcs
+
+    def read_region(self, x0, z0, x1, z1, is_local=False):
+        """
+        Tile maps of the tiles in [x0, x1) x [z0, z1), keyed by map tile or,
+        if `is_local`, by tile from (x0, z0).
+        """
+        layers = self.tiles[:, z0:z1, x0:x1]
+        if is_local:
+            return read_tile_maps(layers)
+        return read_tile_maps(layers, x0, z0)
+
+    def is_wall(self, x, z):
+        """Wall lookup on the tile arrays, for the tiles a streamed level has not loaded."""
+        if not (0 <= x < self.width and 0 <= z < self.depth):
+            return False
+        return bool(self.tiles[0, z, x])
+
+    # -------- tmx -------- #
+    def parse(self):
+        tmx_map = TmxMap(self.tmx_path, tile_layers=TILE_LAYERS)
+        self.width, self.depth = tmx_map.width, tmx_map.depth
+
+        # get player pos
+        player = tmx_map.objects["player"][-1]
+        self.player_pos = player.x / TEX_SIZE, player.y / TEX_SIZE
+
+        # walls, floors and ceilings
+        self.tiles = np.stack([tmx_map.layers[name] for name in TILE_LAYERS])
+
+        # doors, items and npc
+        for object_list, name in zip(self.get_object_lists(), OBJECT_GROUPS):
+            object_list += [
+                (obj.gid - 1, int(obj.x / TEX_SIZE), int(obj.y / TEX_SIZE))
+                for obj in tmx_map.objects[name]
+            ]
+
+    # -------- compiled -------- #
+    def load_compiled(self):
+        """Map the compiled level into the tile arrays; False if there is none usable."""
+        path = get_compiled_path(self.tmx_file)
+        if not os.path.exists(path) or not os.path.exists(self.tmx_path):
+            return False
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode="r", shape=(1,))[0]
+        if (
+            header["magic"] != LEVEL_FORMAT_MAGIC
+            or header["version"] != LEVEL_FORMAT_VERSION
+            or header["source_mtime_ns"] != os.stat(self.tmx_path).st_mtime_ns
+        ):
+            return False
+
+        self.width, self.depth = int(header["width"]), int(header["depth"])
+        self.player_pos = tuple(header["player_pos"].tolist())
+        self.tiles = np.memmap(
+            path,
+            dtype="<u2",
+            mode="r",
+            offset=HEADER_SIZE,
+            shape=(NUM_TILE_LAYERS, self.depth, self.width),
+        )
+
+        objects = np.memmap(
+            path,
+            dtype=OBJECT_DTYPE,
+            mode="r",
+            offset=HEADER_SIZE + self.tiles.nbytes,
+            shape=(int(header["num_objects"]),),
+        )
+        for kind, object_list in enumerate(self.get_object_lists()):
+            selected = objects[objects["kind"] == kind]
+            object_list += zip(
+                selected["tex_id"].tolist(),
+                selected["x"].tolist(),
+                selected["z"].tolist(),
+            )
+        return True
+
+    def save_compiled(self, path=None):
+        """Write the compiled level, by default where load_compiled looks for it."""
+        path = path or get_compiled_path(self.tmx_file)
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = LEVEL_FORMAT_MAGIC
+        header["version"] = LEVEL_FORMAT_VERSION
+        header["width"], header["depth"] = self.width, self.depth
+        header["source_mtime_ns"] = os.stat(self.tmx_path).st_mtime_ns
+        header["player_pos"] = self.player_pos
+
+        objects = np.array(
+            [
+                (kind, *obj)
+                for kind, object_list in enumerate(self.get_object_lists())
+                for obj in object_list
+            ],
+            dtype=OBJECT_DTYPE,
+        )
+        header["num_objects"] = len(objects)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename: a running game never maps half a file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+            file.write(self.tiles.astype("<u2").tobytes())
+            file.write(objects.tobytes())
+        os.replace(temp_path, path)
+        return path
 
 
 class LevelMap:
-    def __init__(self, eng, tmx_file="test.tmx"):
+    def __init__(self, eng, tmx_file="test.tmx", level_data=None):
         self.eng = eng
-        self.tiled_map = pytmx.TiledMap(f"resources/levels/{tmx_file}")
-        self.gid_map = self.tiled_map.tiledgidmap
+        # parsed here unless the level preloader already did
+        self.level_data = level_data or LevelData(tmx_file)
 
-        self.width = self.tiled_map.width
-        self.depth = self.tiled_map.height
+        self.width = self.level_data.width
+        self.depth = self.level_data.depth
 
-        self.wall_map, self.floor_map, self.ceil_map = {}, {}, {}
+        self.wall_map = self.level_data.wall_map
+        self.floor_map = self.level_data.floor_map
+        self.ceil_map = self.level_data.ceil_map
         (
             self.door_map,
             self.item_map,
@@ -23,57 +221,26 @@ class LevelMap:
         #
         self.parse_level()
 
-    def get_id(self, gid):
-        return self.gid_map[gid] - 1
-
     def parse_level(self):
-        # get player pos
-        player = self.tiled_map.get_layer_by_name("player").pop()
-        player_pos = glm.vec3(player.x / TEX_SIZE, PLAYER_HEIGHT, player.y / TEX_SIZE)
-        # set pos
-        self.eng.player.position = player_pos
-
-        walls = self.tiled_map.get_layer_by_name("walls")
-        floors = self.tiled_map.get_layer_by_name("floors")
-        ceilings = self.tiled_map.get_layer_by_name("ceilings")
-
-        for ix in range(self.width):
-            for iz in range(self.depth):
-                if gid := walls.data[iz][ix]:
-                    # wall hash map
-                    self.wall_map[(ix, iz)] = self.get_id(gid)
-
-                if gid := floors.data[iz][ix]:
-                    # floor hash map
-                    self.floor_map[(ix, iz)] = self.get_id(gid)
-
-                if gid := ceilings.data[iz][ix]:
-                    # ceiling  hash map
-                    self.ceil_map[(ix, iz)] = self.get_id(gid)
+        # set player pos
+        x, z = self.level_data.player_pos
+        self.eng.player.position = glm.vec3(x, PLAYER_HEIGHT, z)
 
         # get doors
-        door_objects = self.tiled_map.get_layer_by_name("doors")
-        for obj in door_objects:
+        for tex_id, x, z in self.level_data.doors:
             # door hash map
-            pos = int(obj.x / TEX_SIZE), int(obj.y / TEX_SIZE)
-            door = Door(self, tex_id=self.get_id(obj.gid), x=pos[0], z=pos[1])
-            self.door_map[pos] = door
+            self.door_map[(x, z)] = Door(self, tex_id=tex_id, x=x, z=z)
 
         # get items
-        items = self.tiled_map.get_layer_by_name("items")
-        for obj in items:
+        for tex_id, x, z in self.level_data.items:
             # item hash map
-            pos = int(obj.x / TEX_SIZE), int(obj.y / TEX_SIZE)
-            item = Item(self, tex_id=self.get_id(obj.gid), x=pos[0], z=pos[1])
-            self.item_map[pos] = item
+            self.item_map[(x, z)] = Item(self, tex_id=tex_id, x=x, z=z)
 
         # get npc
-        npc = self.tiled_map.get_layer_by_name("npc")
-        for obj in npc:
+        for tex_id, x, z in self.level_data.npcs:
             # npc map
-            pos = int(obj.x / TEX_SIZE), int(obj.y / TEX_SIZE)
-            npc = NPC(self, tex_id=self.get_id(obj.gid), x=pos[0], z=pos[1])
-            self.npc_map[pos] = npc
+            npc = NPC(self, tex_id=tex_id, x=x, z=z)
+            self.npc_map[(x, z)] = npc
             self.npc_list.append(npc)
 
         # update player data
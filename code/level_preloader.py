@@ -0,0 +1,88 @@
+import threading
+import time
+from level_map import LevelData
+from meshes.level_mesh import build_chunk_data, get_mesh_builder
+from path_finding import get_graph
+
+
+class PreparedLevel:
+    def __init__(self, tmx_file):
+        """
+        The CPU side of loading a level: parsed maps and spawns, the path
+        graph, the mesh builder and the packed chunk arrays. Building it
+        touches no engine or GL state, so it runs off the main thread. A
+        streamed level has no graph or mesh of the whole map to prepare.
+        """
+        start = time.perf_counter()
+        self.level_data = LevelData(tmx_file)
+        self.graph = self.mesh_data = None
+        if not self.level_data.is_streamed:
+            self.graph = get_graph(self.level_data)
+            mesh_builder = get_mesh_builder(self.level_data)
+            self.mesh_data = (
+                mesh_builder,
+                build_chunk_data(
+                    mesh_builder, self.level_data.width, self.level_data.depth
+                ),
+            )
+        self.prepare_sec = time.perf_counter() - start
+
+
+class LevelPreloader:
+    def __init__(self):
+        """
+        Prepares the next level on a background thread while the current
+        one is played, so that Engine.new_game only creates the objects and
+        GPU buffers. One level is prepared at a time.
+        """
+        self.tmx_file = None
+        self.prepared: PreparedLevel = None
+        self.thread = None
+        #
+        self.num_hits = 0
+        self.num_misses = 0
+        self.prepare_sec = 0.0  # background time of the levels handed out
+
+    def request(self, tmx_file):
+        """Start preparing `tmx_file` unless it is already prepared or underway."""
+        if tmx_file == self.tmx_file:
+            return None
+        if self.thread is not None:
+            self.thread.join()
+        self.tmx_file, self.prepared = tmx_file, None
+        self.thread = threading.Thread(
+            target=self.run, args=(tmx_file,), name="LevelPreloader", daemon=True
+        )
+        self.thread.start()
+
+    def run(self, tmx_file):
+        try:
+            self.prepared = PreparedLevel(tmx_file)
+        except Exception as e:
+            # new_game parses the level itself then
+            print(f"LevelPreloader: {tmx_file}: {e}")
+
+    def take(self, tmx_file):
+        """
+        The prepared `tmx_file`, waiting for it if still underway, or None
+        if another level was requested. A level is handed out once.
+        """
+        if tmx_file != self.tmx_file:
+            self.num_misses += 1
+            return None
+        self.thread.join()
+        prepared = self.prepared
+        self.tmx_file, self.prepared, self.thread = None, None, None
+        if prepared is None:
+            self.num_misses += 1
+        else:
+            self.num_hits += 1
+            self.prepare_sec += prepared.prepare_sec
+        return prepared
+
+    def get_stats(self):
+        return {
+            "hits": self.num_hits,
+            "misses": self.num_misses,
+            "prepare_ms": self.prepare_sec * 1000,
+        }
@@ -1,33 +1,62 @@
+from hooks.startup_timer import startup_timer  # first: times the imports below
 import sys
 import moderngl as mgl
 from engine import Engine
 from settings import *
 import pygame as pg
-from hook_objects import level_duration, total_duration, game_logger
+from hook_objects import (
+    level_duration,
+    total_duration,
+    game_logger,
+    telemetry,
+    game_rng,
+    difficulty,
+    continuous_dda,
+)
+from hooks.event_timer import set_time_source
+from input_source import LiveInput
+
+startup_timer.mark("import")
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, input_source=None, headless=False):
         pg.init()
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, MAJOR_VERSION)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, MINOR_VERSION)
-        pg.display.gl_set_attribute(
-            pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE
-        )
-        pg.display.gl_set_attribute(pg.GL_DEPTH_SIZE, DEPTH_SIZE)
-
-        pg.display.set_mode(WIN_RES, flags=pg.OPENGL | pg.DOUBLEBUF)
-        self.ctx = mgl.create_context()
+        self.headless = headless
+        if headless:
+            # no window: render into an offscreen framebuffer
+            pg.display.set_mode((1, 1))
+            self.ctx = create_standalone_context()
+            self.ctx.simple_framebuffer((int(WIN_RES.x), int(WIN_RES.y))).use()
+        else:
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, MAJOR_VERSION)
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, MINOR_VERSION)
+            pg.display.gl_set_attribute(
+                pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE
+            )
+            pg.display.gl_set_attribute(pg.GL_DEPTH_SIZE, DEPTH_SIZE)
+
+            pg.display.set_mode(WIN_RES, flags=pg.OPENGL | pg.DOUBLEBUF)
+            self.ctx = mgl.create_context()
 
         self.ctx.enable(flags=mgl.DEPTH_TEST | mgl.BLEND)
         self.ctx.gc_mode = "auto"
+        startup_timer.mark("gl init")
 
         self.clock = pg.time.Clock()
         self.delta_time = 0
         self.time = 0
 
-        pg.event.set_grab(True)
-        pg.mouse.set_visible(False)
+        # all input, the game clock and the RNG seed come from the input source,
+        # so that a recorded session can be replayed deterministically
+        self.input = input_source or LiveInput()
+        self.input.bind(self)
+        set_time_source(self.input.get_ticks)
+        game_rng.seed(self.input.seed)
+
+        if not headless:
+            pg.event.set_grab(True)
+            pg.mouse.set_visible(False)
 
         self.is_running = True
         self.fps_value = 0
@@ -45,8 +74,8 @@ class Game:
     def update(self):
         self.engine.update()
         #
-        self.delta_time = self.clock.tick()
-        self.time = pg.time.get_ticks() * 0.001
+        self.delta_time = self.input.tick(self.clock)
+        self.time = self.input.get_ticks() * 0.001
         self.fps_value = int(self.clock.get_fps())
         pg.display.set_caption(f"{self.fps_value}")
 
@@ -58,7 +87,8 @@ class Game:
     def handle_events(self):
         self.anim_trigger, self.sound_trigger = False, False
 
-        for event in pg.event.get():
+        self.input.poll()
+        for event in self.input.get_events():
             if event.type == pg.QUIT or (
                 event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE
             ):
@@ -73,18 +103,52 @@ class Game:
             self.engine.handle_events(event=event)
 
     def run(self):
+        self.input.start()
         total_duration.start()  # This is for Total Duration
         level_duration.start()
         while self.is_running:
             self.handle_events()
             self.update()
             self.render()
+            if not startup_timer.is_finished:
+                self.on_first_frame()
         total_duration.stop()
         level_duration.stop()
         game_logger.log_total_duration(total_duration.get_duration())
+        game_logger.close()  # flush queued log records before exiting
+        telemetry.close()
+        self.input.close()
+        self.engine.close()
+        print("Log queue stats:", game_logger.get_queue_stats())
+        print("Mixer stats:", self.engine.sound.mixer.get_stats())
+        print("Level mesh stats:", self.engine.scene.level_mesh.get_stats())
+        print("Level preload stats:", self.engine.preloader.get_stats())
+        print("Nav graph stats:", self.engine.path_finder.get_stats())
+        if self.engine.world_streamer is not None:
+            print("World streaming stats:", self.engine.world_streamer.get_stats())
+        if self.engine.npc_planner is not None:
+            print("NPC planner stats:", self.engine.npc_planner.get_stats())
         pg.quit()
         sys.exit()
 
+    def on_first_frame(self):
+        startup_timer.finish()
+        if STARTUP_REPORT:
+            startup_timer.report()
+        # deferred until something is on screen
+        game_logger.open()
+        difficulty.prepare_async()
+        if continuous_dda is not None:
+            continuous_dda.controller.prepare_async()
+
+
+def create_standalone_context():
+    try:
+        # EGL works without a display server (e.g. Mesa llvmpipe on a lab box)
+        return mgl.create_standalone_context(backend="egl")
+    except Exception:
+        return mgl.create_standalone_context()
+
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,37 @@
+from meshes.quad_mesh import QuadMesh
+from settings import *
+import moderngl as mgl
+
+
+class FrameGraphMesh(QuadMesh):
+    def __init__(self, eng, shader_program, frame_graph):
+        """
+        Bar graph of the HUD frame time ring buffer. The samples live in a
+        one-row float texture, so each frame writes a single texel and the
+        shader scrolls the graph by the ring head.
+        """
+        super().__init__(eng, shader_program)
+        #
+        self.frame_graph = frame_graph
+        self.texture = self.ctx.texture(
+            (frame_graph.num_samples, 1), components=1, dtype="f4"
+        )
+        self.texture.filter = (mgl.NEAREST, mgl.NEAREST)
+        self.texture.use(location=HUD_GRAPH_TEXTURE_UNIT)
+        #
+        m_model = glm.translate(glm.mat4(), glm.vec3(HUD_GRAPH_POS, 0))
+        self.m_model = glm.scale(m_model, glm.vec3(HUD_GRAPH_SIZE, 1))
+
+    def update_texture(self):
+        samples = self.frame_graph.samples
+        for i in self.frame_graph.get_pending():
+            self.texture.write(samples[i : i + 1], viewport=(i, 0, 1, 1))
+
+    def set_uniforms(self):
+        self.program["m_model"].write(self.m_model)
+        self.program["u_head"] = self.frame_graph.head
+
+    def render(self):
+        self.update_texture()
+        self.set_uniforms()
+        self.vao.render()
@@ -0,0 +1,175 @@
+import numpy as np
+
+# vertex order of the two triangles of a quad (v0, v1, v2, v3), per face id,
+# for unflipped and flipped faces (same winding as LevelMeshBuilder)
+TRIANGLE_ORDER = {
+    0: ((0, 3, 2, 0, 2, 1), (1, 0, 3, 1, 3, 2)),  # floor
+    1: ((0, 2, 3, 0, 1, 2), (1, 3, 0, 1, 2, 3)),  # ceil
+    2: ((0, 1, 2, 0, 2, 3), (3, 0, 1, 3, 1, 2)),  # wall back
+    3: ((0, 2, 1, 0, 3, 2), (3, 1, 0, 3, 2, 1)),  # wall front
+    4: ((0, 1, 2, 0, 2, 3), (3, 0, 1, 3, 1, 2)),  # wall right
+    5: ((0, 2, 1, 0, 3, 2), (3, 1, 0, 3, 2, 1)),  # wall left
+}
+
+NO_FACE = -1
+
+
+class GreedyLevelMeshBuilder:
+    def __init__(self, level_map):
+        """
+        Level mesh with coplanar neighbouring faces merged into larger quads.
+
+        Faces merge when they share the plane, the texture and a uniform AO
+        (all four corners equal). Faces with an AO gradient keep their own
+        quad, so the shading is the same as with LevelMeshBuilder. Texture
+        coordinates come from the world position in the level shader, which
+        tiles the texture once per unit across a merged quad.
+
+        The per-face tex ids and AO of the whole map are computed once and
+        kept, so building the map chunk by chunk costs the same as at once.
+        Call `update_planes` after tiles changed.
+        """
+        self.map = level_map
+        self.planes = None  # [(face_id, tex, ao)] over the whole map
+        self.quads = []  # (face_id, corners, tex_id, ao, flip_id)
+
+    def get_grids(self):
+        width, depth = self.map.width, self.map.depth
+        # open tiles with a border of blocked tiles around the map
+        is_open = np.zeros((width + 2, depth + 2), dtype="int32")
+        is_open[1:-1, 1:-1] = 1
+        for x, z in self.map.wall_map:
+            is_open[x + 1, z + 1] = 0
+
+        def get_tex_grid(tile_map):
+            grid = np.full((width, depth), NO_FACE, dtype="int32")
+            for (x, z), tex_id in tile_map.items():
+                grid[x, z] = tex_id
+            return grid
+
+        walls = get_tex_grid(self.map.wall_map)
+        floors = get_tex_grid(self.map.floor_map)
+        ceils = get_tex_grid(self.map.ceil_map)
+        return is_open, walls, floors, ceils
+
+    @staticmethod
+    def shifted(grid, dx, dz):
+        """`grid` (with its 1 tile border) seen from every map tile moved by dx, dz."""
+        width, depth = grid.shape[0] - 2, grid.shape[1] - 2
+        return grid[1 + dx : 1 + dx + width, 1 + dz : 1 + dz + depth]
+
+    def get_flat_ao(self, is_open):
+        # same neighbours as LevelMeshBuilder.get_ao(plane="Y")
+        a = self.shifted(is_open, 0, -1)
+        b = self.shifted(is_open, -1, -1)
+        c = self.shifted(is_open, -1, 0)
+        d = self.shifted(is_open, -1, 1)
+        e = self.shifted(is_open, 0, 1)
+        f = self.shifted(is_open, 1, 1)
+        g = self.shifted(is_open, 1, 0)
+        h = self.shifted(is_open, 1, -1)
+        return np.stack([a + b + c, g + h + a, e + f + g, c + d + e], axis=-1)
+
+    def update_planes(self):
+        is_open, walls, floors, ceils = self.get_grids()
+        here_open = self.shifted(is_open, 0, 0).astype(bool)
+        self.planes = []
+
+        # flats
+        ao = self.get_flat_ao(is_open)
+        for face_id, tex in ((0, floors), (1, ceils)):
+            tex = np.where(here_open, tex, NO_FACE)
+            self.planes.append((face_id, tex, ao))
+
+        # walls: a face is visible where the neighbouring tile is open
+        is_wall = walls != NO_FACE
+        for face_id, (dx, dz) in ((2, (0, -1)), (3, (0, 1)), (4, (1, 0)), (5, (-1, 0))):
+            visible = is_wall & self.shifted(is_open, dx, dz).astype(bool)
+            tex = np.where(visible, walls, NO_FACE)
+            # AO of the open tile in front of the face, plane "Z" or "X"
+            if dz:
+                side_a = self.shifted(is_open, -1, dz)
+                side_e = self.shifted(is_open, 1, dz)
+            else:
+                side_a = self.shifted(is_open, dx, -1)
+                side_e = self.shifted(is_open, dx, 1)
+            wall_ao = np.stack([side_a, side_a, side_e, side_e], axis=-1)
+            self.planes.append((face_id, tex, wall_ao))
+
+    def build_mesh(self, x0=0, z0=0, x1=None, z1=None):
+        """Vertex data of the tiles in [x0, x1) x [z0, z1), the whole map by default."""
+        if self.planes is None:
+            self.update_planes()
+        x1 = self.map.width if x1 is None else x1
+        z1 = self.map.depth if z1 is None else z1
+
+        self.quads = []
+        for face_id, tex, ao in self.planes:
+            self.add_plane(face_id, tex[x0:x1, z0:z1], ao[x0:x1, z0:z1], x0, z0)
+        return self.get_vertex_data()
+
+    def add_plane(self, face_id, tex, ao, x0=0, z0=0):
+        """
+        Greedy-merge the faces of one face id given per tile tex ids and AO
+        of a region starting at tile (x0, z0).
+        """
+        uniform = (ao == ao[..., :1]).all(axis=-1)
+        # merge key: tex id and AO level, or NO_FACE for faces kept as is
+        key = np.where((tex != NO_FACE) & uniform, tex * 4 + ao[..., 0], NO_FACE)
+
+        # faces with an AO gradient: one quad each
+        for x, z in zip(*np.nonzero((tex != NO_FACE) & ~uniform)):
+            tex_id = int(tex[x, z])
+            tile_ao = tuple(int(v) for v in ao[x, z])
+            flip_id = tile_ao[1] + tile_ao[3] > tile_ao[0] + tile_ao[2]
+            x, z = x0 + x, z0 + z
+            self.add_quad(face_id, x, z, x + 1, z + 1, tex_id, tile_ao, flip_id)
+
+        # walls only merge along their own line: a back face spans x, a side z
+        merge_x = face_id in (0, 1, 2, 3)
+        merge_z = face_id in (0, 1, 4, 5)
+        width, depth = key.shape
+        used = key == NO_FACE
+        for z in range(depth):
+            for x in range(width):
+                if used[x, z]:
+                    continue
+                k = key[x, z]
+                x1 = x + 1
+                while merge_x and x1 < width and not used[x1, z] and key[x1, z] == k:
+                    x1 += 1
+                z1 = z + 1
+                while (
+                    merge_z
+                    and z1 < depth
+                    and not used[x:x1, z1].any()
+                    and (key[x:x1, z1] == k).all()
+                ):
+                    z1 += 1
+                used[x:x1, z:z1] = True
+                tex_id, level = int(k) // 4, int(k) % 4
+                self.add_quad(
+                    face_id, x0 + x, z0 + z, x0 + x1, z0 + z1, tex_id, (level,) * 4, 0
+                )
+
+    def add_quad(self, face_id, x0, z0, x1, z1, tex_id, ao, flip_id):
+        # corners v0..v3 in the order LevelMeshBuilder uses for this face
+        if face_id in (0, 1):
+            y = face_id
+            corners = ((x0, y, z0), (x1, y, z0), (x1, y, z1), (x0, y, z1))
+        elif face_id in (2, 3):
+            z = z0 if face_id == 2 else z0 + 1
+            corners = ((x0, 0, z), (x0, 1, z), (x1, 1, z), (x1, 0, z))
+        else:
+            x = x0 + 1 if face_id == 4 else x0
+            corners = ((x, 0, z0), (x, 1, z0), (x, 1, z1), (x, 0, z1))
+        self.quads.append((face_id, corners, tex_id, ao, int(flip_id)))
+
+    def get_vertex_data(self):
+        vertex_data = np.empty((len(self.quads) * 6, 7), dtype="uint16")
+        index = 0
+        for face_id, corners, tex_id, ao, flip_id in self.quads:
+            for i in TRIANGLE_ORDER[face_id][flip_id]:
+                vertex_data[index] = (*corners[i], tex_id, face_id, ao[i], flip_id)
+                index += 1
+        return vertex_data.ravel()
@@ -4,53 +4,103 @@ from typing import Iterable
 import moderngl as mgl
 import numpy as np
 
+# per-instance attributes: (shader attribute, buffer format, dtype, size, getter);
+# a mesh only keeps those its shader program uses
+INSTANCE_ATTRS = (
+    ("m_model", "16f", "float32", 16, lambda obj: obj.m_model.to_list()),
+    ("in_tex_id", "1i", "int32", 1, lambda obj: obj.tex_id),
+    ("in_anim", "4f", "float32", 4, lambda obj: obj.anim),
+    ("in_door", "2f", "float32", 2, lambda obj: obj.door_anim),
+)
+
 
 class InstancedQuadMesh:
     def __init__(self, eng, objects: Iterable[GameObject], shader_program: mgl.Program):
+        """
+        Instance buffers are kept between frames: only objects flagged
+        `is_dirty` are written again, and all buffers are rebuilt only when
+        objects are added or removed. Animation runs in the shaders from the
+        per-instance parameters and the u_time uniform.
+        """
         self.ctx = eng.app.ctx
         self.program = shader_program
         #
         self.objects = objects
-        self.num_instances = len(objects)
+        self.instances = []  # objects in the instance buffers, in order
+        self.num_instances = 0
 
         # quad vertex buffer
         self.quad_vbo = self.ctx.buffer(QuadMesh.get_vertex_data(self))
 
         # data buffers for instancing
-        self.m_model_vbo: mgl.Buffer = None
-        self.tex_id_vbo: mgl.Buffer = None
+        self.attrs = [
+            attr for attr in INSTANCE_ATTRS if shader_program.get(attr[0], None)
+        ]
+        self.arrays = {}  # attribute -> (num_instances, size) array
+        self.vbos = {}  # attribute -> mgl.Buffer
         #
-        self.vao = self.get_vao() if self.num_instances else None
+        self.vao = None
+        self.num_rebuilds = 0
+        self.num_writes = 0  # instances rewritten in place
+        self.update_buffers()
 
     def update_buffers(self):
-        m_model_list, tex_id_list = [], []
+        objects = list(self.objects)
+        if len(objects) != len(self.instances) or any(
+            obj is not instance for obj, instance in zip(objects, self.instances)
+        ):
+            return self.rebuild(objects)
+
+        dirty = [i for i, obj in enumerate(objects) if obj.is_dirty]
+        if not dirty:
+            return None
+        for i in dirty:
+            self.set_instance(i, objects[i])
+        # one write covering every changed instance
+        first, last = dirty[0], dirty[-1] + 1
+        for name, array in self.arrays.items():
+            self.vbos[name].write(array[first:last], offset=first * array.strides[0])
+        self.num_writes += len(dirty)
+
+    def set_instance(self, index, obj):
+        for name, _, _, _, get_value in self.attrs:
+            self.arrays[name][index] = np.ravel(get_value(obj))
+        obj.is_dirty = False
 
-        for obj in self.objects:
-            m_model_list += sum(obj.m_model.to_list(), [])
-            tex_id_list += [obj.tex_id]
+    def rebuild(self, objects):
+        self.release()
+        self.instances = objects
+        self.num_instances = len(objects)
+        self.num_rebuilds += 1
+        if not self.num_instances:
+            return None
 
-        self.m_model_vbo = self.ctx.buffer(np.array(m_model_list, dtype="float32"))
-        self.tex_id_vbo = self.ctx.buffer(np.array(tex_id_list, dtype="int32"))
+        for name, _, dtype, size, _ in self.attrs:
+            self.arrays[name] = np.zeros((self.num_instances, size), dtype=dtype)
+        for i, obj in enumerate(objects):
+            self.set_instance(i, obj)
+        for name, array in self.arrays.items():
+            self.vbos[name] = self.ctx.buffer(array)
+        self.vao = self.get_vao()
 
     def get_vao(self):
-        self.update_buffers()
-        #
         vao = self.ctx.vertex_array(
             self.program,
-            [
-                (self.quad_vbo, "4f 2f /v", "in_position", "in_uv"),
-                (
-                    self.m_model_vbo,
-                    "16f /i",
-                    "m_model",
-                ),
-                (self.tex_id_vbo, "1i /i", "in_tex_id"),
-            ],
+            [(self.quad_vbo, "4f 2f /v", "in_position", "in_uv")]
+            + [(self.vbos[name], f"{fmt} /i", name) for name, fmt, *_ in self.attrs],
             skip_errors=True,
         )
         return vao
 
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vao = None
+        for vbo in self.vbos.values():
+            vbo.release()
+        self.arrays, self.vbos = {}, {}
+
     def render(self):
-        if len(self.objects):
-            self.vao = self.get_vao()
+        self.update_buffers()
+        if self.vao is not None:
             self.vao.render(instances=self.num_instances)
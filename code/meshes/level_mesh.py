@@ -1,31 +1,280 @@
-from meshes.level_mesh_builder import LevelMeshBuilder
+from settings import *
+import numpy as np
+from meshes.level_mesh_builder import FMT_SIZE, LevelMeshBuilder
+from meshes.greedy_mesh_builder import GreedyLevelMeshBuilder
+
+# packed level vertex, one uint32 (unpacked in shaders/level.vert):
+#   bits 0-7 x, 8-15 z (chunk local), 16 y, 17-19 face id, 20-21 ao id,
+#   22 flip id, 23-30 tex id
+PACKED_FIELDS = (  # (builder attribute index, shift)
+    (0, 0),  # x
+    (2, 8),  # z
+    (1, 16),  # y
+    (4, 17),  # face id
+    (5, 20),  # ao id
+    (6, 22),  # flip id
+    (3, 23),  # tex id
+)
+MAX_LOCAL_COORD = 255
+MAX_TEX_ID = 255
+
+
+def pack_vertices(vertex_data, fmt_size, x0, z0):
+    """
+    Builder vertex data (fmt_size uint16 attributes per vertex, six vertices
+    per quad) to unique packed uint32 vertices and the indices drawing them.
+    """
+    attrs = vertex_data.reshape(-1, fmt_size).astype("uint32")
+    if attrs[:, 3].max() > MAX_TEX_ID:
+        raise ValueError(
+            f"level tex id above {MAX_TEX_ID} does not fit the packed vertex"
+        )
+    attrs[:, 0] -= x0
+    attrs[:, 2] -= z0
+    packed = np.zeros(len(attrs), dtype="uint32")
+    for index, shift in PACKED_FIELDS:
+        packed |= attrs[:, index] << shift
+    # quads share corners with their neighbours when AO and tex id match
+    vertices, indices = np.unique(packed, return_inverse=True)
+    index_dtype = "uint16" if len(vertices) <= 0xFFFF else "uint32"
+    return vertices, indices.astype(index_dtype).ravel()
+
+
+def get_mesh_builder(level_map):
+    if GREEDY_MESHING:
+        return GreedyLevelMeshBuilder(level_map)
+    return LevelMeshBuilder(level_map)
+
+
+def build_chunk(mesh_builder, x0, z0):
+    """Packed (vertices, indices) of the chunk at tile (x0, z0), None if empty."""
+    vertex_data = mesh_builder.build_mesh(
+        x0, z0, x0 + LEVEL_CHUNK_SIZE, z0 + LEVEL_CHUNK_SIZE
+    )
+    if not len(vertex_data):
+        return None
+    return pack_vertices(vertex_data, FMT_SIZE, x0, z0)
+
+
+def build_chunk_data(mesh_builder, width, depth):
+    """
+    (cx, cz) -> packed chunk of the whole map. Needs no GL context, so the
+    level preloader builds it on its thread and LevelMesh only uploads.
+    """
+    return {
+        (cx, cz): build_chunk(
+            mesh_builder, cx * LEVEL_CHUNK_SIZE, cz * LEVEL_CHUNK_SIZE
+        )
+        for cx in range(-(-width // LEVEL_CHUNK_SIZE))
+        for cz in range(-(-depth // LEVEL_CHUNK_SIZE))
+    }
+
+
+class LevelChunk:
+    def __init__(self, mesh, cx, cz):
+        """
+        Square of LEVEL_CHUNK_SIZE tiles with its own VBO/VAO, so chunks
+        outside the view can be skipped and each one rebuilt on its own.
+        """
+        self.mesh = mesh
+        self.x0, self.z0 = cx * LEVEL_CHUNK_SIZE, cz * LEVEL_CHUNK_SIZE
+        self.x1, self.z1 = self.x0 + LEVEL_CHUNK_SIZE, self.z0 + LEVEL_CHUNK_SIZE
+        self.vbo = None
+        self.ibo = None
+        self.vao = None
+        self.num_vertices = 0
+        self.num_indices = 0
+        self.num_bytes = 0
+
+    def build(self):
+        self.upload(build_chunk(self.mesh.mesh_builder, self.x0, self.z0))
+
+    def upload(self, chunk_data):
+        self.release()
+        if chunk_data is None:
+            return None
+        vertices, indices = chunk_data
+        self.num_vertices, self.num_indices = len(vertices), len(indices)
+        self.num_bytes = vertices.nbytes + indices.nbytes
+
+        self.vbo = self.mesh.ctx.buffer(vertices)
+        self.ibo = self.mesh.ctx.buffer(indices)
+        self.vao = self.mesh.ctx.vertex_array(
+            self.mesh.program,
+            [(self.vbo, self.mesh.vbo_format, *self.mesh.vbo_attrs)],
+            index_buffer=self.ibo,
+            index_element_size=indices.itemsize,
+            skip_errors=True,
+        )
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vbo.release()
+            self.ibo.release()
+            self.vao = self.vbo = self.ibo = None
+        self.num_vertices = self.num_indices = self.num_bytes = 0
+
+    def render(self):
+        self.mesh.program["u_chunk_origin"] = (self.x0, 0, self.z0)
+        self.vao.render()
 
 
 class LevelMesh:
-    def __init__(self, eng):
+    def __init__(self, eng, mesh_data=None):
+        """
+        `mesh_data` is (mesh builder, chunk data) prepared by the level
+        preloader, built here when None. Chunks are uploaded over the first
+        frames, LEVEL_UPLOADS_PER_FRAME at a time nearest to the player
+        first; a chunk in view is uploaded before it is drawn.
+
+        On a streamed level `mesh_data` is (None, the chunks loaded so far),
+        and the world streamer adds and removes chunks as the player moves.
+        """
         self.eng = eng
         self.ctx = self.eng.ctx
         self.program = self.eng.shader_program.level
 
-        self.vbo_format = "3u2 1u2 1u2 1u2 1u2"
-        self.fmt_size = sum(int(fmt[:1]) for fmt in self.vbo_format.split())
-        self.vbo_attrs = ("in_position", "in_tex_id", "face_id", "ao_id", "flip_id")
+        # builder output, packed per chunk into vbo_format
+        self.fmt_size = FMT_SIZE
+        self.vbo_format = "1u4"
+        self.vbo_attrs = ("in_packed",)
+        assert LEVEL_CHUNK_SIZE <= MAX_LOCAL_COORD
+
+        level_map = self.eng.level_map
+        if mesh_data is None:
+            mesh_builder = get_mesh_builder(level_map)
+            mesh_data = (
+                mesh_builder,
+                build_chunk_data(mesh_builder, level_map.width, level_map.depth),
+            )
+        self.mesh_builder, chunk_data = mesh_data
+
+        self.num_chunks_x = -(-level_map.width // LEVEL_CHUNK_SIZE)
+        self.num_chunks_z = -(-level_map.depth // LEVEL_CHUNK_SIZE)
+        self.chunks = {}  # (cx, cz) -> LevelChunk
+        self.pending = {}  # (cx, cz) -> chunk data not uploaded yet
+        self.bounds_min = self.bounds_max = None
+        self.add_chunks(chunk_data)
+
+        chunks = [data for data in chunk_data.values() if data is not None]
+        num_vertices = sum(len(vertices) for vertices, _ in chunks)
+        num_indices = sum(len(indices) for _, indices in chunks)
+        num_kb = sum(v.nbytes + i.nbytes for v, i in chunks) / 1024
+        print("Num level vertices: ", num_vertices, "indices:", num_indices)
+        print(f"Level mesh buffers: {num_kb:.1f} KB")
+        print("Num level chunks: ", len(self.chunks))
+        #
+        self.num_drawn = 0
+        self.num_culled = 0
+        self.num_frames = 0
+        self.sum_drawn = 0
 
-        self.mesh_builder = LevelMeshBuilder(self)
-        self.vao = self.get_vao()
+    def add_chunks(self, chunk_data):
+        """Add (cx, cz) -> packed chunk data, uploaded over the next frames."""
+        for key in chunk_data:
+            self.chunks[key] = LevelChunk(self, *key)
+        # uploads nearest to the player first
+        pos = self.eng.player.position
+        for key in sorted(
+            (key for key, data in chunk_data.items() if data is not None),
+            key=lambda key: glm.distance2(
+                (glm.vec2(key) + 0.5) * LEVEL_CHUNK_SIZE, pos.xz
+            ),
+        ):
+            self.pending[key] = chunk_data[key]
+        self.update_bounds()
 
-    def get_vao(self):
-        vertex_data = self.get_vertex_data()
-        vbo = self.ctx.buffer(vertex_data)
-        vao = self.ctx.vertex_array(
-            self.program, [(vbo, self.vbo_format, *self.vbo_attrs)], skip_errors=True
+    def remove_chunks(self, keys):
+        """Release the buffers of chunks a streamed level evicted."""
+        for key in keys:
+            self.pending.pop(key, None)
+            self.chunks.pop(key).release()
+        self.update_bounds()
+
+    def update_bounds(self):
+        # chunk bounds for culling, (num_chunks, 3); walls and flats span y 0..1
+        chunks = list(self.chunks.values())
+        self.bounds_min = np.array(
+            [(c.x0, 0, c.z0) for c in chunks], dtype="f4"
+        ).reshape(-1, 3)
+        self.bounds_max = np.array(
+            [(c.x1, 1, c.z1) for c in chunks], dtype="f4"
+        ).reshape(-1, 3)
+
+    def upload_pending(self, visible):
+        """Upload the pending chunks in view and up to LEVEL_UPLOADS_PER_FRAME more."""
+        for key, is_visible in zip(self.chunks, visible):
+            if is_visible and key in self.pending:
+                self.chunks[key].upload(self.pending.pop(key))
+        for key in list(self.pending)[:LEVEL_UPLOADS_PER_FRAME]:
+            self.chunks[key].upload(self.pending.pop(key))
+
+    def rebuild_chunk(self, cx, cz):
+        self.pending.pop((cx, cz), None)
+        self.chunks[(cx, cz)].build()
+
+    def rebuild_tiles(self, tiles):
+        """
+        Rebuild after the wall/floor/ceil maps changed at `tiles`. The
+        neighbouring chunks are rebuilt too when a tile is on a chunk border:
+        faces and AO there depend on the changed tile.
+        """
+        if isinstance(self.mesh_builder, GreedyLevelMeshBuilder):
+            self.mesh_builder.update_planes()
+        dirty = set()
+        for x, z in tiles:
+            for nx in (x - 1, x, x + 1):
+                for nz in (z - 1, z, z + 1):
+                    dirty.add((nx // LEVEL_CHUNK_SIZE, nz // LEVEL_CHUNK_SIZE))
+        for key in dirty & self.chunks.keys():
+            self.rebuild_chunk(*key)
+
+    def get_visible(self):
+        """Mask of chunks inside the camera frustum and within LEVEL_VIEW_DIST."""
+        camera = self.eng.player
+        # frustum planes (a, b, c, d) from the view projection matrix, near
+        # plane skipped: distance culling covers what is behind it
+        m = camera.m_proj * camera.m_view
+        rows = [glm.row(m, i) for i in range(4)]
+        planes = np.array(
+            [rows[3] + rows[0], rows[3] - rows[0], rows[3] + rows[1], rows[3] - rows[1]]
+        )
+        normals, dists = planes[:, :3], planes[:, 3]
+        # corner of each box furthest along each plane normal: (chunks, planes, 3)
+        corners = np.where(
+            normals > 0, self.bounds_max[:, None], self.bounds_min[:, None]
         )
-        return vao
+        inside = ((corners * normals).sum(axis=-1) + dists >= 0).all(axis=1)
+
+        pos = np.array(camera.position.xz)
+        closest = np.clip(pos, self.bounds_min[:, [0, 2]], self.bounds_max[:, [0, 2]])
+        near = ((closest - pos) ** 2).sum(axis=1) <= LEVEL_VIEW_DIST**2
+        return inside & near
 
     def render(self):
-        self.vao.render()
+        visible = self.get_visible()
+        if self.pending:
+            self.upload_pending(visible)
+        self.num_drawn = self.num_culled = 0
+        for chunk, is_visible in zip(self.chunks.values(), visible):
+            if chunk.vao is None:
+                continue
+            if is_visible:
+                chunk.render()
+                self.num_drawn += 1
+            else:
+                self.num_culled += 1
+        self.num_frames += 1
+        self.sum_drawn += self.num_drawn
 
-    def get_vertex_data(self):
-        vertex_data = self.mesh_builder.build_mesh()
-        print("Num level vertices: ", len(vertex_data) // 7 * 3)
-        return vertex_data
+    def get_stats(self):
+        num_filled = sum(chunk.vao is not None for chunk in self.chunks.values())
+        return {
+            "chunks": len(self.chunks),
+            "non_empty": num_filled,
+            "drawn": self.num_drawn,
+            "culled": self.num_culled,
+            "buffer_kb": sum(chunk.num_bytes for chunk in self.chunks.values()) / 1024,
+            "mean_drawn": self.sum_drawn / max(1, self.num_frames),
+        }
@@ -1,11 +1,13 @@
 from settings import *
 import numpy as np
 
+FMT_SIZE = 7  # vertex attributes: x, y, z, tex_id, face_id, ao_id, flip_id
+
 
 class LevelMeshBuilder:
-    def __init__(self, mesh):
-        self.mesh = mesh
-        self.map = mesh.eng.level_map
+    def __init__(self, level_map):
+        self.map = level_map
+        self.fmt_size = FMT_SIZE
 
     def get_ao(self, x, z, plane):
         if plane == "Y":
@@ -45,14 +47,17 @@ class LevelMeshBuilder:
                 index += 1
         return index
 
-    def build_mesh(self):
+    def build_mesh(self, x0=0, z0=0, x1=None, z1=None):
+        """Vertex data of the tiles in [x0, x1) x [z0, z1), the whole map by default."""
+        x1 = self.map.width if x1 is None else min(x1, self.map.width)
+        z1 = self.map.depth if z1 is None else min(z1, self.map.depth)
         vertex_data = np.empty(
-            [self.map.width * self.map.depth * self.mesh.fmt_size * 18], dtype="uint16"
+            [(x1 - x0) * (z1 - z0) * self.fmt_size * 18], dtype="uint16"
         )
         index = 0
 
-        for x in range(self.map.width):
-            for z in range(self.map.depth):
+        for x in range(x0, x1):
+            for z in range(z0, z1):
                 # flats
                 if pos_not_in_wall_map := (x, z) not in self.map.wall_map:
                     # get ao id
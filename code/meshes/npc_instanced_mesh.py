@@ -0,0 +1,31 @@
+from meshes.instanced_quad_mesh import InstancedQuadMesh
+import numpy as np
+
+
+class NPCInstancedMesh(InstancedQuadMesh):
+    def __init__(self, eng, npc_system, shader_program):
+        """
+        Billboards of all NPCs, filled straight from the NPC system arrays
+        instead of one NPC object at a time.
+        """
+        self.npc_system = npc_system
+        super().__init__(eng, npc_system.npcs, shader_program)
+
+    def update_buffers(self):
+        system = self.npc_system
+        if system.size != self.num_instances or system.npcs is not self.objects:
+            self.objects = system.npcs
+            return self.rebuild(list(self.objects))
+
+        dirty = np.flatnonzero(system.is_dirty[: system.size])
+        if not len(dirty):
+            return None
+        system.fill_instances(self.arrays, dirty)
+        # one write covering every changed instance
+        first, last = dirty[0], dirty[-1] + 1
+        for name, array in self.arrays.items():
+            self.vbos[name].write(array[first:last], offset=first * array.strides[0])
+        self.num_writes += len(dirty)
+
+    def set_instance(self, index, obj):
+        self.npc_system.fill_instances(self.arrays, np.array([index]))
@@ -0,0 +1,136 @@
+import math
+import pygame as pg
+
+# reasons a play request did not start a voice
+CULLED_SILENT = "silent"  # not decoded yet, missing or zero volume
+CULLED_DISTANCE = "distance"  # too far away to be heard
+CULLED_NO_VOICE = "no_voice"  # every voice busy with a more important sound
+
+# keep some of a sound on the far ear, hard panning sounds unnatural
+MAX_PAN = 0.7
+
+
+class Voice:
+    def __init__(self, channel):
+        self.channel = channel
+        self.asset = None
+        self.priority = 0
+        self.gain = 0.0
+        self.start_time = 0
+
+    def is_busy(self):
+        return self.asset is not None and self.channel.get_busy()
+
+
+class Mixer:
+    def __init__(
+        self,
+        num_voices: int,
+        priorities: dict,
+        max_dist: float = 20.0,
+        ref_dist: float = 2.0,
+        min_gain: float = 0.02,
+    ):
+        """
+        Assigns play requests to a fixed set of mixer channels.
+
+        Positional sounds are attenuated with distance to the listener (full
+        volume within `ref_dist`, fading to silence at `max_dist`) and panned
+        by their side of the listener's view. Requests quieter than `min_gain`
+        are culled before a channel is touched. When all voices are busy, the
+        lowest-priority voice is stolen, quietest then oldest first; a request
+        never steals from a more important sound.
+        """
+        self.voices = [Voice(pg.mixer.Channel(i)) for i in range(num_voices)]
+        self.priorities = priorities
+        self.max_dist = max_dist
+        self.ref_dist = ref_dist
+        self.min_gain = min_gain
+        self.listener = None  # Camera-like: position, right
+        #
+        self.num_played = 0
+        self.num_stolen = 0
+        self.culled = {CULLED_SILENT: 0, CULLED_DISTANCE: 0, CULLED_NO_VOICE: 0}
+
+    def get_priority(self, asset):
+        category = asset.category
+        if isinstance(category, tuple):
+            # per-type categories, e.g. ("npc", npc_id)
+            category = category[0]
+        return self.priorities.get(category, 0)
+
+    def get_spatial_gain(self, pos):
+        """(left, right) gains of a sound at `pos`, (1, 1) for non-positional."""
+        if pos is None or self.listener is None:
+            return 1.0, 1.0
+
+        dx = pos[0] - self.listener.position.x
+        dz = pos[2] - self.listener.position.z
+        dist = math.hypot(dx, dz)
+        if dist >= self.max_dist:
+            return 0.0, 0.0
+        if dist <= self.ref_dist:
+            gain, pan = 1.0, 0.0
+        else:
+            fade = (self.max_dist - dist) / (self.max_dist - self.ref_dist)
+            gain = fade * fade
+            right = self.listener.right
+            pan = MAX_PAN * (dx * right.x + dz * right.z) / dist
+        # balance law: the centre keeps full volume on both sides
+        return gain * min(1.0, 1.0 - pan), gain * min(1.0, 1.0 + pan)
+
+    def play(self, asset, pos=None):
+        """Start `asset`, optionally at a world position. Returns False if culled."""
+        if asset.sound is None or asset.volume <= 0:
+            self.culled[CULLED_SILENT] += 1
+            return False
+
+        left, right = self.get_spatial_gain(pos)
+        gain = asset.volume * max(left, right)
+        if gain < self.min_gain:
+            self.culled[CULLED_DISTANCE] += 1
+            return False
+
+        priority = self.get_priority(asset)
+        voice = self.get_voice(priority, gain)
+        if voice is None:
+            self.culled[CULLED_NO_VOICE] += 1
+            return False
+
+        voice.asset = asset
+        voice.priority = priority
+        voice.gain = gain
+        voice.start_time = pg.time.get_ticks()
+        voice.channel.play(asset.sound)
+        voice.channel.set_volume(asset.volume * left, asset.volume * right)
+        self.num_played += 1
+        return True
+
+    def get_voice(self, priority, gain):
+        victim = None
+        for voice in self.voices:
+            if not voice.is_busy():
+                return voice
+            if voice.priority > priority:
+                continue
+            # lowest priority, then quietest, then oldest
+            if victim is None or (voice.priority, voice.gain, voice.start_time) < (
+                victim.priority,
+                victim.gain,
+                victim.start_time,
+            ):
+                victim = voice
+
+        if victim is not None and (victim.priority < priority or victim.gain <= gain):
+            self.num_stolen += 1
+            return victim
+        return None
+
+    def get_stats(self):
+        return {
+            "voices": len(self.voices),
+            "active": sum(voice.is_busy() for voice in self.voices),
+            "played": self.num_played,
+            "stolen": self.num_stolen,
+            "culled": dict(self.culled),
+        }
@@ -0,0 +1,265 @@
+"""
+NPC path planning in a worker process.
+
+The worker plans flow fields toward the player: for every tile of the
+level, the next tile on a shortest path to the player's tile around the
+tiles held by NPCs. One flow field answers every NPC's path lookup, and
+planning it does not compete with rendering for the GIL.
+
+The level's open tiles, the requests and the flow fields are arrays in one
+shared memory block per level, so neither side pickles or copies them.
+Requests go through a ring in the block with a single writer on each side,
+and no locks: the game thread fills slot `head` and then advances head,
+the worker plans slot `tail` into that slot's flow field and then advances
+tail. The game thread keeps a slot free, so the flow field of the latest
+planned slot is not written again while it is read.
+
+The worker is spawned, not forked from the multi-threaded game. Planning
+needs only numpy and scipy, and settings are passed in by the engine.
+"""
+
+import multiprocessing
+import queue
+import signal
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from path_finding import NavGraph
+
+# int64 header fields of a level block
+HEAD, TAIL, WIDTH, DEPTH, MAX_BLOCKED, RING_SIZE, PLAN_NS = range(7)
+HEADER_LEN = 8
+# int32 request fields, then MAX_BLOCKED (x, z) NPC tiles
+GOAL_X, GOAL_Z, NUM_BLOCKED = range(3)
+REQUEST_LEN = 3
+
+WORKER_POLL_SEC = 0.001  # worker sleep between ring checks when idle
+
+
+def get_layout(width, depth, max_blocked, ring_size):
+    """(name, dtype, shape, offset) of the arrays after the header, and the block size."""
+    layout = []
+    offset = HEADER_LEN * 8
+    for name, dtype, shape in (
+        ("is_open", "bool", (depth, width)),
+        ("requests", "int32", (ring_size, REQUEST_LEN + 2 * max_blocked)),
+        ("flows", "int32", (ring_size, width * depth)),
+    ):
+        layout.append((name, dtype, shape, offset))
+        nbytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+        offset += -(-nbytes // 8) * 8
+    return layout, offset
+
+
+class SharedLevel:
+    def __init__(self, shm):
+        """
+        Arrays of a level block: `header`, the (depth, width) `is_open`
+        tiles, `requests` (ring size, REQUEST_LEN + 2 * max blocked) and the
+        (ring size, width * depth) `flows`, one per request slot.
+        """
+        self.shm = shm
+        self.name = shm.name
+        self.header = np.ndarray(HEADER_LEN, dtype="int64", buffer=shm.buf)
+        self.ring_size = int(self.header[RING_SIZE])
+        layout, _ = get_layout(*self.header[WIDTH:PLAN_NS].tolist())
+        for name, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            setattr(self, name, array)
+
+    @classmethod
+    def create(cls, width, depth, max_blocked, ring_size):
+        _, size = get_layout(width, depth, max_blocked, ring_size)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray(HEADER_LEN, dtype="int64", buffer=shm.buf)
+        header[:] = 0
+        header[WIDTH:PLAN_NS] = width, depth, max_blocked, ring_size
+        del header
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def close(self):
+        # the arrays export the buffer, which cannot be closed while they live
+        self.header = self.is_open = self.requests = self.flows = None
+        self.shm.close()
+
+
+# -------- worker process -------- #
+def run_worker(control):
+    """Plan the requests of the level last named on the `control` queue."""
+    # Ctrl+C reaches the whole process group; it is for the game to handle
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    level = graph = None
+    while True:
+        if level is not None and level.header[TAIL] < level.header[HEAD]:
+            plan(level, graph)
+            continue
+        try:
+            name = control.get(timeout=WORKER_POLL_SEC if level is not None else None)
+        except queue.Empty:
+            continue
+        if level is not None:
+            level.close()
+            level = graph = None
+        if name is None:
+            break
+        try:
+            level = SharedLevel.attach(name)
+        except FileNotFoundError:
+            # the game moved on to another level already
+            continue
+        graph = NavGraph(level.is_open)
+
+
+def plan(level, graph):
+    start = time.perf_counter_ns()
+    tail = int(level.header[TAIL])
+    slot = tail % level.ring_size
+    request = level.requests[slot]
+    goal = request[GOAL_X], request[GOAL_Z]
+    blocked = request[REQUEST_LEN : REQUEST_LEN + 2 * request[NUM_BLOCKED]]
+    graph.get_flow_field(goal, blocked.reshape(-1, 2), out=level.flows[slot])
+    level.header[PLAN_NS] += time.perf_counter_ns() - start
+    # published only once the flow field is written
+    level.header[TAIL] = tail + 1
+
+
+# -------- game thread -------- #
+class NPCPlanner:
+    def __init__(self, ring_size=4, max_lag=1):
+        """
+        Starts the planner worker, which plans on the block of the level
+        last passed to set_level. NPCs follow the latest flow field while
+        it leads to a tile within `max_lag` tiles of the player's.
+
+        Until the worker has planned the first flow field of a level, and
+        for the rest of a level once it died, get_flow_field returns None
+        and NPCs plan their paths in-process. A dead worker is started again
+        with the next level.
+        """
+        self.ring_size = ring_size
+        self.max_lag = max_lag
+        self.level: SharedLevel = None
+        self.control = None
+        self.process = None
+        self.is_running = False
+        self.last_request = None
+        #
+        self.num_starts = 0
+        self.num_crashes = 0
+        self.num_requests = 0
+        self.num_full = 0  # requests dropped while the worker was behind
+        self.num_plans = 0  # flow fields planned on the levels so far
+        self.plan_ns = 0
+        self.start()
+
+    def start(self):
+        # shared with the worker: one it started itself would unlink the
+        # blocks of the game when the worker dies
+        resource_tracker.ensure_running()
+        context = multiprocessing.get_context("spawn")
+        self.control = context.Queue()
+        self.process = context.Process(
+            target=run_worker, args=(self.control,), name="NPCPlanner", daemon=True
+        )
+        self.process.start()
+        self.is_running = True
+        self.num_starts += 1
+
+    def check_worker(self):
+        if self.is_running and not self.process.is_alive():
+            print(
+                f"NPCPlanner: worker exited with code {self.process.exitcode}, "
+                "planning in-process"
+            )
+            self.is_running = False
+            self.num_crashes += 1
+        return self.is_running
+
+    def set_level(self, level_data, max_blocked):
+        """Share the open tiles of `level_data` for up to `max_blocked` NPCs."""
+        self.release_level()
+        if not self.check_worker():
+            self.start()
+        self.level = SharedLevel.create(
+            level_data.width, level_data.depth, max_blocked, self.ring_size
+        )
+        self.level.is_open[:] = level_data.tiles[0] == 0
+        self.last_request = None
+        self.control.put(self.level.name)
+
+    def release_level(self):
+        if self.level is None:
+            return None
+        self.num_plans += int(self.level.header[TAIL])
+        self.plan_ns += int(self.level.header[PLAN_NS])
+        self.level.close()
+        self.level.shm.unlink()
+        self.level = None
+
+    def request_flow_field(self, goal, blocked):
+        """
+        Queue a flow field to the `goal` tile around the (n, 2) `blocked`
+        tiles, unless it is the last one asked for or the ring is full.
+        """
+        if self.level is None or not self.check_worker():
+            return None
+        blocked = blocked[: (self.level.requests.shape[1] - REQUEST_LEN) // 2]
+        request = goal, blocked.tobytes()
+        if request == self.last_request:
+            return None
+        header = self.level.header
+        head = int(header[HEAD])
+        if head - header[TAIL] >= self.ring_size - 1:
+            self.num_full += 1
+            return None
+
+        row = self.level.requests[head % self.ring_size]
+        row[GOAL_X], row[GOAL_Z] = goal
+        row[NUM_BLOCKED] = len(blocked)
+        row[REQUEST_LEN : REQUEST_LEN + blocked.size] = blocked.ravel()
+        # published only once the request is written
+        header[HEAD] = head + 1
+        self.last_request = request
+        self.num_requests += 1
+
+    def get_flow_field(self, goal):
+        """
+        (plan id, planned goal, flow field) of the latest flow field if it
+        leads within max_lag tiles of `goal`, else None. The flow field is
+        a view of the shared block, valid until the next set_level.
+        """
+        if self.level is None or not self.is_running:
+            return None
+        tail = int(self.level.header[TAIL])
+        if not tail:
+            return None
+        slot = (tail - 1) % self.ring_size
+        x, z = self.level.requests[slot, : REQUEST_LEN - 1].tolist()
+        if max(abs(x - goal[0]), abs(z - goal[1])) > self.max_lag:
+            return None
+        return tail, (x, z), self.level.flows[slot]
+
+    def close(self):
+        self.release_level()
+        if self.check_worker():
+            self.control.put(None)
+            self.process.join(timeout=1.0)
+            self.is_running = False
+
+    def get_stats(self):
+        num_plans, plan_ns = self.num_plans, self.plan_ns
+        if self.level is not None:
+            num_plans += int(self.level.header[TAIL])
+            plan_ns += int(self.level.header[PLAN_NS])
+        return {
+            "starts": self.num_starts,
+            "crashes": self.num_crashes,
+            "requests": self.num_requests,
+            "full": self.num_full,
+            "plans": num_plans,
+            "mean_plan_ms": plan_ns / max(1, num_plans) / 1e6,
+        }
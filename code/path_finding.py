@@ -1,37 +1,191 @@
+import time
 from collections import deque
 from functools import lru_cache
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, dijkstra
 
+WAYS = (
+    [-1, 0],
+    [0, -1],
+    [1, 0],
+    [0, 1],
+    [-1, -1],
+    [1, -1],
+    [1, 1],
+    [-1, 1],
+)
+WAY_COSTS = np.array([np.hypot(dx, dy) for dx, dy in WAYS], dtype="float32")
 
-class PathFinder:
-    def __init__(self, eng):
-        self.eng = eng
-        self.level_map = eng.level_map
-        self.wall_map = eng.level_map.wall_map
-        self.ways = (
-            [-1, 0],
-            [0, -1],
-            [1, 0],
-            [0, 1],
-            [-1, -1],
-            [1, -1],
-            [1, 1],
-            [-1, 1],
+
+class NavGraph:
+    def __init__(self, is_open):
+        """
+        8-neighbour graph of the open tiles of a (depth, width) mask, as
+        compressed sparse rows. Node x + y * width has the neighbours
+        `neighbours[offsets[node]:offsets[node + 1]]`, in WAYS order, at
+        `costs` 1 or sqrt(2). Walls have no neighbours.
+
+        The arrays are a scipy.sparse CSR matrix (`get_matrix`), so batch
+        queries can run on scipy.sparse.csgraph directly.
+        """
+        start = time.perf_counter()
+        self.depth, self.width = is_open.shape
+        self.num_nodes = self.width * self.depth
+
+        # open tiles with a border of walls around the map
+        padded = np.zeros((self.depth + 2, self.width + 2), dtype=bool)
+        padded[1:-1, 1:-1] = is_open
+        # (num_nodes, 8): the neighbour in each way is open
+        has_edge = np.stack(
+            [
+                padded[1 + dy : 1 + dy + self.depth, 1 + dx : 1 + dx + self.width]
+                for dx, dy in WAYS
+            ],
+            axis=-1,
+        ).reshape(self.num_nodes, len(WAYS))
+        has_edge &= is_open.reshape(-1, 1)
+
+        self.offsets = np.zeros(self.num_nodes + 1, dtype="int32")
+        np.cumsum(has_edge.sum(axis=1), out=self.offsets[1:])
+        node_steps = np.array([dx + dy * self.width for dx, dy in WAYS], dtype="int32")
+        nodes = np.arange(self.num_nodes, dtype="int32")
+        # row-major: each node's neighbours stay in WAYS order
+        self.neighbours = (nodes[:, None] + node_steps)[has_edge]
+        self.costs = np.broadcast_to(WAY_COSTS, has_edge.shape)[has_edge]
+        self.offsets_view = memoryview(self.offsets)
+        self.neighbours_view = memoryview(self.neighbours)
+        self.build_sec = time.perf_counter() - start
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.neighbours.nbytes + self.costs.nbytes
+
+    def get_stats(self):
+        return {
+            "nodes": self.num_nodes,
+            "edges": len(self.neighbours),
+            "kb": self.nbytes / 1024,
+            "build_ms": self.build_sec * 1000,
+        }
+
+    def get_node(self, pos):
+        x, y = pos
+        return x + y * self.width
+
+    def get_pos(self, node):
+        return node % self.width, node // self.width
+
+    def get_matrix(self):
+        """The graph as a scipy.sparse CSR matrix of edge costs, sharing the arrays."""
+        return csr_matrix(
+            (self.costs, self.neighbours, self.offsets),
+            shape=(self.num_nodes, self.num_nodes),
         )
-        self.graph = {}
-        self.update_graph()
 
-    @lru_cache
-    def find(self, start_pos, end_pos):
-        visited = self.bfs(start_pos, end_pos)
-        path = [end_pos]
-        step = visited.get(end_pos, start_pos)
+    def get_distances(self, sources, unweighted=False):
+        """
+        (len(sources), depth, width) distances from each tile in `sources`
+        to every tile, inf where unreachable; steps with `unweighted`.
+        """
+        nodes = [self.get_node(pos) for pos in sources]
+        dist = dijkstra(self.get_matrix(), indices=nodes, unweighted=unweighted)
+        return dist.reshape(len(nodes), self.depth, self.width)
+
+    def get_flow_field(self, goal, blocked=(), out=None):
+        """
+        Next node from every node on a shortest path to `goal`, negative
+        where there is none: at the goal, on walls and unreachable tiles.
+        Paths end on the (n, 2) `blocked` tiles but do not pass them, so
+        each NPC gets a step around the others from one search.
+        """
+        goal_node = self.get_node(goal)
+        offsets, neighbours = self.offsets, self.neighbours
+        if len(blocked):
+            x, y = np.asarray(blocked).T
+            is_passed = np.ones(self.num_nodes, dtype=bool)
+            is_passed[x + y * self.width] = False
+            is_passed[goal_node] = True
+            # edges out of the blocked nodes dropped; they are still reached
+            degrees = np.diff(offsets)
+            neighbours = neighbours[np.repeat(is_passed, degrees)]
+            offsets = np.zeros_like(offsets)
+            np.cumsum(degrees * is_passed, out=offsets[1:])
+        matrix = csr_matrix(
+            (np.ones(len(neighbours), dtype="int8"), neighbours, offsets),
+            shape=(self.num_nodes, self.num_nodes),
+        )
+        # the graph is symmetric: a node's BFS parent from the goal is its
+        # next step toward it
+        _, parents = breadth_first_order(
+            matrix, goal_node, directed=True, return_predecessors=True
+        )
+        if out is None:
+            return parents
+        out[:] = parents
+        return out
+
+    def get_next_step(self, start, goal, blocked):
+        """
+        First step from `start` on a shortest path to `goal` that avoids the
+        `blocked` tiles, or `goal` if there is none.
+        """
+        width = self.width
+        start_node, goal_node = self.get_node(start), self.get_node(goal)
+        blocked = {x + y * width for x, y in blocked}
+        # memoryviews: plain ints on indexing, without numpy scalars
+        offsets, neighbours = self.offsets_view, self.neighbours_view
+
+        queue = deque([start_node])
+        visited = {start_node: None}
+        while queue:
+            node = queue.popleft()
+            if node == goal_node:
+                break
+            for next_node in neighbours[offsets[node] : offsets[node + 1]].tolist():
+                if next_node not in visited and next_node not in blocked:
+                    queue.append(next_node)
+                    visited[next_node] = node
 
-        while step and step != start_pos:
+        if visited.get(goal_node) is None:
+            # unreachable, or already there
+            return goal
+        node = goal_node
+        while visited[node] != start_node:
+            node = visited[node]
+        return self.get_pos(node)
+
+
+class StreamedGraph:
+    def __init__(self, wall_map, is_loaded):
+        """
+        Open neighbours of a streamed level's tiles, looked up as searched
+        instead of kept for the whole map. Tiles the world streamer has not
+        loaded (`is_loaded(x, y)` False) are left out, which also bounds the
+        search to the loaded part of the level.
+        """
+        self.wall_map = wall_map
+        self.is_loaded = is_loaded
+
+    def __getitem__(self, node):
+        x, y = node
+        return [
+            (x + dx, y + dy)
+            for dx, dy in WAYS
+            if (x + dx, y + dy) not in self.wall_map and self.is_loaded(x + dx, y + dy)
+        ]
+
+    def get_next_step(self, start, goal, blocked):
+        visited = self.bfs(start, goal, blocked)
+        path = [goal]
+        step = visited.get(goal, start)
+
+        while step and step != start:
             path.append(step)
             step = visited[step]
         return path[-1]
 
-    def bfs(self, start, goal):
+    def bfs(self, start, goal, blocked):
         queue = deque([start])
         visited = {start: None}
 
@@ -39,27 +193,47 @@ class PathFinder:
             cur_node = queue.popleft()
             if cur_node == goal:
                 break
-            next_nodes = self.graph[cur_node]
+            next_nodes = self[cur_node]
 
             for next_node in next_nodes:
-                if (
-                    next_node not in visited
-                    and next_node not in self.eng.level_map.npc_map
-                ):
+                if next_node not in visited and next_node not in blocked:
                     queue.append(next_node)
                     visited[next_node] = cur_node
         return visited
 
-    def get_next_nodes(self, x, y):
-        return [
-            (x + dx, y + dy)
-            for dx, dy in self.ways
-            if (x + dx, y + dy) not in self.wall_map
-        ]
+
+def get_graph(level_map):
+    """
+    NavGraph of a level. Only the map size and the wall map are read, so
+    the level preloader can build it from a LevelData.
+    """
+    is_open = np.ones((level_map.depth, level_map.width), dtype=bool)
+    if level_map.wall_map:
+        x, y = np.array(list(level_map.wall_map)).T
+        is_open[y, x] = False
+    return NavGraph(is_open)
+
+
+class PathFinder:
+    def __init__(self, eng, graph=None):
+        self.eng = eng
+        self.level_map = eng.level_map
+        self.wall_map = eng.level_map.wall_map
+        self.ways = WAYS
+        self.graph = graph
+        if self.graph is None:
+            self.update_graph()
+
+    @lru_cache
+    def find(self, start_pos, end_pos):
+        # tiles held by NPCs are not walked through
+        return self.graph.get_next_step(start_pos, end_pos, self.eng.level_map.npc_map)
 
     def update_graph(self):
-        for y in range(self.level_map.depth):
-            for x in range(self.level_map.width):
-                self.graph[(x, y)] = self.graph.get((x, y), []) + self.get_next_nodes(
-                    x, y
-                )
+        self.graph = get_graph(self.level_map)
+
+    def get_stats(self):
+        # streamed levels search their loaded tiles, with nothing to report
+        if isinstance(self.graph, NavGraph):
+            return self.graph.get_stats()
+        return {}
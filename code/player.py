@@ -1,9 +1,15 @@
 from itertools import cycle
 from camera import Camera
 from settings import *
-import hooks.fuzzy_controller as fuzzy_controller
-from hook_objects import level_duration, total_duration, game_logger, runtime_game_stats
-import random
+from hook_objects import (
+    level_duration,
+    total_duration,
+    game_logger,
+    runtime_game_stats,
+    telemetry,
+    game_rng,
+    difficulty,
+)
 import sys
 import pygame as pg
 from typing import Tuple
@@ -89,6 +95,9 @@ class Player(Camera):
         self.check_health()
         self.update_tile_position()
         self.pick_up_item()
+        #
+        if TELEMETRY_ON:
+            telemetry.sample(self, self.app.time)
 
     def check_health(self):
         if self.health <= 0:
@@ -108,16 +117,14 @@ class Player(Camera):
             )
 
             # Calculate new DDA multipliers based on this death's performance
-            new_damage_mult, new_health_mult = (
-                fuzzy_controller.check_DDA_adjust_difficulty_capped(
-                    runtime_game_stats.get_health(),  # Health is 0
-                    runtime_game_stats.get_deaths(),  # Current accumulated deaths for this level/session
-                    total_duration.get_duration(),  # Time taken for this session
-                    self.eng.player_attribs.num_level
-                )
-            ) if DDA_ON else (1.0, 1.0)
+            new_damage_mult, new_health_mult = difficulty.adjust(
+                runtime_game_stats.get_health(),  # Health is 0
+                runtime_game_stats.get_deaths(),  # Current accumulated deaths for this level/session
+                total_duration.get_duration(),  # Time taken for this session
+                self.eng.player_attribs.num_level,
+            )
 
-            pg.time.wait(2000)
+            self.app.input.wait(2000)
 
             # Update the *existing* (persistent) player_attribs in the engine
             # These will be used by the new Player instance created in new_game()
@@ -146,7 +153,7 @@ class Player(Camera):
             # the updated multipliers from self.eng.player_attribs
 
     def check_hit_on_npc(self):
-        if WEAPON_SETTINGS[self.weapon_id]["miss_probability"] > random.random():
+        if WEAPON_SETTINGS[self.weapon_id]["miss_probability"] > game_rng.random():
             return None
 
         if npc_pos := self.eng.ray_casting.run(
@@ -157,6 +164,7 @@ class Player(Camera):
         ):
             npc = self.eng.level_map.npc_map[npc_pos]
             npc.get_damage()
+            telemetry.on_hit()
 
     def switch_weapon(self, weapon_id):
         if self.weapons[weapon_id]:
@@ -165,6 +173,7 @@ class Player(Camera):
     def do_shot(self):
         if self.weapon_id == ID.KNIFE_0:
             self.is_shot = True
+            telemetry.on_shot()
             self.check_hit_on_npc()
             #
             self.play(self.sound.player_attack[ID.KNIFE_0])
@@ -173,6 +182,7 @@ class Player(Camera):
             consumption = WEAPON_SETTINGS[self.weapon_id]["ammo_consumption"]
             if not self.is_shot and self.ammo >= consumption:
                 self.is_shot = True
+                telemetry.on_shot()
                 self.check_hit_on_npc()
                 #
                 self.ammo -= consumption
@@ -229,7 +239,7 @@ class Player(Camera):
             self.play(self.sound.player_missed)
             # next level
             level_duration.stop()
-            pg.time.wait(300)
+            self.app.input.wait(300)
 
             runtime_game_stats.set_health(self.health)  # Health at level end
 
@@ -244,14 +254,12 @@ class Player(Camera):
             # level_duration.start() # This will be handled by new_game() implicitly if it's there or needs explicit call
 
             # Calculate DDA multipliers for the NEXT level
-            new_damage_mult, new_health_mult = (
-                fuzzy_controller.check_DDA_adjust_difficulty_capped(
-                    runtime_game_stats.get_health(),
-                    runtime_game_stats.get_deaths(),
-                    total_duration.get_duration(),
-                    self.eng.player_attribs.num_level
-                )
-            ) if DDA_ON else (1.0, 1.0)
+            new_damage_mult, new_health_mult = difficulty.adjust(
+                runtime_game_stats.get_health(),
+                runtime_game_stats.get_deaths(),
+                total_duration.get_duration(),
+                self.eng.player_attribs.num_level,
+            )
 
             # Update player_attribs that will carry over to the new Player instance in new_game()
             self.eng.player_attribs.update(
@@ -273,6 +281,10 @@ class Player(Camera):
                 total_duration.stop()
                 level_duration.stop()  # Ensure this is also stopped
                 game_logger.log_total_duration(total_duration.get_duration())
+                game_logger.close()  # flush queued log records before exiting
+                telemetry.close()
+                self.app.input.close()
+                self.eng.close()
                 pg.quit()
                 sys.exit()
             else:
@@ -286,14 +298,12 @@ class Player(Camera):
 
             runtime_game_stats.set_health(self.health)
 
-            new_damage_mult, new_health_mult = (
-                fuzzy_controller.check_DDA_adjust_difficulty_capped(
-                    runtime_game_stats.get_health(),
-                    runtime_game_stats.get_deaths(),
-                    total_duration.get_duration(),
-                    self.eng.player_attribs.num_level
-                )
-            ) if DDA_ON else (1.0, 1.0)
+            new_damage_mult, new_health_mult = difficulty.adjust(
+                runtime_game_stats.get_health(),
+                runtime_game_stats.get_deaths(),
+                total_duration.get_duration(),
+                self.eng.player_attribs.num_level,
+            )
 
             game_logger.log_open_door(
                 runtime_game_stats.get_health(),
@@ -316,19 +326,21 @@ class Player(Camera):
 
             self.damage_mult = new_damage_mult
             self.health_mult = new_health_mult
+            # NPCs already on the map fight with the new multipliers too
+            self.eng.npc_stats.set_multipliers(new_health_mult, new_damage_mult)
 
-            door.is_moving = True
+            door.start_moving()
             self.play(self.sound.open_door)
 
     def mouse_control(self):
-        mouse_dx, mouse_dy = pg.mouse.get_rel()
+        mouse_dx, mouse_dy = self.app.input.get_mouse_rel()
         if mouse_dx:
             self.rotate_yaw(delta_x=mouse_dx * MOUSE_SENSITIVITY)
         if mouse_dy:
             self.rotate_pitch(delta_y=mouse_dy * MOUSE_SENSITIVITY)
 
     def keyboard_control(self):
-        key_state = pg.key.get_pressed()
+        key_state = self.app.input.get_pressed()
         vel = PLAYER_SPEED * self.app.delta_time
         next_step = glm.vec2()
         #
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+
+def get_frame_time_stats(frame_times):
+    frame_times = np.asarray(frame_times, dtype="float64")
+    if not len(frame_times):
+        return {}
+
+    median = float(np.median(frame_times))
+    return {
+        "frames": int(len(frame_times)),
+        "total_sec": float(frame_times.sum() / 1000),
+        "mean_ms": float(frame_times.mean()),
+        "std_ms": float(frame_times.std()),
+        "min_ms": float(frame_times.min()),
+        "p50_ms": median,
+        "p90_ms": float(np.percentile(frame_times, 90)),
+        "p95_ms": float(np.percentile(frame_times, 95)),
+        "p99_ms": float(np.percentile(frame_times, 99)),
+        "max_ms": float(frame_times.max()),
+        "hitches": int(np.count_nonzero(frame_times > 2 * median)),
+        "mean_fps": float(1000 / frame_times.mean()),
+    }
+
+
+def print_frame_time_stats(stats):
+    print(f"Frames: {stats['frames']}  ({stats['total_sec']:.2f} s)")
+    print(
+        f"Frame time ms: mean {stats['mean_ms']:.3f}  std {stats['std_ms']:.3f}  "
+        f"min {stats['min_ms']:.3f}  max {stats['max_ms']:.3f}"
+    )
+    print(
+        f"Percentiles ms: p50 {stats['p50_ms']:.3f}  p90 {stats['p90_ms']:.3f}  "
+        f"p95 {stats['p95_ms']:.3f}  p99 {stats['p99_ms']:.3f}"
+    )
+    print(
+        f"Hitches (> 2x median): {stats['hitches']}  Mean FPS: {stats['mean_fps']:.1f}"
+    )
+
+
+def run_game(input_source, headless):
+    # imported late: SDL environment variables must be set first
+    from main import Game
+
+    game = Game(input_source=input_source, headless=headless)
+    try:
+        game.run()
+    except SystemExit:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Record, replay and benchmark deterministic game sessions."
+    )
+    parser.add_argument("mode", choices=("record", "play", "bench"))
+    parser.add_argument("trace", help="input trace file")
+    parser.add_argument(
+        "--headless", action="store_true", help="render offscreen, without a window"
+    )
+    parser.add_argument("--out", help="write benchmark results as JSON")
+    args = parser.parse_args()
+
+    if args.headless:
+        if args.mode == "record":
+            parser.error("recording needs a window")
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    from input_source import RecordingInput, ReplayInput
+
+    if args.mode == "record":
+        run_game(RecordingInput(args.trace), headless=False)
+        return None
+
+    # benchmarks measure the engine, not the scripted pauses on death and level end
+    replay = ReplayInput(args.trace, skip_waits=args.mode == "bench")
+    run_game(replay, headless=args.headless)
+
+    if args.mode == "bench":
+        stats = get_frame_time_stats(replay.frame_times)
+        print_frame_time_stats(stats)
+        if args.out:
+            with open(args.out, "w") as file:
+                json.dump({"trace": args.trace, "frame_time": stats}, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,21 @@
 from meshes.level_mesh import LevelMesh
 from meshes.instanced_quad_mesh import InstancedQuadMesh
+from meshes.npc_instanced_mesh import NPCInstancedMesh
 from game_objects.hud import HUD
 from game_objects.weapon import Weapon
 from meshes.weapon_mesh import WeaponMesh
+from meshes.frame_graph_mesh import FrameGraphMesh
 
 
 class Scene:
-    def __init__(self, eng):
+    def __init__(self, eng, mesh_data=None):
         self.eng = eng
-        self.level_mesh = LevelMesh(eng)
+        self.level_mesh = LevelMesh(eng, mesh_data)
 
         self.hud = HUD(eng)
         self.doors = self.eng.level_map.door_map.values()
         self.items = self.eng.level_map.item_map.values()
-        self.npc = self.eng.level_map.npc_map.values()
+        self.npc_system = self.eng.npc_system
         self.weapon = Weapon(eng)
 
         self.instanced_door_mesh = InstancedQuadMesh(
@@ -25,16 +27,20 @@ class Scene:
         self.instanced_hud_mesh = InstancedQuadMesh(
             eng, self.hud.objects, eng.shader_program.instanced_hud
         )
-        self.instanced_npc_mesh = InstancedQuadMesh(
-            eng, self.npc, eng.shader_program.instanced_billboard
+        self.instanced_npc_mesh = NPCInstancedMesh(
+            eng, self.npc_system, eng.shader_program.instanced_billboard
         )
         self.weapon_mesh = WeaponMesh(eng, eng.shader_program.weapon, self.weapon)
+        self.frame_graph_mesh = None
+        if self.hud.frame_graph is not None:
+            self.frame_graph_mesh = FrameGraphMesh(
+                eng, eng.shader_program.hud_graph, self.hud.frame_graph
+            )
 
     def update(self):
         for door in self.doors:
             door.update()
-        for npc in self.npc:
-            npc.update()
+        self.npc_system.update()
         self.hud.update()
         self.weapon.update()
 
@@ -47,6 +53,8 @@ class Scene:
         self.instanced_item_mesh.render()
         # hud
         self.instanced_hud_mesh.render()
+        if self.frame_graph_mesh is not None:
+            self.frame_graph_mesh.render()
         # npc
         self.instanced_npc_mesh.render()
         # weapon
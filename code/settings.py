@@ -5,11 +5,29 @@ import pygame as pg
 from texture_id import ID
 
 # logging
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+LOG_DIR = "logs"  # created by the loggers on first write
+TEXT_LOG_ON = True  # human-readable view next to the binary event log
+EVENT_LOG_FLUSH_INTERVAL = 5.0  # sec
+LOG_QUEUE_SIZE = 1024
+LOG_OVERFLOW_POLICY = "block"  # "block", "drop_newest" or "drop_oldest"
+STARTUP_REPORT = True  # print the startup stage timings after the first frame
+
+# player telemetry
+TELEMETRY_ON = True
+TELEMETRY_CAPACITY = 16384  # ring buffer rows
+TELEMETRY_CHUNK_SIZE = 4096  # rows per spilled file
+TELEMETRY_WINDOW = 60.0  # sec, window for DDA features
 
 # Dynamic Difficulty Adjustment
 DDA_ON = True
+DDA_CONTROLLER = "fuzzy"  # "fuzzy", "table", "linear" or "null"
+DDA_CONTROLLER_OPTIONS = {  # extra arguments per controller
+    "table": {"cache_path": os.path.join("cache", "dda_table.npz")},
+}
+DDA_CONTINUOUS_ON = False  # also re-evaluate during a level
+DDA_CONTINUOUS_CONTROLLER = "table"  # must be cheap: runs on the game thread
+DDA_CONTINUOUS_INTERVAL = 5.0  # sec
+DDA_CONTINUOUS_MAX_STEP = 0.1  # max multiplier change per evaluation
 
 # opengl
 MAJOR_VERSION = 3
@@ -58,6 +76,12 @@ MAX_AMMO_VALUE = 999
 
 #
 NUM_LEVELS = 2
+LEVEL_PRELOAD = True  # prepare the next level on a background thread
+LEVEL_CACHE_DIR = os.path.join("cache", "levels")  # compiled levels, None to disable
+LEVEL_STREAMING = True  # big levels keep only the chunks near the player loaded
+LEVEL_STREAM_MIN_TILES = 128 * 128  # smaller levels are loaded whole
+LEVEL_STREAM_RADIUS = 3  # chunks loaded around the player's chunk, NPCs run one less
+LEVEL_STREAM_BUDGET_KB = 16 * 1024  # chunks outside the radius evicted above this
 
 # colors
 BG_COLOR = glm.vec3(0.1, 0.16, 0.25)
@@ -69,6 +93,10 @@ TEXTURE_UNIT_0 = 0
 # walls
 WALL_SIZE = 1
 H_WALL_SIZE = WALL_SIZE / 2
+GREEDY_MESHING = True  # merge coplanar level faces into larger quads
+LEVEL_CHUNK_SIZE = 16  # tiles per level mesh chunk side
+LEVEL_VIEW_DIST = 30  # chunks further away are not drawn, fog hides them
+LEVEL_UPLOADS_PER_FRAME = 4  # level chunks uploaded per frame besides those in view
 
 # timer
 SYNC_PULSE = 10  # ms
@@ -78,9 +106,16 @@ MAX_RAY_DIST = 20
 
 # animations
 ANIM_DOOR_SPEED = 0.03
+DOOR_OPEN_HEIGHT = WALL_SIZE - ANIM_DOOR_SPEED
+DOOR_SPEED = ANIM_DOOR_SPEED * 1000 / SYNC_PULSE  # units per sec
+DOOR_MOVE_TIME = DOOR_OPEN_HEIGHT / DOOR_SPEED  # sec
 
 # sound
 MAX_SOUND_CHANNELS = 10
+SOUND_CACHE_DIR = os.path.join("cache", "audio")  # decoded PCM, None to disable
+SOUND_PRIORITIES = {"player": 3, "weapons": 3, "pickup": 2, "npc": 1}  # higher wins
+SOUND_MAX_DIST = 20  # NPC sounds further away are not played
+SOUND_REF_DIST = 2  # NPC sounds closer than this play at full volume
 
 # number of textures
 NUM_TEXTURES = len(ID)
@@ -106,6 +141,16 @@ ID.FPS_DIGIT_1 = 7 + NUM_TEXTURES
 ID.FPS_DIGIT_2 = 8 + NUM_TEXTURES
 ID.FPS_DIGIT_3 = 9 + NUM_TEXTURES
 
+# hud widgets
+HUD_FPS_INTERVAL = 0.25  # sec between fps counter updates
+HUD_GRAPH = True  # frame time graph under the fps counter
+HUD_GRAPH_SAMPLES = 120  # frames shown, one bar each
+HUD_GRAPH_MAX_MS = 50.0  # frame time at the top of the graph
+HUD_GRAPH_BUDGET_MS = 1000 / 60  # bars above turn yellow, above twice red
+HUD_GRAPH_POS = glm.vec2(-0.75, 0.55)  # center of the bottom edge
+HUD_GRAPH_SIZE = glm.vec2(0.4, 0.15)
+HUD_GRAPH_TEXTURE_UNIT = 1
+
 HUD_SETTINGS = {
     ID.HEALTH_DIGIT_0: {
         "scale": 0.1,
@@ -196,6 +241,11 @@ WEAPON_SETTINGS = {
     },
 }
 
+# npc path planning
+NPC_PLANNER_PROCESS = False  # flow fields from a worker process, replays then differ
+NPC_PLANNER_RING_SIZE = 4  # request slots shared with the worker
+NPC_PLANNER_MAX_LAG = 1  # tiles the player may be past the goal of the flow field
+
 # npc settings
 NPC_SETTINGS = {
     #
@@ -13,6 +13,7 @@ class ShaderProgram:
         self.instanced_billboard = self.get_program(shader_name="instanced_billboard")
         self.instanced_hud = self.get_program(shader_name="instanced_hud")
         self.weapon = self.get_program(shader_name="weapon")
+        self.hud_graph = self.get_program(shader_name="hud_graph")
         # ------------------------- #
         self.set_uniforms_on_init()
 
@@ -24,6 +25,8 @@ class ShaderProgram:
         # instanced door
         self.instanced_door["m_proj"].write(self.player.m_proj)
         self.instanced_door["u_texture_array_0"] = TEXTURE_UNIT_0
+        self.instanced_door["u_door_speed"] = DOOR_SPEED
+        self.instanced_door["u_door_height"] = DOOR_OPEN_HEIGHT
 
         # billboard
         self.instanced_billboard["m_proj"].write(self.player.m_proj)
@@ -35,10 +38,18 @@ class ShaderProgram:
         # weapon
         self.weapon["u_texture_array_0"] = TEXTURE_UNIT_0
 
+        # hud frame time graph
+        self.hud_graph["u_frame_times"] = HUD_GRAPH_TEXTURE_UNIT
+        self.hud_graph["u_max_ms"] = HUD_GRAPH_MAX_MS
+        self.hud_graph["u_budget_ms"] = HUD_GRAPH_BUDGET_MS
+
     def update(self):
         self.level["m_view"].write(self.player.m_view)
         self.instanced_door["m_view"].write(self.player.m_view)
         self.instanced_billboard["m_view"].write(self.player.m_view)
+        # clock of the instance animations
+        self.instanced_door["u_time"] = self.eng.app.time
+        self.instanced_billboard["u_time"] = self.eng.app.time
 
     def get_program(self, shader_name):
         with open(f"shaders/{shader_name}.vert") as file:
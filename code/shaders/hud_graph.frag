@@ -0,0 +1,30 @@
+#version 330 core
+
+out vec4 frag_color;
+in vec2 graph_pos;
+
+// ring buffer of frame times in ms, u_head is the oldest sample
+uniform sampler2D u_frame_times;
+uniform int u_head;
+uniform float u_max_ms;
+uniform float u_budget_ms;
+
+const vec4 BG_COLOR = vec4(0.0, 0.0, 0.0, 0.35);
+const vec3 GOOD_COLOR = vec3(0.2, 0.9, 0.3);
+const vec3 SLOW_COLOR = vec3(1.0, 0.8, 0.1);
+const vec3 HITCH_COLOR = vec3(1.0, 0.2, 0.15);
+
+
+void main() {
+    int num_samples = textureSize(u_frame_times, 0).x;
+    int i = min(int(graph_pos.x * num_samples), num_samples - 1);
+    float frame_ms = texelFetch(u_frame_times, ivec2((u_head + i) % num_samples, 0), 0).r;
+
+    if (graph_pos.y * u_max_ms > frame_ms) {
+        frag_color = BG_COLOR;
+        return;
+    }
+    vec3 col = frame_ms > 2.0 * u_budget_ms ? HITCH_COLOR :
+               frame_ms > u_budget_ms ? SLOW_COLOR : GOOD_COLOR;
+    frag_color = vec4(col, 0.85);
+}
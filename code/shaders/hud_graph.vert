@@ -0,0 +1,13 @@
+#version 330 core
+
+layout (location = 0) in vec4 in_position;
+
+uniform mat4 m_model;
+out vec2 graph_pos;
+
+
+void main() {
+    // 0..1 across and up the graph
+    graph_pos = vec2(in_position.x + 0.5, in_position.y);
+    gl_Position = m_model * in_position;
+}
@@ -4,15 +4,23 @@ layout (location = 0) in vec4 in_position;
 layout (location = 1) in vec2 in_uv;
 layout (location = 2) in mat4 m_model;
 layout (location = 4) in int in_tex_id;
+layout (location = 6) in vec4 in_anim;  // num frames, frame time, start time, loop
 
 uniform mat4 m_proj, m_view;
+uniform float u_time;
 
 out vec2 uv;
 flat out int tex_id;
 
 void main() {
     uv = in_uv;
-    tex_id = in_tex_id;
+    int frame = 0;
+    if (in_anim.x > 0.0) {
+        int num_frames = int(in_anim.x);
+        int step = int(max(u_time - in_anim.z, 0.0) / in_anim.y);
+        frame = in_anim.w > 0.0 ? step % num_frames : min(step, num_frames - 1);
+    }
+    tex_id = in_tex_id + frame;
 
     mat4 m_model_view = m_view * m_model;
     // First colunm.
@@ -4,8 +4,11 @@ layout (location = 0) in vec4 in_position;
 layout (location = 1) in vec2 in_uv;
 layout (location = 2) in mat4 m_model;
 layout (location = 4) in int in_tex_id;
+layout (location = 6) in vec2 in_door;  // move start time, direction (0 still)
 
 uniform mat4 m_proj, m_view;
+uniform float u_time;
+uniform float u_door_speed, u_door_height;
 
 out vec2 uv;
 flat out int tex_id;
@@ -14,5 +17,9 @@ void main() {
     uv = in_uv;
     tex_id = in_tex_id;
 
-    gl_Position = m_proj * m_view * m_model * in_position;
+    vec4 position = m_model * in_position;
+    float offset = min(max(u_time - in_door.x, 0.0) * u_door_speed, u_door_height);
+    position.y += in_door.y * offset;
+
+    gl_Position = m_proj * m_view * position;
 }
\ No newline at end of file
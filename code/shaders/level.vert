@@ -1,12 +1,10 @@
 #version 330 core
 
-layout (location = 0) in vec3 in_position;
-layout (location = 1) in int in_tex_id;
-layout (location = 2) in int face_id;
-layout (location = 3) in int ao_id;
-layout (location = 4) in int flip_id;
+// bits 0-7 x, 8-15 z, 16 y, 17-19 face id, 20-21 ao id, 22 flip id, 23-30 tex id
+layout (location = 0) in uint in_packed;
 
 uniform mat4 m_proj, m_view;
+uniform vec3 u_chunk_origin;
 
 flat out int tex_id;
 out vec2 uv;
@@ -20,23 +18,29 @@ const float face_shading[6] = float[6](
     0.85, 0.8   // left right
 );
 
-const vec2 uv_coords[4] = vec2[4](
-    vec2(0, 0), vec2(0, 1),
-    vec2(1, 0), vec2(1, 1)
+// texture axes per face: uv from the world position, so a quad spanning
+// several tiles repeats the texture once per tile
+const vec3 u_axes[6] = vec3[6](
+    vec3(1, 0, 0), vec3(-1, 0, 0),  // flats
+    vec3(1, 0, 0), vec3(-1, 0, 0),  // front back
+    vec3(0, 0, 1), vec3(0, 0, -1)   // left right
 );
 
-const int uv_indices[24] = int[24](
-    1, 0, 2, 1, 2, 3,  // tex coords indices for vertices of an even face
-    3, 0, 2, 3, 1, 0,  // odd face
-    3, 1, 0, 3, 0, 2,  // even flipped face
-    1, 2, 3, 1, 0, 2   // odd flipped face
+const vec3 v_axes[6] = vec3[6](
+    vec3(0, 0, -1), vec3(0, 0, -1),
+    vec3(0, -1, 0), vec3(0, -1, 0),
+    vec3(0, -1, 0), vec3(0, -1, 0)
 );
 
 
 void main() {
-    tex_id = in_tex_id;
-    int uv_index = gl_VertexID % 6  + ((face_id & 1) + flip_id * 2) * 6;
-    uv = uv_coords[uv_indices[uv_index]];
+    vec3 in_position = u_chunk_origin + vec3(
+        in_packed & 255u, (in_packed >> 16) & 1u, (in_packed >> 8) & 255u
+    );
+    int face_id = int((in_packed >> 17) & 7u);
+    int ao_id = int((in_packed >> 20) & 3u);
+    tex_id = int((in_packed >> 23) & 255u);
+    uv = vec2(dot(in_position, u_axes[face_id]), dot(in_position, v_axes[face_id]));
 
     shading = face_shading[face_id] * ao_values[ao_id];
 
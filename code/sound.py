@@ -1,19 +1,35 @@
+import os
 import pygame as pg
 from texture_id import *
-from settings import MAX_SOUND_CHANNELS
+from settings import (
+    MAX_SOUND_CHANNELS,
+    SOUND_CACHE_DIR,
+    SOUND_PRIORITIES,
+    SOUND_MAX_DIST,
+    SOUND_REF_DIST,
+)
+from audio_assets import AudioAssetManager
+from mixer import Mixer
 
 
 class Sound:
     def __init__(self):
         pg.mixer.init()
         pg.mixer.set_num_channels(MAX_SOUND_CHANNELS)
-        self.channel = 0
+        self.mixer = Mixer(
+            MAX_SOUND_CHANNELS,
+            priorities=SOUND_PRIORITIES,
+            max_dist=SOUND_MAX_DIST,
+            ref_dist=SOUND_REF_DIST,
+        )
         self.path = "assets/sounds/"
+        # sounds are decoded in the background: until then they play as silence
+        self.assets = AudioAssetManager(self.path, cache_dir=SOUND_CACHE_DIR)
         #
         self.player_attack = {
-            ID.KNIFE_0: self.load("w_knife.ogg", volume=0.2),
-            ID.PISTOL_0: self.load("w_pistol.wav", volume=0.2),
-            ID.RIFLE_0: self.load("w_rifle.ogg", volume=0.2),
+            ID.KNIFE_0: self.load("w_knife.ogg", volume=0.2, category="weapons"),
+            ID.PISTOL_0: self.load("w_pistol.wav", volume=0.2, category="weapons"),
+            ID.RIFLE_0: self.load("w_rifle.ogg", volume=0.2, category="weapons"),
         }
         #
         self.player_hurt = self.load("p_hurt.ogg")
@@ -25,41 +41,73 @@ class Sound:
         self.open_door = self.load("p_open_door.wav", volume=1.0)
         #
         self.pick_up = {
-            ID.AMMO: self.load("p_ammo.ogg"),
-            ID.MED_KIT: self.load("p_med_kit.mp3"),
-            ID.KEY: self.load("p_key.wav"),
+            ID.AMMO: self.load("p_ammo.ogg", category="pickup"),
+            ID.MED_KIT: self.load("p_med_kit.mp3", category="pickup"),
+            ID.KEY: self.load("p_key.wav", category="pickup"),
         }
         self.pick_up[ID.PISTOL_ICON] = self.pick_up[ID.AMMO]
         self.pick_up[ID.RIFLE_ICON] = self.pick_up[ID.AMMO]
         #
         self.enemy_attack = {
-            ID.SOLDIER_BLUE_0: self.load("n_soldier_attack.mp3", volume=0.8),
-            ID.SOLDIER_BROWN_0: self.load("n_soldier_attack.mp3", volume=0.8),
-            ID.RAT_0: self.load("n_rat_attack.ogg", volume=0.2),
+            ID.SOLDIER_BLUE_0: self.load_npc(
+                "n_soldier_attack.mp3", ID.SOLDIER_BLUE_0, 0.8
+            ),
+            ID.SOLDIER_BROWN_0: self.load_npc(
+                "n_soldier_attack.mp3", ID.SOLDIER_BROWN_0, 0.8
+            ),
+            ID.RAT_0: self.load_npc("n_rat_attack.ogg", ID.RAT_0, 0.2),
         }
         #
         self.spotted = {
-            ID.SOLDIER_BLUE_0: self.load("n_soldier_spotted.ogg", volume=1.0),
-            ID.SOLDIER_BROWN_0: self.load("n_brown_spotted.ogg", volume=0.8),
-            ID.RAT_0: self.load("n_rat_spotted.ogg", volume=0.5),
+            ID.SOLDIER_BLUE_0: self.load_npc(
+                "n_soldier_spotted.ogg", ID.SOLDIER_BLUE_0, 1.0
+            ),
+            ID.SOLDIER_BROWN_0: self.load_npc(
+                "n_brown_spotted.ogg", ID.SOLDIER_BROWN_0, 0.8
+            ),
+            ID.RAT_0: self.load_npc("n_rat_spotted.ogg", ID.RAT_0, 0.5),
         }
         #
         self.death = {
-            ID.SOLDIER_BLUE_0: self.load("n_blue_death.ogg", volume=0.8),
-            ID.SOLDIER_BROWN_0: self.load("n_brown_death.ogg", volume=0.8),
-            ID.RAT_0: self.load("no_sound.mp3", volume=0.0),
+            ID.SOLDIER_BLUE_0: self.load_npc(
+                "n_blue_death.ogg", ID.SOLDIER_BLUE_0, 0.8
+            ),
+            ID.SOLDIER_BROWN_0: self.load_npc(
+                "n_brown_death.ogg", ID.SOLDIER_BROWN_0, 0.8
+            ),
+            ID.RAT_0: self.load_npc("no_sound.mp3", ID.RAT_0, 0.0),
         }
+        # the player's own sounds are needed on every level
+        self.assets.request("player", priority=0)
+        self.assets.request("weapons", priority=0)
         #
-        pg.mixer.music.load(self.path + "theme.ogg")
-        pg.mixer.music.set_volume(0.1)
+        self.is_music_loaded = False
+        music_path = self.path + "theme.ogg"
+        if os.path.exists(music_path):
+            # music is streamed by the mixer, loading only opens the file
+            pg.mixer.music.load(music_path)
+            pg.mixer.music.set_volume(0.1)
+            self.is_music_loaded = True
+        else:
+            print(f"Sound: missing {music_path}, playing without music")
 
-    def load(self, file_name, volume=0.5):
-        sound = pg.mixer.Sound(self.path + file_name)
-        sound.set_volume(volume)
-        return sound
+    def load(self, file_name, volume=0.5, category="player"):
+        return self.assets.get(file_name, volume, category)
 
-    def play(self, sound):
-        pg.mixer.Channel(self.channel).play(sound)
-        self.channel += 1
-        if self.channel == MAX_SOUND_CHANNELS:
-            self.channel = 0
+    def load_npc(self, file_name, npc_id, volume=0.5):
+        return self.load(file_name, volume, category=("npc", npc_id))
+
+    def load_level(self, level_map):
+        """Queue the sounds of the NPC types and items present on this level."""
+        for npc_id in {npc.npc_id for npc in level_map.npc_list}:
+            self.assets.request(("npc", npc_id))
+        if level_map.item_map or level_map.npc_list:
+            # NPCs drop items too
+            self.assets.request("pickup")
+
+    def play_music(self):
+        if self.is_music_loaded:
+            pg.mixer.music.play(-1)
+
+    def play(self, asset, pos=None):
+        self.mixer.play(asset, pos)
@@ -0,0 +1,176 @@
+"""
+Streaming reader of the Tiled maps LevelData loads.
+
+Tile layers are decoded straight into NumPy arrays of gids, from csv or
+base64 data, uncompressed or compressed with zlib, gzip or zstd (needs the
+zstandard package). Infinite maps are read chunk by chunk, and only the
+region their tiles cover is materialized. The XML is parsed incrementally
+and every element is dropped once decoded, so the peak memory is about the
+size of the decoded layers.
+"""
+
+import base64
+import gzip
+import zlib
+from collections import namedtuple
+from xml.etree import ElementTree
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# the top bits of a gid are the flip and rotation flags
+GID_MASK = 0x0FFFFFFF
+
+# gid 0 for plain objects such as the player start; positions in pixels
+TmxObject = namedtuple("TmxObject", "gid x y")
+
+
+def decompress(data, compression):
+    if not compression:
+        return data
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compressed layers need the zstandard package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"layer compression {compression} is not supported")
+
+
+def decode_tiles(node, encoding, compression, width, height):
+    """The (height, width) gids of a <data> or <chunk> node."""
+    text = (node.text or "").strip()
+    if encoding == "csv":
+        gids = np.fromstring(text, dtype=np.uint32, sep=",")
+    elif encoding == "base64":
+        gids = np.frombuffer(
+            decompress(base64.b64decode(text), compression), dtype="<u4"
+        )
+    else:
+        raise ValueError("XML tile data is not supported, use csv or base64")
+    if gids.size != width * height:
+        raise ValueError(f"{gids.size} tiles in a {width}x{height} layer")
+    return (gids & GID_MASK).reshape(height, width)
+
+
+class TmxMap:
+    def __init__(self, path, tile_layers=None):
+        """
+        Tile layers as (depth, width) arrays of gids, 0 for no tile, and the
+        objects of each object group. Only the tile layers named in
+        `tile_layers` are decoded, all of them if None.
+
+        The tiles of an infinite map are moved to start at (0, 0), and its
+        objects with them; `origin` is the shift in tiles.
+        """
+        self.path = path
+        self.tile_layers = tile_layers
+        self.width, self.depth = 0, 0
+        self.tile_width, self.tile_height = 0, 0
+        self.is_infinite = False
+        self.origin = 0, 0
+        self.layers = {}
+        self.objects = {}
+        #
+        self.parse()
+
+    def parse(self):
+        layer, chunks, objects = None, [], []
+        encoding, compression = None, None
+        root = None
+        for event, node in ElementTree.iterparse(self.path, events=("start", "end")):
+            tag = node.tag
+            if event == "start":
+                if root is None:
+                    root = node
+                    self.width = int(node.get("width"))
+                    self.depth = int(node.get("height"))
+                    self.tile_width = int(node.get("tilewidth"))
+                    self.tile_height = int(node.get("tileheight"))
+                    self.is_infinite = node.get("infinite") == "1"
+                elif tag == "layer":
+                    layer = node.get("name")
+                    if self.tile_layers is not None and layer not in self.tile_layers:
+                        layer = None
+                elif tag == "data":
+                    encoding = node.get("encoding")
+                    compression = node.get("compression")
+                continue
+
+            # end of an element: decode it, then drop it from the tree
+            if tag == "chunk" and layer is not None:
+                tiles = decode_tiles(
+                    node,
+                    encoding,
+                    compression,
+                    int(node.get("width")),
+                    int(node.get("height")),
+                )
+                if tiles.any():
+                    chunks.append((int(node.get("x")), int(node.get("y")), tiles))
+            elif tag == "data" and layer is not None:
+                if self.is_infinite:
+                    self.layers[layer], chunks = chunks, []
+                else:
+                    self.layers[layer] = decode_tiles(
+                        node, encoding, compression, self.width, self.depth
+                    )
+            elif tag == "object":
+                gid = int(node.get("gid", 0)) & GID_MASK
+                x, y = float(node.get("x", 0)), float(node.get("y", 0))
+                if gid:
+                    # tile objects are anchored at their bottom left corner
+                    y -= float(node.get("height", self.tile_height))
+                objects.append(TmxObject(gid, x, y))
+            elif tag == "objectgroup":
+                # the collision shapes of embedded tilesets have no name
+                if node.get("name") is not None:
+                    self.objects[node.get("name")] = objects
+                objects = []
+            elif tag not in ("layer", "data", "chunk"):
+                continue
+            node.clear()
+            if tag in ("layer", "objectgroup"):
+                root.clear()
+
+        if self.is_infinite:
+            self.set_used_region()
+
+    def set_used_region(self):
+        """Paste the chunks of an infinite map into arrays over its tiles."""
+        bounds = []
+        for chunks in self.layers.values():
+            for x, y, tiles in chunks:
+                rows = np.flatnonzero(tiles.any(axis=1))
+                cols = np.flatnonzero(tiles.any(axis=0))
+                bounds.append((x + cols[0], y + rows[0], x + cols[-1], y + rows[-1]))
+        if not bounds:
+            raise ValueError(f"{self.path}: no tiles")
+        x0, z0 = np.min(bounds, axis=0)[:2].tolist()
+        x1, z1 = np.max(bounds, axis=0)[2:].tolist()
+        self.origin = x0, z0
+        self.width, self.depth = x1 - x0 + 1, z1 - z0 + 1
+
+        for name, chunks in self.layers.items():
+            layer = np.zeros((self.depth, self.width), dtype=np.uint32)
+            for x, y, tiles in chunks:
+                # the part of the chunk inside the used region
+                cx0, cz0 = max(x0 - x, 0), max(z0 - y, 0)
+                cx1 = min(x1 + 1 - x, tiles.shape[1])
+                cz1 = min(z1 + 1 - y, tiles.shape[0])
+                if cx0 < cx1 and cz0 < cz1:
+                    layer[y + cz0 - z0 : y + cz1 - z0, x + cx0 - x0 : x + cx1 - x0] = (
+                        tiles[cz0:cz1, cx0:cx1]
+                    )
+            self.layers[name] = layer
+
+        dx, dy = x0 * self.tile_width, z0 * self.tile_height
+        for name, objects in self.objects.items():
+            self.objects[name] = [
+                TmxObject(obj.gid, obj.x - dx, obj.y - dy) for obj in objects
+            ]
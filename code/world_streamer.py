@@ -0,0 +1,233 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+import numpy as np
+from settings import *
+from meshes.level_mesh import build_chunk, get_mesh_builder
+from path_finding import StreamedGraph
+
+# approximate size of a tile map entry: dict slot, key tuple and its ints
+TILE_ENTRY_BYTES = 120
+
+
+def load_chunk(level_data, cx, cz):
+    """
+    Tile maps and packed mesh of chunk (cx, cz), read from the level's tile
+    arrays only, so the loader thread shares no state with the game.
+    """
+    width, depth = level_data.width, level_data.depth
+    x0, z0 = cx * LEVEL_CHUNK_SIZE, cz * LEVEL_CHUNK_SIZE
+    x1, z1 = min(x0 + LEVEL_CHUNK_SIZE, width), min(z0 + LEVEL_CHUNK_SIZE, depth)
+    tile_maps = level_data.read_region(x0, z0, x1, z1)
+
+    # faces and AO at the chunk's edge depend on the ring of tiles around it;
+    # past the map's edge the builder sees walls, as for the whole map
+    wx0, wz0 = max(x0 - 1, 0), max(z0 - 1, 0)
+    wx1, wz1 = min(x1 + 1, width), min(z1 + 1, depth)
+    wall_map, floor_map, ceil_map = level_data.read_region(
+        wx0, wz0, wx1, wz1, is_local=True
+    )
+    window = SimpleNamespace(
+        width=wx1 - wx0,
+        depth=wz1 - wz0,
+        wall_map=wall_map,
+        floor_map=floor_map,
+        ceil_map=ceil_map,
+    )
+    chunk_data = build_chunk(get_mesh_builder(window), x0 - wx0, z0 - wz0)
+    return tile_maps, chunk_data
+
+
+class LoadedChunk:
+    def __init__(self, tile_maps, chunk_data):
+        self.tile_maps = tile_maps  # wall, floor and ceil maps of the chunk
+        self.chunk_data = chunk_data  # packed mesh, until handed to the level mesh
+        self.walls = list(tile_maps[0])
+        self.num_bytes = TILE_ENTRY_BYTES * sum(map(len, tile_maps))
+        if chunk_data is not None:
+            self.num_bytes += sum(array.nbytes for array in chunk_data)
+
+
+class WorldStreamer:
+    def __init__(self, eng):
+        """
+        Keeps the chunks of a streamed level loaded only around the player:
+        their tiles in the level map, the NPC wall grid and the path graph,
+        and their mesh in the level mesh. Chunks within LEVEL_STREAM_RADIUS
+        of the player's chunk are loaded, nearest first, by a loader thread
+        as the player moves. Chunks further out stay loaded, least recently
+        near evicted first, while all loaded chunks fit LEVEL_STREAM_BUDGET_KB.
+
+        NPCs run only up to one chunk short of the radius, so the tiles they
+        walk, see and search paths over are loaded. Doors and items are kept
+        for the whole level.
+        """
+        self.eng = eng
+        self.level_map = eng.level_map
+        self.level_data = self.level_map.level_data
+        self.num_chunks_x = -(-self.level_data.width // LEVEL_CHUNK_SIZE)
+        self.num_chunks_z = -(-self.level_data.depth // LEVEL_CHUNK_SIZE)
+
+        # (cx, cz) -> LoadedChunk, least recently near first
+        self.loaded = OrderedDict()
+        self.is_loaded_grid = np.zeros(
+            (self.num_chunks_x, self.num_chunks_z), dtype=bool
+        )
+        self.num_bytes = 0
+        self.center = None  # chunk of the player
+        self.wanted = frozenset()  # chunks within the radius, read by the loader
+        self.requested = set()
+        self.chunk_data = {}  # meshes loaded before the scene exists
+        #
+        self.num_loads = 0
+        self.num_sync_loads = 0
+        self.num_evictions = 0
+        self.load_sec = 0.0  # loader thread time
+        #
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(
+            target=self.run, name="WorldStreamer", daemon=True
+        )
+        self.thread.start()
+        # the player starts with the chunks around it loaded
+        self.update(wait=True)
+
+    def get_graph(self):
+        return StreamedGraph(self.level_map.wall_map, self.is_tile_loaded)
+
+    def get_mesh_data(self):
+        chunk_data, self.chunk_data = self.chunk_data, None
+        return None, chunk_data
+
+    def is_tile_loaded(self, x, z):
+        cx, cz = x // LEVEL_CHUNK_SIZE, z // LEVEL_CHUNK_SIZE
+        return (
+            0 <= cx < self.num_chunks_x
+            and 0 <= cz < self.num_chunks_z
+            and self.is_loaded_grid[cx, cz]
+        )
+
+    def is_simulated(self, tiles):
+        """Mask of the (n, 2) NPC `tiles` near enough to the player to run."""
+        dist = np.abs(tiles // LEVEL_CHUNK_SIZE - self.center).max(axis=1)
+        return dist < LEVEL_STREAM_RADIUS
+
+    # -------- loader thread -------- #
+    def run(self):
+        while (key := self.requests.get()) is not None:
+            if key not in self.wanted:
+                # the player moved away before its turn
+                self.results.put((key, None))
+                continue
+            start = time.perf_counter()
+            try:
+                chunk = LoadedChunk(*load_chunk(self.level_data, *key))
+            except Exception as e:
+                # loaded on the game thread when the player gets close
+                print(f"WorldStreamer: chunk {key}: {e}")
+                chunk = None
+            self.load_sec += time.perf_counter() - start
+            self.results.put((key, chunk))
+
+    def close(self):
+        self.requests.put(None)
+
+    # -------- game thread -------- #
+    def update(self, wait=False):
+        """
+        Follow the player: request the chunks that came within the radius,
+        add the chunks loaded since the last frame and evict over the
+        budget. Chunks next to the player's that are still missing are
+        loaded right away, or all of the radius with `wait`.
+        """
+        pos = self.eng.player.position
+        center = int(pos.x) // LEVEL_CHUNK_SIZE, int(pos.z) // LEVEL_CHUNK_SIZE
+        if center != self.center:
+            self.set_center(center, LEVEL_STREAM_RADIUS if wait else 1)
+
+        while not self.results.empty():
+            key, chunk = self.results.get()
+            self.requested.discard(key)
+            if chunk is not None and key not in self.loaded:
+                self.add_chunk(key, chunk)
+
+        if self.num_bytes > LEVEL_STREAM_BUDGET_KB * 1024:
+            self.evict()
+
+    def set_center(self, center, sync_radius):
+        self.center = center
+        cx, cz = center
+        r = LEVEL_STREAM_RADIUS
+        wanted = [
+            (x, z)
+            for x in range(max(cx - r, 0), min(cx + r + 1, self.num_chunks_x))
+            for z in range(max(cz - r, 0), min(cz + r + 1, self.num_chunks_z))
+        ]
+        wanted.sort(key=lambda key: (key[0] - cx) ** 2 + (key[1] - cz) ** 2)
+        self.wanted = frozenset(wanted)
+
+        for key in wanted:
+            if key in self.loaded:
+                # recently near: evicted last
+                self.loaded.move_to_end(key)
+            elif max(abs(key[0] - cx), abs(key[1] - cz)) <= sync_radius:
+                self.add_chunk(key, LoadedChunk(*load_chunk(self.level_data, *key)))
+                self.num_sync_loads += 1
+            elif key not in self.requested:
+                self.requested.add(key)
+                self.requests.put(key)
+
+    def add_chunk(self, key, chunk):
+        self.loaded[key] = chunk
+        self.is_loaded_grid[key] = True
+        self.num_bytes += chunk.num_bytes
+        self.num_loads += 1
+
+        for tile_map, tiles in zip(self.level_data.get_tile_maps(), chunk.tile_maps):
+            tile_map.update(tiles)
+        self.eng.npc_system.set_walls(chunk.walls, True)
+        if self.chunk_data is not None:
+            # the scene is not made yet
+            self.chunk_data[key] = chunk.chunk_data
+        else:
+            self.eng.scene.level_mesh.add_chunks({key: chunk.chunk_data})
+        # not needed after the upload
+        chunk.chunk_data = None
+
+    def evict(self):
+        """Drop the least recently near chunks outside the radius until within budget."""
+        evicted = []
+        for key in self.loaded:
+            if self.num_bytes <= LEVEL_STREAM_BUDGET_KB * 1024:
+                break
+            if key in self.wanted:
+                continue
+            evicted.append(key)
+            self.num_bytes -= self.loaded[key].num_bytes
+
+        for key in evicted:
+            chunk = self.loaded.pop(key)
+            self.is_loaded_grid[key] = False
+            for tile_map, tiles in zip(
+                self.level_data.get_tile_maps(), chunk.tile_maps
+            ):
+                for tile in tiles:
+                    del tile_map[tile]
+            self.eng.npc_system.set_walls(chunk.walls, False)
+        if evicted:
+            self.eng.scene.level_mesh.remove_chunks(evicted)
+            self.num_evictions += len(evicted)
+
+    def get_stats(self):
+        return {
+            "loaded": len(self.loaded),
+            "in_radius": len(self.wanted),
+            "loaded_kb": self.num_bytes / 1024,
+            "loads": self.num_loads,
+            "sync_loads": self.num_sync_loads,
+            "evictions": self.num_evictions,
+            "load_ms": self.load_sec * 1000,
+        }